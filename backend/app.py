@@ -1,52 +1,12 @@
-from flask import Flask
-from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from flask_sqlalchemy import SQLAlchemy
-from werkzeug.exceptions import HTTPException
+"""开发服务器入口：python app.py
 
-from config import Config
-
-
-db = SQLAlchemy()
-jwt = JWTManager()
-
-
-def create_app():
-    app = Flask(__name__)
-    app.config.from_object(Config)
-
-    db.init_app(app)
-    app.db = db
-
-    CORS(app)
-    jwt.init_app(app)
-
-    from routes.auth import auth_bp
-    from routes.cultural_resources import cultural_resources_bp
-    from routes.main import main_bp
-
-    app.register_blueprint(main_bp)
-    app.register_blueprint(cultural_resources_bp)
-    app.register_blueprint(auth_bp)
-
-    @app.errorhandler(Exception)
-    def handle_exception(e):
-        if isinstance(e, HTTPException):
-            return {"error": e.name, "details": e.description}, e.code
-
-        app.logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
-        return {"error": "Internal Server Error", "details": str(e)}, 500
-
-    @app.shell_context_processor
-    def make_shell_context():
-        from models.cultural_resource import CulturalResource
-        from models.user import User
-
-        return {"db": db, "User": User, "CulturalResource": CulturalResource}
-
-    return app
+应用工厂只有一份，在 app/__init__.py 中；app/ 包与本文件同名，import app 总是得到该包，
+因此这里直接复用包里的 create_app，模型和路由绑定的也是同一个 db 实例。
+"""
+from app import create_app
 
 
 if __name__ == "__main__":
     app_instance = create_app()
+    app_instance.extensions['warmup'].start()
     app_instance.run(debug=True, host="0.0.0.0", port=5000)
@@ -1,33 +1,133 @@
+import importlib
+import os
+import threading
+
 from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.exceptions import HTTPException
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import Config
+from services.db_routing import RoutingSession
+
+
+# 应用根目录固定为 backend/，无论从 python app.py、flask --app app 还是 wsgi:app 启动都一致
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# (模块, 蓝图变量名)，按注册顺序排列
+BLUEPRINTS = (
+    ('routes.main', 'main_bp'),
+    ('routes.cultural_resources', 'cultural_resources_bp'),
+    ('routes.auth', 'auth_bp'),
+    ('routes.media', 'media_bp'),
+)
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
 
 
-def create_app():
-    app = Flask(__name__)
-    app.config.from_object(Config)
+def register_blueprints(app):
+    for module_name, attribute in BLUEPRINTS:
+        app.register_blueprint(getattr(importlib.import_module(module_name), attribute))
+
+
+class LazyBlueprints:
+    """WSGI 中间件：第一个请求到达时才导入路由模块（以及它们依赖的模型和服务）并注册蓝图
+
+    用于自动扩缩容、按需拉起的实例，缩短从进程启动到能接受连接的时间；
+    gunicorn preload 等常驻部署应保持关闭，让 fork 出的 worker 共享已导入的模块。
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if not self.loaded:
+                register_blueprints(self.app)
+                self.loaded = True
+
+    def __call__(self, environ, start_response):
+        if not self.loaded:
+            self.load()
+        return self.wsgi_app(environ, start_response)
+
+
+def create_app(config_object=Config, minimal=False):
+    """应用工厂
+
+    minimal=True 时只初始化数据库、搜索索引和密码哈希，不注册蓝图和请求钩子，
+    供 init_db.py 这类只需要建表、写初始数据的脚本使用。
+    """
+    app = Flask(__name__, root_path=BACKEND_DIR)
+    app.config.from_object(config_object)
 
     db.init_app(app)
     app.db = db
 
+    from services.passwords import password_hasher
+    from services.search import search_index
+
+    if minimal:
+        # 脚本里最多计算几个哈希，直接在当前线程完成，不必拉起进程池
+        app.config['PASSWORD_HASH_WORKERS'] = 0
+        search_index.init_app(app)
+        password_hasher.init_app(app)
+        return app
+
     CORS(app)
     jwt.init_app(app)
 
-    from routes.auth import auth_bp
-    from routes.cultural_resources import cultural_resources_bp
-    from routes.main import main_bp
+    from services.avatar_pipeline import avatar_pipeline
+    from services.catalog_snapshot import catalog_snapshot
+    from services.compression import compressor
+    from services.count_cache import count_cache
+    from services.counters import counter_buffer
+    from services.db_routing import replica_router
+    from services.identity import user_cache
+    from services.instrumentation import instrumentation
+    from services.json_provider import init_json_provider
+    from services.media import media_server
+    from services.rankings import rankings
+    from services.rate_limit import rate_limiter
+    from services.response_cache import response_cache
+    from services.warmup import warmup
+
+    init_json_provider(app)
+    instrumentation.init_app(app)
+    compressor.init_app(app)
+    replica_router.init_app(app)
+    rate_limiter.init_app(app)
+    search_index.init_app(app)
+    count_cache.init_app(app)
+    counter_buffer.init_app(app)
+    rankings.init_app(app)
+    catalog_snapshot.init_app(app)
+    response_cache.init_app(app)
+    avatar_pipeline.init_app(app)
+    media_server.init_app(app)
+    password_hasher.init_app(app)
+    user_cache.init_app(app, jwt)
+    warmup.init_app(app)
+
+    if app.config.get('LAZY_BLUEPRINTS'):
+        app.wsgi_app = LazyBlueprints(app)
+        app.extensions['lazy_blueprints'] = app.wsgi_app
+    else:
+        register_blueprints(app)
+
+    # 反向代理之后 remote_addr 是代理的地址，按可信代理层数从 X-Forwarded-For 取回客户端 IP
+    if app.config.get('PROXY_FIX_X_FOR'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    from commands import register_commands
 
-    app.register_blueprint(main_bp)
-    app.register_blueprint(cultural_resources_bp)
-    app.register_blueprint(auth_bp)
+    register_commands(app)
 
     @app.errorhandler(Exception)
     def handle_exception(e):
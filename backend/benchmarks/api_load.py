@@ -0,0 +1,252 @@
+"""API 压测
+
+播种合成数据后按场景并发请求资源列表（分页、分类/标签过滤、搜索）、资源详情、点赞和登录，
+输出每个场景的 p50/p95/p99 延迟、吞吐以及每个请求的 SQL 查询数。
+
+    python benchmarks/api_load.py --resources 5000 --requests 500 --concurrency 8
+    python benchmarks/api_load.py --save-baseline benchmarks/baseline.json
+    python benchmarks/api_load.py --baseline benchmarks/baseline.json --tolerance 0.2
+
+默认在进程内通过 test_client 发请求（可统计查询数）；--base-url 指向已启动的服务时改为
+真实 HTTP 请求，此时数据需事先用 seed.py 写入同一个库，且不统计查询数；被测服务应以
+RATE_LIMIT_ENABLED=false 启动，否则登录、搜索场景会被限流。
+与基线比较时任一场景 p95 变慢、吞吐下降超过 tolerance，或查询数增加，进程以状态码 1 退出。
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import percentile, use_database  # noqa: E402
+from benchmarks.seed import BENCH_PASSWORD, CATEGORIES, TAGS, TOPICS, seed  # noqa: E402
+
+SCENARIOS = ('list', 'list_category', 'list_tag', 'search', 'detail', 'like', 'login')
+
+
+class InProcessClient:
+    """每个线程一个 test_client，并按线程统计执行的 SQL 条数"""
+
+    def __init__(self, app):
+        from sqlalchemy import event
+
+        self.app = app
+        self._local = threading.local()
+        with app.app_context():
+            for engine in app.db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._count_query)
+
+    def _count_query(self, *args):
+        self._local.queries = getattr(self._local, 'queries', 0) + 1
+
+    def request(self, method, path, headers=None, body=None):
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.app.test_client()
+        self._local.queries = 0
+        response = self._local.client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.get_json(silent=True), self._local.queries
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, headers=None, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = dict(headers or {})
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                payload = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            payload = e.read()
+            status = e.code
+        try:
+            parsed = json.loads(payload)
+        except ValueError:
+            parsed = None
+        return status, parsed, None
+
+
+def build_requests(name, count, rng, resource_ids, users, token):
+    """生成某个场景的 (method, path, headers, body) 列表"""
+    auth = {'Authorization': f'Bearer {token}'}
+    requests = []
+    for _ in range(count):
+        if name == 'list':
+            requests.append(('GET', f'/api/resources/?page={rng.randint(1, 20)}&limit=20', None, None))
+        elif name == 'list_category':
+            category = urllib.request.quote(rng.choice(CATEGORIES))
+            requests.append(('GET', f'/api/resources/?category={category}&page={rng.randint(1, 5)}', None, None))
+        elif name == 'list_tag':
+            tag = urllib.request.quote(rng.choice(TAGS))
+            requests.append(('GET', f'/api/resources/?tag={tag}&page={rng.randint(1, 5)}', None, None))
+        elif name == 'search':
+            keyword = urllib.request.quote(rng.choice(TOPICS))
+            requests.append(('GET', f'/api/resources/?search={keyword}', None, None))
+        elif name == 'detail':
+            requests.append(('GET', f'/api/resources/{rng.choice(resource_ids)}', None, None))
+        elif name == 'like':
+            requests.append(('POST', f'/api/resources/{rng.choice(resource_ids)}/like', auth, None))
+        elif name == 'login':
+            username = f'bench_{rng.randrange(users)}'
+            requests.append(('POST', '/api/auth/login', None, {'username': username, 'password': BENCH_PASSWORD}))
+    return requests
+
+
+def run_scenario(client, requests, concurrency):
+    def send(item):
+        method, path, headers, body = item
+        started = time.perf_counter()
+        status, _, queries = client.request(method, path, headers, body)
+        return status, time.perf_counter() - started, queries
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, requests))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for status, latency, _ in results if status < 400]
+    queries = [count for _, _, count in results if count is not None]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for status, _, _ in results if status >= 400),
+        'rps': round(len(results) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """返回回归列表，每项为 (场景, 指标, 基线值, 当前值)"""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        if current['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append((name, 'p95_ms', base['p95_ms'], current['p95_ms']))
+        if current['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append((name, 'rps', base['rps'], current['rps']))
+        # 查询数是确定的，超过基线即视为回归
+        if (current['queries_per_request'] is not None and base.get('queries_per_request') is not None
+                and current['queries_per_request'] > base['queries_per_request'] + 0.5):
+            regressions.append((name, 'queries_per_request', base['queries_per_request'],
+                                current['queries_per_request']))
+    return regressions
+
+
+def print_table(results, baseline=None):
+    print(f'{"scenario":<15}{"reqs":>6}{"err":>5}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+          f'{"q/req":>7}{"base p95":>10}{"base q":>8}')
+    for name, row in results['scenarios'].items():
+        base = (baseline or {}).get('scenarios', {}).get(name, {})
+        queries = row['queries_per_request']
+        print(f'{name:<15}{row["requests"]:>6}{row["errors"]:>5}{row["rps"]:>9.1f}{row["p50_ms"]:>9.2f}'
+              f'{row["p95_ms"]:>9.2f}{row["p99_ms"]:>9.2f}{(queries if queries is not None else "-"):>7}'
+              f'{base.get("p95_ms", "-"):>10}{base.get("queries_per_request", "-"):>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--resources', type=int, default=2000)
+    parser.add_argument('--content-chars', type=int, default=600)
+    parser.add_argument('--requests', type=int, default=300, help='每个场景的请求数')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--database-url', default=None, help='默认使用临时 SQLite 文件')
+    parser.add_argument('--base-url', default=None, help='对已启动的服务发 HTTP 请求，不在进程内创建应用')
+    parser.add_argument('--no-seed', action='store_true', help='跳过播种，直接使用库中已有的数据')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='把结果写入 JSON 文件')
+    parser.add_argument('--save-baseline', default=None, help='把本次结果保存为基线')
+    parser.add_argument('--baseline', default=None, help='与已保存的基线比较')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    if args.base_url:
+        client = HttpClient(args.base_url)
+    else:
+        use_database(args.database_url, prefix='api-load-')
+        # 密码哈希在请求线程内计算，避免在压测进程里额外启动进程池
+        os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+        # 压测同一身份反复登录、搜索，关闭限流以免测到的是 429
+        os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+        # 数据在 create_app 之后才写入，启动预热没有意义
+        os.environ.setdefault('WARMUP_ENABLED', 'false')
+        from app import create_app
+
+        app = create_app()
+        if not args.no_seed:
+            started = time.perf_counter()
+            result = seed(app, args.users, args.resources, args.content_chars, args.seed)
+            print(f"seeded {args.users} users, {result['imported']} resources "
+                  f'in {time.perf_counter() - started:.1f}s')
+        client = InProcessClient(app)
+
+    status, payload, _ = client.request('GET', '/api/resources/?limit=100')
+    resource_ids = [item['id'] for item in (payload or {}).get('data', [])]
+    if status != 200 or not resource_ids:
+        sys.exit(f'no resources available (GET /api/resources/ returned {status})')
+    status, payload, _ = client.request('POST', '/api/auth/login',
+                                        body={'username': 'bench_0', 'password': BENCH_PASSWORD})
+    if status != 200:
+        sys.exit(f'login as bench_0 failed ({status}); seed the database with benchmarks/seed.py first')
+    token = payload['access_token']
+
+    rng = random.Random(args.seed)
+    results = {
+        'meta': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'resources': args.resources,
+            'mode': 'http' if args.base_url else 'in-process',
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'scenarios': {},
+    }
+    for name in scenarios:
+        requests = build_requests(name, args.requests, rng, resource_ids, args.users, token)
+        results['scenarios'][name] = run_scenario(client, requests, args.concurrency)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, base, current in regressions:
+            print(f'REGRESSION {name}: {metric} {base} -> {current}')
+        if regressions:
+            sys.exit(1)
+        print('no regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
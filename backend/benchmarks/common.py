@@ -0,0 +1,20 @@
+"""基准脚本共用的小工具"""
+import os
+import tempfile
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def use_database(database_url=None, prefix='bench-'):
+    """设置 DATABASE_URL（须在导入 app/config 之前调用），未指定时使用临时 SQLite 文件"""
+    if not database_url:
+        db_path = os.path.join(tempfile.mkdtemp(prefix=prefix), 'bench.db')
+        database_url = f'sqlite:///{db_path}'
+    os.environ['DATABASE_URL'] = database_url
+    return database_url
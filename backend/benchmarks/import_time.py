@@ -0,0 +1,169 @@
+"""冷启动耗时基准
+
+在全新的子进程里分别以三种方式创建应用，多次取中位数：
+
+- eager：默认模式，create_app 时导入全部路由、模型和服务
+- lazy：LAZY_BLUEPRINTS=true，第一个请求到达时才注册蓝图
+- minimal：create_app(minimal=True)，init_db.py 使用的精简工厂
+
+输出 create_app 完成时间、第一个请求（GET /health）完成时间，并用 python -X importtime
+统计 create_app 阶段导入的模块数，列出累计耗时最高的模块以及项目自身（routes/services/models）
+模块的耗时。
+
+    python benchmarks/import_time.py --runs 7 --top 15
+    python benchmarks/import_time.py --save-baseline import-baseline.json
+    python benchmarks/import_time.py --baseline import-baseline.json --tolerance 0.25
+
+与基线比较时任一模式的 create_app 或首个请求耗时增加超过 tolerance，进程以状态码 1 退出，
+可以放进 CI 跟踪启动时间的回归。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import use_database  # noqa: E402
+
+MODES = ('eager', 'lazy', 'minimal')
+PROJECT_PACKAGES = ('app', 'commands', 'config', 'models', 'routes', 'services')
+
+CHILD = '''
+import json
+import time
+
+started = time.perf_counter()
+from app import create_app
+
+app = create_app(minimal={minimal})
+ready = time.perf_counter()
+first_request = None
+if {request}:
+    app.test_client().get('/health')
+    first_request = (time.perf_counter() - started) * 1000
+print(json.dumps({{'create_app_ms': (ready - started) * 1000, 'first_request_ms': first_request}}))
+'''
+
+
+def child_env(mode):
+    # 密码哈希在当前线程计算，避免子进程里拉起进程池
+    # 启动预热在后台线程进行，关闭以免与计时的首个请求争用 CPU
+    return dict(os.environ, PASSWORD_HASH_WORKERS='0', WARMUP_ENABLED='false',
+                LAZY_BLUEPRINTS='true' if mode == 'lazy' else 'false')
+
+
+def run_child(mode, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    # -X importtime 只统计 create_app 阶段，lazy 模式下路由模块不会出现在报告里
+    command += ['-c', CHILD.format(minimal=mode == 'minimal', request=mode != 'minimal' and not importtime)]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=child_env(mode), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'{mode} child failed:\n{result.stderr}')
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 的输出，返回 {模块: 累计微秒}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        modules[name] = max(modules.get(name, 0), int(cumulative_us))
+    return modules
+
+
+def measure(mode, runs):
+    samples = [run_child(mode)[0] for _ in range(runs)]
+    row = {'create_app_ms': round(statistics.median(s['create_app_ms'] for s in samples), 1)}
+    first = [s['first_request_ms'] for s in samples if s['first_request_ms'] is not None]
+    row['first_request_ms'] = round(statistics.median(first), 1) if first else None
+
+    _, stderr = run_child(mode, importtime=True)
+    modules = parse_importtime(stderr)
+    row['modules'] = len(modules)
+    row['top'] = sorted(modules.items(), key=lambda item: item[1], reverse=True)
+    return row
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for mode, current in results['modes'].items():
+        base = baseline.get('modes', {}).get(mode)
+        if not base:
+            continue
+        for metric in ('create_app_ms', 'first_request_ms'):
+            if current.get(metric) is None or base.get(metric) is None:
+                continue
+            if current[metric] > base[metric] * (1 + tolerance):
+                regressions.append((mode, metric, base[metric], current[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='每种模式列出累计导入耗时最高的模块数')
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--database-url', default=None, help='默认使用临时 SQLite 文件')
+    parser.add_argument('--save-baseline', default=None)
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f'unknown modes: {", ".join(sorted(unknown))}')
+
+    use_database(args.database_url, prefix='import-time-')
+    # 先完整导入一次，写好 .pyc，计时时不包含编译时间
+    run_child('eager')
+
+    results = {'meta': {'runs': args.runs, 'python': sys.version.split()[0]}, 'modes': {}}
+    for mode in modes:
+        results['modes'][mode] = measure(mode, args.runs)
+
+    print(f'{"mode":<10}{"create_app ms":>15}{"first request ms":>18}{"modules":>9}')
+    for mode, row in results['modes'].items():
+        first = row['first_request_ms']
+        print(f'{mode:<10}{row["create_app_ms"]:>15.1f}{(first if first is not None else "-"):>18}'
+              f'{row["modules"]:>9}')
+    for mode, row in results['modes'].items():
+        print(f'\n{mode}: top {args.top} modules by cumulative import time')
+        for name, cumulative_us in row['top'][:args.top]:
+            print(f'  {cumulative_us / 1000:>8.1f} ms  {name}')
+        project = [(name, us) for name, us in row['top'] if name.split('.')[0] in PROJECT_PACKAGES]
+        print(f'{mode}: project modules ({len(project)})')
+        for name, cumulative_us in project[:args.top]:
+            print(f'  {cumulative_us / 1000:>8.1f} ms  {name}')
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        saved = {'meta': results['meta'],
+                 'modes': {mode: {key: value for key, value in row.items() if key != 'top'}
+                           for mode, row in results['modes'].items()}}
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, ensure_ascii=False, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for mode, metric, base, current in regressions:
+            print(f'REGRESSION {mode}: {metric} {base} -> {current}')
+        if regressions:
+            sys.exit(1)
+        print('no regressions against baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""登录吞吐基准
+
+在临时 SQLite 库上按不同的密码哈希配置并发调用 /api/auth/login，输出每种配置的
+登录吞吐、延迟分位数、503 拒绝数，以及同时段内 /health 的延迟（衡量哈希对其他接口的影响）。
+
+    python benchmarks/login_throughput.py --requests 200 --concurrency 8 \\
+        --methods pbkdf2:sha256:600000,scrypt:32768:8:1 --workers 0,4
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import percentile, use_database  # noqa: E402
+
+
+def run_case(app, method, workers, args):
+    from models.user import User
+    from services.passwords import password_hasher
+
+    password_hasher.shutdown()
+    app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=workers)
+    password_hasher.init_app(app)
+
+    with app.app_context():
+        session = app.db.session
+        user = session.query(User).filter_by(username='bench').first()
+        user.set_password('bench-password')
+        session.commit()
+
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return local.client
+
+    def login(_):
+        started = time.perf_counter()
+        response = client().post('/api/auth/login', json={'username': 'bench', 'password': 'bench-password'})
+        return response.status_code, time.perf_counter() - started
+
+    # 预热：启动进程池，排除首次 spawn 的开销
+    login(None)
+
+    probe_latencies = []
+    done = threading.Event()
+
+    def probe():
+        probe_client = app.test_client()
+        while not done.is_set():
+            started = time.perf_counter()
+            probe_client.get('/health')
+            probe_latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    probe_thread = threading.Thread(target=probe, daemon=True)
+    probe_thread.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(login, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    probe_thread.join()
+
+    latencies = [latency for status, latency in results if status == 200]
+    rejected = sum(1 for status, _ in results if status == 503)
+    return {
+        'method': method,
+        'workers': workers,
+        'ok': len(latencies),
+        'rejected': rejected,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'health_p95': percentile(probe_latencies, 95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--methods', default='pbkdf2:sha256:600000,pbkdf2:sha256:260000,scrypt:32768:8:1')
+    parser.add_argument('--workers', default=f'0,{min(4, os.cpu_count() or 1)}',
+                        help='逗号分隔的进程池大小，0 表示在请求线程内计算')
+    parser.add_argument('--max-queue', type=int, default=None, help='覆盖 PASSWORD_HASH_MAX_QUEUE')
+    args = parser.parse_args()
+
+    use_database(prefix='login-bench-')
+    os.environ['COUNTER_BUFFER_ENABLED'] = 'false'
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    os.environ['WARMUP_ENABLED'] = 'false'
+
+    from app import create_app
+    from models.user import User
+
+    app = create_app()
+    if args.max_queue is not None:
+        app.config['PASSWORD_HASH_MAX_QUEUE'] = args.max_queue
+    with app.app_context():
+        app.db.create_all()
+        user = User(username='bench', email='bench@example.com')
+        user.password_hash = ''
+        app.db.session.add(user)
+        app.db.session.commit()
+
+    print(f'{"method":<26}{"workers":>8}{"ok":>6}{"503":>6}{"login/s":>10}'
+          f'{"p50 ms":>9}{"p95 ms":>9}{"health p95":>12}')
+    for method in args.methods.split(','):
+        for workers in (int(value) for value in args.workers.split(',')):
+            row = run_case(app, method.strip(), workers, args)
+            print(f'{row["method"]:<26}{row["workers"]:>8}{row["ok"]:>6}{row["rejected"]:>6}'
+                  f'{row["rps"]:>10.1f}{row["p50"]:>9.1f}{row["p95"]:>9.1f}{row["health_p95"]:>12.1f}')
+
+    from services.passwords import password_hasher
+    password_hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
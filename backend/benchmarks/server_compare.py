@@ -0,0 +1,114 @@
+"""调试服务器与生产入口的吞吐对比
+
+在临时 SQLite 库上播种数据，依次启动 app.run(debug=True) 与 gunicorn（gunicorn.conf.py，
+preload + gthread），对资源列表和详情各发送相同数量的 HTTP 请求，输出 req/s 与延迟分位数。
+
+    python benchmarks/server_compare.py --requests 2000 --concurrency 16
+    python benchmarks/server_compare.py --workers 4 --threads 4
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.api_load import HttpClient, run_scenario  # noqa: E402
+from benchmarks.common import use_database  # noqa: E402
+from benchmarks.seed import seed  # noqa: E402
+
+# create_app 不启动预热，与 app.py 一样由入口自己启动，否则 /ready 一直返回 503
+DEBUG_SERVER = ('from app import create_app; app = create_app(); app.extensions["warmup"].start(); '
+                'app.run(debug=True, use_reloader=False, port={port})')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with status {process.returncode}')
+        try:
+            with urllib.request.urlopen(base_url + '/ready', timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not become ready in time')
+
+
+def run_mode(name, command, env, port, args, resource_ids):
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        wait_until_ready(base_url, process)
+        client = HttpClient(base_url)
+        rng = random.Random(args.seed)
+        scenarios = {
+            'list': [('GET', f'/api/resources/?page={rng.randint(1, 20)}&limit=20', None, None)
+                     for _ in range(args.requests)],
+            'detail': [('GET', f'/api/resources/{rng.choice(resource_ids)}', None, None)
+                       for _ in range(args.requests)],
+        }
+        # 预热：建立连接池、填充响应缓存
+        run_scenario(client, scenarios['list'][:50], args.concurrency)
+        return {scenario: run_scenario(client, requests, args.concurrency)
+                for scenario, requests in scenarios.items()}
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resources', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=2000, help='每个场景的请求数')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=None, help='gunicorn 进程数，默认按 gunicorn.conf.py')
+    parser.add_argument('--threads', type=int, default=None, help='gunicorn 每进程线程数')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    database_url = use_database(prefix='server-compare-')
+    from app import create_app
+
+    app = create_app()
+    seed(app, users=10, resources=args.resources)
+    with app.app_context():
+        from models.cultural_resource import CulturalResource
+        resource_ids = [id for (id,) in app.db.session.query(CulturalResource.id).limit(500)]
+
+    env = dict(os.environ, DATABASE_URL=database_url, GUNICORN_ACCESS_LOG='', PASSWORD_HASH_WORKERS='0')
+    if args.workers:
+        env['GUNICORN_WORKERS'] = str(args.workers)
+    if args.threads:
+        env['GUNICORN_THREADS'] = str(args.threads)
+
+    modes = []
+    port = free_port()
+    modes.append(('debug server', [sys.executable, '-c', DEBUG_SERVER.format(port=port)], port))
+    port = free_port()
+    modes.append(('gunicorn', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                               '-b', f'127.0.0.1:{port}', 'wsgi:app'], port))
+
+    print(f'cpu cores: {os.cpu_count()}, requests per scenario: {args.requests}, concurrency: {args.concurrency}')
+    print(f'{"server":<14}{"scenario":<10}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"errors":>8}')
+    for name, command, port in modes:
+        results = run_mode(name, command, env, port, args, resource_ids)
+        for scenario, row in results.items():
+            print(f'{name:<14}{scenario:<10}{row["rps"]:>9.1f}{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}'
+                  f'{row["p99_ms"]:>9.2f}{row["errors"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
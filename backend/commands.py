@@ -0,0 +1,59 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+
+tags_cli = AppGroup('tags', help='标签维护命令')
+
+
+@tags_cli.command('backfill')
+@click.option('--batch-size', default=500, show_default=True, help='每批处理的资源数')
+def backfill_tags_command(batch_size):
+    """把旧的逗号分隔 tags 字段迁移到 tags/resource_tags 表"""
+    from services.tags import backfill_tags
+
+    migrated = backfill_tags(current_app.db.session, batch_size=batch_size)
+    click.echo(f'Backfilled tags for {migrated} resources.')
+
+
+resources_cli = AppGroup('resources', help='文化资源批量导入导出')
+
+
+@resources_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']), help='默认按扩展名判断')
+@click.option('--chunk-size', default=500, show_default=True, help='每个事务插入的记录数')
+def import_resources_command(source, fmt, chunk_size):
+    """从 JSONL/CSV 文件（- 表示标准输入）流式导入资源"""
+    from services.bulk import detect_format, import_resources, iter_records
+
+    fmt = detect_format(source.name, fmt)
+    result = import_resources(current_app.db.session, iter_records(source, fmt), chunk_size=chunk_size)
+    for error in result['errors']:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    click.echo(f"Imported {result['imported']} resources, {result['failed']} failed.")
+
+
+@resources_cli.command('backfill-sort-keys')
+def backfill_sort_keys_command():
+    """回填 priority/created_at 为 NULL 的资源，并为这两列加上 NOT NULL 约束"""
+    from services.pagination import backfill_sort_keys
+
+    backfilled = backfill_sort_keys(current_app.db.session)
+    click.echo(f'Backfilled {backfilled} NULL sort key values.')
+
+
+@resources_cli.command('export')
+@click.argument('target', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']), default='jsonl', show_default=True)
+def export_resources_command(target, fmt):
+    """把全部资源流式导出到文件（默认标准输出）"""
+    from services.bulk import iter_export
+
+    for chunk in iter_export(current_app.db.session, fmt):
+        target.write(chunk)
+
+
+def register_commands(app):
+    app.cli.add_command(tags_cli)
+    app.cli.add_command(resources_cli)
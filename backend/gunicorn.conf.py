@@ -0,0 +1,50 @@
+"""gunicorn 配置：python -m gunicorn -c gunicorn.conf.py wsgi:app
+
+进程数与线程数默认按 CPU 核数计算，均可通过环境变量覆盖。preload_app 让应用在主进程
+加载一次再 fork，各 worker 共享只读内存页；fork 之后由 post_fork 丢弃继承的连接池并启动该 worker 的预热，
+worker 退出（包括 HUP 平滑重载、max_requests 轮换）时由 worker_exit 落库未提交的计数。
+"""
+import multiprocessing
+import os
+
+cores = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+# 请求以数据库 I/O 为主，每核一个进程、每进程多线程；密码哈希已在独立进程池中计算
+workers = int(os.environ.get('GUNICORN_WORKERS', os.environ.get('WEB_CONCURRENCY', cores + 1)))
+# 每个 worker 都有自己的密码哈希进程池，池大小按 worker 数分摊 CPU 核数（至少 1），
+# 否则 workers × min(4, cores) 个哈希进程会与 worker 争抢同样的几个核；config.py 读取该变量
+os.environ.setdefault('PASSWORD_HASH_WORKERS', str(max(1, cores // workers)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes', 'on')
+# preload 时主进程里的预热（连接、缓存）fork 后无法复用，交给 post_fork 在每个 worker 中进行；
+# 配置文件在加载应用之前执行，create_app 读取到该变量后跳过预热
+os.environ.setdefault('WARMUP_AFTER_FORK', 'true' if preload_app else 'false')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# 定期轮换 worker，抖动避免所有 worker 同时重启
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+# 设为空字符串可关闭访问日志
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    from services.lifecycle import after_fork
+
+    if preload_app:
+        # preload 时 worker.app.wsgi() 返回主进程中已加载的应用
+        after_fork(worker.app.wsgi())
+
+
+def worker_exit(server, worker):
+    from services.lifecycle import shutdown
+
+    # worker.wsgi 在 load_wsgi() 成功后才存在；应用启动失败时不能在这里抛出 AttributeError 掩盖真正的错误
+    wsgi = getattr(worker, 'wsgi', None)
+    if wsgi is not None:
+        shutdown(wsgi)
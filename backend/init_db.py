@@ -1,16 +1,30 @@
 from app import create_app, db
 from models.cultural_resource import CulturalResource
+from models.resource_like import ResourceLike
+from models.tag import Tag, resource_tags
 from models.user import User
+from services.pagination import backfill_sort_keys
+from services.search import search_index
+from services.tags import backfill_tags
 
 
 def init_database():
-    app = create_app()
+    # 只建表和写初始数据，不需要路由、缓存和请求钩子
+    app = create_app(minimal=True)
 
     with app.app_context():
         print("Creating Flask backend tables...")
         db.create_all()
+        # create_all 不会为已存在的表补建索引，这里单独检查
+        for table in (CulturalResource.__table__, Tag.__table__, resource_tags, ResourceLike.__table__):
+            for index in table.indexes:
+                index.create(bind=db.engine, checkfirst=True)
         print("Flask backend tables created.")
 
+        print("Preparing search index...")
+        search_index.ensure_schema()
+        print(f"Search index ready ({search_index.backend().name}).")
+
         admin = User.query.filter_by(username="admin").first()
         if not admin:
             print("Creating default admin user...")
@@ -46,6 +60,14 @@ def init_database():
         else:
             print("Sample cultural resource already exists.")
 
+        print("Migrating resource tags...")
+        migrated = backfill_tags(db.session)
+        print(f"Resource tags migrated for {migrated} resources.")
+
+        print("Backfilling resource sort keys...")
+        backfilled = backfill_sort_keys(db.session)
+        print(f"Backfilled {backfilled} NULL sort key values.")
+
         print("Flask backend initialization finished.")
 
 
@@ -4,6 +4,11 @@ from datetime import datetime
 
 class CulturalResource(db.Model):
     __tablename__ = 'cultural_resources'
+    __table_args__ = (
+        # 列表排序 (priority, created_at, id) 与游标分页共用的复合索引
+        db.Index('idx_cultural_resources_sort', 'priority', 'created_at', 'id'),
+        db.Index('idx_cultural_resources_category_sort', 'category', 'priority', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)  # 资源标题
@@ -17,10 +22,11 @@ class CulturalResource(db.Model):
     cover_image = db.Column(db.String(255))  # 封面图片
     media_url = db.Column(db.String(255))  # 媒体文件链接（视频、音频、3D模型等）
     status = db.Column(db.String(20), default='published')  # 状态：draft, published, archived
-    priority = db.Column(db.Integer, default=0)  # 排序优先级
+    priority = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 排序优先级，参与游标分页，不能为 NULL
     view_count = db.Column(db.Integer, default=0)  # 浏览次数
     like_count = db.Column(db.Integer, default=0)  # 点赞数
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+                           server_default=db.func.current_timestamp())  # 排序与游标分页的第二列，不能为 NULL
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __repr__(self):
@@ -0,0 +1,21 @@
+from app import db
+from datetime import datetime
+
+
+class ResourceLike(db.Model):
+    """用户对文化资源的点赞记录，(user_id, resource_id) 唯一，重复点赞不会重复计数"""
+
+    __tablename__ = 'resource_likes'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'resource_id', name='uq_resource_likes_user_resource'),
+        db.Index('idx_resource_likes_resource_id', 'resource_id'),
+    )
+
+    # SQLite 只有 INTEGER PRIMARY KEY 才会自增
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    resource_id = db.Column(db.Integer, db.ForeignKey('cultural_resources.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ResourceLike user={self.user_id} resource={self.resource_id}>'
@@ -0,0 +1,23 @@
+from app import db
+from datetime import datetime
+
+
+# 资源与标签的多对多关联，(tag_id, resource_id) 索引用于按标签查资源
+resource_tags = db.Table(
+    'resource_tags',
+    db.Column('resource_id', db.Integer, db.ForeignKey('cultural_resources.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('idx_resource_tags_tag_resource', 'tag_id', 'resource_id'),
+)
+
+
+class Tag(db.Model):
+    __tablename__ = 'tags'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False, index=True)  # 标签名
+    resource_count = db.Column(db.Integer, nullable=False, default=0, index=True)  # 预先计算的资源数，用于标签云
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Tag {self.name}>'
@@ -1,8 +1,7 @@
 from datetime import datetime
 
-from werkzeug.security import check_password_hash, generate_password_hash
-
 from app import db
+from services.passwords import password_hasher
 
 
 class User(db.Model):
@@ -20,10 +19,26 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
+
+    @classmethod
+    def find_for_login(cls, session, identifier):
+        """按用户名或邮箱查找用户
+
+        不使用 username = x OR email = x（MySQL 往往无法合并两个索引而退化为全表扫描），
+        而是按输入形态只走其中一个唯一索引；含 @ 但邮箱未命中时再按用户名查一次。
+        """
+        if '@' in identifier:
+            user = session.query(cls).filter(cls.email == identifier).first()
+            if user is not None:
+                return user
+        return session.query(cls).filter(cls.username == identifier).first()
 
     def __repr__(self):
         return f"<User {self.username}>"
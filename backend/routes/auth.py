@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, current_user, jwt_required, get_jwt_identity
 from models.user import User
+from services.avatar_pipeline import allowed_file, avatar_pipeline
+from services.db_routing import read_only
+from services.identity import identity_claims, user_cache
+from services.passwords import PasswordHashBusy
+from services.serializers import user_profile, user_summary
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 import re
 
 
@@ -24,15 +30,7 @@ def register():
         if not data or not data.get('password') or len(data['password']) < 6:
             return jsonify({'message': '密码至少需要6个字符'}), 400
         
-        # 检查用户名或邮箱是否已存在
-        existing_user = current_app.db.session.query(User).filter(
-            (User.username == data['username']) | (User.email == data['email'])
-        ).first()
-        
-        if existing_user:
-            return jsonify({'message': '用户名或邮箱已被注册'}), 400
-        
-        # 创建新用户
+        # 创建新用户；用户名/邮箱是否重复由唯一约束判断，避免先查后插的并发竞争
         user = User(
             username=data['username'],
             email=data['email']
@@ -40,7 +38,11 @@ def register():
         user.set_password(data['password'])
         
         current_app.db.session.add(user)
-        current_app.db.session.flush()  # 获取分配的ID，但暂不提交事务
+        try:
+            current_app.db.session.flush()  # 获取分配的ID，但暂不提交事务
+        except IntegrityError:
+            current_app.db.session.rollback()
+            return jsonify({'message': '用户名或邮箱已被注册'}), 400
         
         # 设置默认头像，使用用户名首字母和用户ID生成
         initial = data['username'][0].upper()
@@ -51,14 +53,11 @@ def register():
         return jsonify({
             'success': True,
             'message': '注册成功',
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'role': user.role,
-                'avatar': user.avatar
-            }
+            'user': user_summary(user)
         }), 201
+    except PasswordHashBusy as e:
+        current_app.db.session.rollback()
+        return _hashing_busy(e)
     except Exception as e:
         current_app.db.session.rollback()
         return jsonify({'message': '注册失败: ' + str(e)}), 500
@@ -80,53 +79,49 @@ def login():
         if not username_or_email or not password:
             return jsonify({'message': '用户名/邮箱和密码不能为空'}), 400
         
-        # 尝试通过用户名或邮箱查找用户
-        user = current_app.db.session.query(User).filter(
-            (User.username == username_or_email) | (User.email == username_or_email)
-        ).first()
+        # 尝试通过用户名或邮箱查找用户，每次查询只走一个唯一索引
+        user = User.find_for_login(current_app.db.session, username_or_email)
         
-        if user and user.check_password(password) and user.is_active:
-            access_token = create_access_token(identity=user.id)
+        if user and user.is_active and user.check_password(password):
+            if user.password_needs_rehash():
+                # 哈希算法或成本参数调整后，借登录时拿到的明文透明升级旧哈希
+                user.set_password(password)
+                current_app.db.session.commit()
+            
+            # role/is_active 写入 token，鉴权时无需再查库
+            access_token = create_access_token(identity=user.id, additional_claims=identity_claims(user))
             return jsonify({
                 'success': True,
                 'message': '登录成功',
                 'access_token': access_token,
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'role': user.role,
-                    'avatar': user.avatar
-                }
+                'user': user_summary(user)
             })
         
         return jsonify({'message': '用户名/邮箱或密码错误'}), 401
+    except PasswordHashBusy as e:
+        current_app.db.session.rollback()
+        return _hashing_busy(e)
     except Exception as e:
+        current_app.db.session.rollback()
         return jsonify({'message': '登录失败: ' + str(e)}), 500
 
 
+def _hashing_busy(e):
+    response = jsonify({'message': '服务器繁忙，请稍后重试'})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+
 @auth_bp.route('/profile', methods=['GET'])
+@read_only
 @jwt_required()
 def profile():
     """获取用户个人信息"""
     try:
-        user_id = get_jwt_identity()
-        user = current_app.db.session.get(User, user_id)
-        
-        if not user:
-            return jsonify({'message': '用户不存在'}), 404
-        
+        # jwt_required 已通过用户加载器取得缓存的用户快照，不存在时直接返回 404
         return jsonify({
             'success': True,
-            'data': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'bio': user.bio,
-                'avatar': user.avatar,
-                'role': user.role,
-                'created_at': user.created_at.isoformat()
-            }
+            'data': user_profile(current_user)
         })
     except Exception as e:
         return jsonify({'message': '获取用户信息失败: ' + str(e)}), 500
@@ -153,16 +148,15 @@ def update_profile():
         if 'avatar' in data:
             user.avatar = data['avatar']
         if 'username' in data:
-            # 检查用户名是否已被其他用户使用
-            existing_user = current_app.db.session.query(User).filter(
-                User.username == data['username'], 
-                User.id != user_id
-            ).first()
-            if existing_user:
-                return jsonify({'message': '用户名已被占用'}), 400
             user.username = data['username']
         
-        current_app.db.session.commit()
+        try:
+            current_app.db.session.commit()
+        except IntegrityError:
+            # 用户名已被其他用户使用，由唯一约束检测
+            current_app.db.session.rollback()
+            return jsonify({'message': '用户名已被占用'}), 400
+        user_cache.invalidate(user.id)
         
         return jsonify({'success': True, 'message': '资料更新成功'})
     except Exception as e:
@@ -190,52 +184,44 @@ def upload_avatar():
             return jsonify({'message': '未选择文件'}), 400
         
         # 检查文件类型
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-        if not ('.' in file.filename and \
-                file.filename.rsplit('.', 1)[1].lower() in allowed_extensions):
+        if not allowed_file(file.filename):
             return jsonify({'message': '不支持的文件格式'}), 400
         
-        # 生成唯一的文件名
-        import uuid
-        import os
-        extension = file.filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{user.id}_{uuid.uuid4().hex}.{extension}"
-        
-        # 确定上传目录 - 首先尝试使用环境变量定义的上传目录
-        import tempfile
-        upload_base = os.environ.get('AVATAR_UPLOAD_PATH', None)
-        
-        if upload_base:
-            # 如果设置了环境变量，则使用环境变量指定的路径
-            upload_folder = os.path.join(upload_base, 'avatars')
-        else:
-            # 否则使用相对于项目根目录的路径
-            upload_folder = os.path.join(current_app.root_path, '..', 'public', 'static', 'avatars')
-        
-        # 使用abspath规范化路径
-        upload_folder = os.path.abspath(upload_folder)
-        
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # 保存文件
-        file_path = os.path.join(upload_folder, unique_filename)
-        file.save(file_path)
+        # 分块落盘并按内容哈希去重，缩略图由后台线程生成，请求立即返回
+        digest, status, avatar_url = avatar_pipeline.save_upload(file)
         
         # 更新用户头像路径
         # 使用正斜杠构建Web访问路径
-        user.avatar = f"/static/avatars/{unique_filename}"
+        user.avatar = avatar_url
         current_app.db.session.commit()
+        user_cache.invalidate(user.id)
         
         return jsonify({
             'success': True, 
-            'message': '头像上传成功',
-            'avatar_url': user.avatar
-        })
+            'message': '头像上传成功' if status == 'ready' else '头像上传成功，正在处理',
+            'avatar_url': user.avatar,
+            'status': status,
+            'status_url': f'/api/auth/avatar-status/{digest}'
+        }), 200 if status == 'ready' else 202
     except Exception as e:
         current_app.db.session.rollback()
         return jsonify({'message': '上传头像失败: ' + str(e)}), 500
 
 
+@auth_bp.route('/avatar-status/<string:digest>', methods=['GET'])
+def avatar_status(digest):
+    """查询头像处理状态"""
+    if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest):
+        return jsonify({'message': '无效的头像标识'}), 400
+    
+    status = avatar_pipeline.status(digest)
+    return jsonify({
+        'success': True,
+        'status': status,
+        'avatar_url': avatar_pipeline.url_for(digest) if status == 'ready' else None
+    })
+
+
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
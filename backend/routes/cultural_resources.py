@@ -1,14 +1,44 @@
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import current_user, jwt_required
 from models.cultural_resource import CulturalResource
-from sqlalchemy import text
+from services.bulk import FORMATS, detect_format, import_resources, iter_export, iter_records
+from services.catalog import notify_catalog_changed, resource_values, validate_resource_payload
+from services.catalog_snapshot import catalog_snapshot
+from services.count_cache import count_cache
+from services.counters import counter_buffer
+from services.db_routing import read_only
+from services.identity import role_required
+from services.likes import liked_resource_ids, record_like
+from services.pagination import InvalidCursor, apply_keyset, apply_sort_order, decode_cursor, encode_cursor
+from services.rankings import RANKINGS, rankings
+from services.rate_limit import rate_limiter
+from services.response_cache import response_cache
+from services.search import search_index
+from services.serializers import DETAIL_COLUMNS, LIST_COLUMNS, isoformat, resource_detail, resource_summary
+from services.tags import TAG_MODES, filter_by_tags, normalize_tags, sync_resource_tags, tag_cloud
+from services.warmup import WARMUP_ENVIRON_KEY
+from sqlalchemy import func, text
+import io
 import math
 
 
 cultural_resources_bp = Blueprint('cultural_resources', __name__, url_prefix='/api/resources')
 
+# 列表接口的 sort 参数：default 为 (priority, created_at, id) 排序，其余取自预计算排行
+RESOURCE_SORTS = ('default',) + RANKINGS
+# 批量点赞状态一次最多查询的资源数
+LIKED_STATUS_MAX_IDS = 100
+# 批量获取接口的 fields 参数：(查询列, 序列化函数)
+BATCH_FIELDS = {
+    'summary': (LIST_COLUMNS, resource_summary),
+    'full': (DETAIL_COLUMNS, resource_detail),
+}
+
 
 @cultural_resources_bp.route('/', methods=['GET'])
+@rate_limiter.limit('search', when=lambda: bool(request.args.get('search')))
+@response_cache.cached
+@read_only
 def get_resources():
     """获取文化资源列表"""
     try:
@@ -16,85 +46,229 @@ def get_resources():
         limit = request.args.get('limit', 10, type=int)
         category = request.args.get('category')
         search = request.args.get('search')
+        # 传入 cursor 参数（首页可为空字符串）即启用游标分页
+        cursor = request.args.get('cursor')
+        # include_total=false 时不统计总数，只返回 has_more
+        include_total = request.args.get('include_total', 'true').lower() not in ('0', 'false', 'no')
+        # tag 可重复或逗号分隔；tag_mode=all 要求同时包含（默认），any 包含任一即可
+        tags = normalize_tags(request.args.getlist('tag'))
+        tag_mode = request.args.get('tag_mode', 'all')
+        if tag_mode not in TAG_MODES:
+            return jsonify({'message': 'tag_mode 只能是 all 或 any'}), 400
+        sort = request.args.get('sort', 'default')
+        if sort not in RESOURCE_SORTS:
+            return jsonify({'message': 'sort 只能是 ' + '、'.join(RESOURCE_SORTS)}), 400
         
         offset = (page - 1) * limit
         
-        # 构建查询
-        query = current_app.db.session.query(CulturalResource)
+        if sort != 'default':
+            # 热度排序直接分页预计算的排行（每个分类前 RANKING_TOP_N 条）
+            if search or tags or cursor is not None:
+                return jsonify({'message': '按热度排序时不支持搜索、标签过滤和游标分页'}), 400
+            ranked, _ = rankings.get(sort, category or None)
+            return jsonify({
+                'success': True,
+                'data': [resource_summary(r) for r in ranked[offset:offset + limit]],
+                'pagination': {
+                    'page': page,
+                    'limit': limit,
+                    'total': len(ranked),
+                    'pages': math.ceil(len(ranked) / limit)
+                }
+            })
+        
+        if catalog_snapshot.enabled and not search:
+            # 快照模式：分类/标签过滤与分页都在内存中完成，不访问数据库
+            return _list_from_snapshot(category, tags, tag_mode, cursor, include_total, page, limit)
+        
+        # 构建查询，返回轻量 Row 而不是被会话跟踪的 ORM 实体
+        query = current_app.db.session.query(*LIST_COLUMNS)
         
         if category:
             query = query.filter(CulturalResource.category == category)
+        
+        if tags:
+            query = filter_by_tags(query, tags, tag_mode)
             
+        ranked_ids = None
         if search:
-            query = query.filter(
-                CulturalResource.title.contains(search) |
-                CulturalResource.description.contains(search)
-            )
+            # 由搜索后端返回按相关度排序的 id，避免前导通配符 LIKE 全表扫描
+            ranked_ids = [id for id, _ in search_index.search(search)]
+            # 搜索后端最多返回 SEARCH_MAX_RESULTS 条，达到上限时 total 只是下限
+            total_capped = len(ranked_ids) >= current_app.config['SEARCH_MAX_RESULTS']
+            query = query.filter(CulturalResource.id.in_(ranked_ids))
         
-        total = query.count()
-        resources = query.offset(offset).limit(limit).all()
-        
-        result = [{
-            'id': r.id,
-            'title': r.title,
-            'description': r.description,
-            'type': r.type,
-            'category': r.category,
-            'tags': r.tags.split(',') if r.tags else [],
-            'author': r.author,
-            'cover_image': r.cover_image,
-            'view_count': r.view_count,
-            'like_count': r.like_count,
-            'created_at': r.created_at.isoformat(),
-        } for r in resources]
+        if cursor is not None:
+            query = apply_sort_order(query, CulturalResource)
+            if cursor:
+                query = apply_keyset(query, CulturalResource, cursor)
+            # 多取一条用于判断是否还有下一页，避免 COUNT(*)
+            resources = query.limit(limit + 1).all()
+            has_more = len(resources) > limit
+            resources = resources[:limit]
+            last = resources[-1] if has_more else None
+            pagination = {
+                'limit': limit,
+                'has_more': has_more,
+                'next_cursor': encode_cursor(last.priority, last.created_at, last.id) if last else None
+            }
+        elif ranked_ids is not None:
+            # 搜索结果按相关度分页：先确定命中 id 的顺序，再只加载当前页
+            if category or tags:
+                matched = {row.id for row in query.with_entities(CulturalResource.id)}
+                ranked_ids = [id for id in ranked_ids if id in matched]
+            total = len(ranked_ids)
+            page_ids = ranked_ids[offset:offset + limit]
+            rows = {r.id: r for r in current_app.db.session.query(*LIST_COLUMNS).filter(
+                CulturalResource.id.in_(page_ids)
+            )}
+            resources = [rows[id] for id in page_ids if id in rows]
+        elif not include_total:
+            count_cache.record_skipped()
+            resources = apply_sort_order(query, CulturalResource).offset(offset).limit(limit + 1).all()
+            has_more = len(resources) > limit
+            resources = resources[:limit]
+        else:
+            total = count_cache.get_or_count(
+                (category, search, tuple(tags), tag_mode),
+                lambda: query.with_entities(func.count(CulturalResource.id)).scalar()
+            )
+            resources = apply_sort_order(query, CulturalResource).offset(offset).limit(limit).all()
         
-        return jsonify({
-            'success': True,
-            'data': result,
-            'pagination': {
+        if cursor is None and not include_total and ranked_ids is None:
+            pagination = {
+                'page': page,
+                'limit': limit,
+                'has_more': has_more
+            }
+        elif cursor is None:
+            pagination = {
                 'page': page,
                 'limit': limit,
                 'total': total,
                 'pages': math.ceil(total / limit)
             }
+            if ranked_ids is not None:
+                pagination['total_capped'] = total_capped
+        
+        return jsonify({
+            'success': True,
+            'data': [resource_summary(r) for r in resources],
+            'pagination': pagination
         })
+    except InvalidCursor:
+        return jsonify({'message': '分页游标无效'}), 400
     except Exception as e:
         return jsonify({'message': '获取文化资源列表失败: ' + str(e)}), 500
 
 
+def _list_from_snapshot(category, tags, tag_mode, cursor, include_total, page, limit):
+    """用目录快照回答列表请求，分页字段与数据库查询路径保持一致"""
+    view = catalog_snapshot.view(category, tags, tag_mode)
+    offset = (page - 1) * limit
+    if cursor is not None:
+        resources = view.after(decode_cursor(cursor) if cursor else None, limit + 1)
+        has_more = len(resources) > limit
+        resources = resources[:limit]
+        last = resources[-1] if has_more else None
+        pagination = {
+            'limit': limit,
+            'has_more': has_more,
+            'next_cursor': encode_cursor(last.priority, last.created_at, last.id) if last else None
+        }
+    elif not include_total:
+        resources = view.slice(offset, limit + 1)
+        has_more = len(resources) > limit
+        resources = resources[:limit]
+        pagination = {
+            'page': page,
+            'limit': limit,
+            'has_more': has_more
+        }
+    else:
+        resources = view.slice(offset, limit)
+        pagination = {
+            'page': page,
+            'limit': limit,
+            'total': len(view),
+            'pages': math.ceil(len(view) / limit)
+        }
+    return jsonify({
+        'success': True,
+        'data': [resource_summary(r) for r in resources],
+        'pagination': pagination
+    })
+
+
+@cultural_resources_bp.route('/tags', methods=['GET'])
+@response_cache.cached
+@read_only
+def get_tags():
+    """获取标签云（按资源数降序）"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        return jsonify({
+            'success': True,
+            'data': tag_cloud(current_app.db.session, limit)
+        })
+    except Exception as e:
+        return jsonify({'message': '获取标签失败: ' + str(e)}), 500
+
+
+@cultural_resources_bp.route('/popular', methods=['GET'])
+def get_popular():
+    """热门资源：by=views（默认）按浏览量，by=likes 按点赞数"""
+    by = request.args.get('by', 'views')
+    if by not in ('views', 'likes'):
+        return jsonify({'message': 'by 只能是 views 或 likes'}), 400
+    return _ranking_response(by)
+
+
+@cultural_resources_bp.route('/trending', methods=['GET'])
+def get_trending():
+    """趋势资源：浏览量与点赞数按发布时间衰减后的热度分"""
+    return _ranking_response('trending')
+
+
+def _ranking_response(kind):
+    try:
+        limit = max(min(request.args.get('limit', 10, type=int), rankings.top_n), 0)
+        ranked, generated_at = rankings.get(kind, request.args.get('category') or None)
+        return jsonify({
+            'success': True,
+            'data': [resource_summary(r) for r in ranked[:limit]],
+            'generated_at': isoformat(generated_at)
+        })
+    except Exception as e:
+        return jsonify({'message': '获取排行失败: ' + str(e)}), 500
+
+
 @cultural_resources_bp.route('/<int:id>', methods=['GET'])
 def get_resource(id):
     """获取单个文化资源"""
+    response = current_app.make_response(_render_resource(id))
+    
+    # 增加浏览量（排除作者自己）
+    # 这里暂时不考虑身份验证，后续可以根据需要添加
+    # 命中缓存或返回 304 时同样计数；浏览量先写入内存缓冲，由后台批量落库；启动预热的内部请求不计数
+    if response.status_code in (200, 304) and not request.environ.get(WARMUP_ENVIRON_KEY):
+        counter_buffer.incr('view_count', id)
+    
+    return response
+
+
+@response_cache.cached
+@read_only
+def _render_resource(id):
     try:
         resource = current_app.db.session.get(CulturalResource, id)
         
         if not resource:
             return jsonify({'message': '文化资源不存在'}), 404
-            
-        # 增加浏览量（排除作者自己）
-        # 这里暂时不考虑身份验证，后续可以根据需要添加
-        resource.view_count += 1
-        current_app.db.session.commit()
         
         return jsonify({
             'success': True,
-            'data': {
-                'id': resource.id,
-                'title': resource.title,
-                'description': resource.description,
-                'content': resource.content,
-                'type': resource.type,
-                'category': resource.category,
-                'tags': resource.tags.split(',') if resource.tags else [],
-                'author': resource.author,
-                'source': resource.source,
-                'cover_image': resource.cover_image,
-                'media_url': resource.media_url,
-                'view_count': resource.view_count,
-                'like_count': resource.like_count,
-                'created_at': resource.created_at.isoformat(),
-                'updated_at': resource.updated_at.isoformat()
-            }
+            'data': resource_detail(resource)
         })
     except Exception as e:
         return jsonify({'message': '获取文化资源失败: ' + str(e)}), 500
@@ -103,25 +277,125 @@ def get_resource(id):
 @cultural_resources_bp.route('/<int:id>/like', methods=['POST'])
 @jwt_required()
 def like_resource(id):
-    """点赞文化资源"""
+    """点赞文化资源（幂等：同一用户重复点赞只计一次）"""
     try:
-        resource = current_app.db.session.get(CulturalResource, id)
+        session = current_app.db.session
+        resource = session.query(CulturalResource.id, CulturalResource.like_count).filter(
+            CulturalResource.id == id
+        ).first()
         
         if not resource:
             return jsonify({'message': '文化资源不存在'}), 404
-            
-        resource.like_count += 1
-        current_app.db.session.commit()
+        
+        created = record_like(session, current_user.id, resource.id)
+        session.commit()
+        # 只有新点赞才计数，计数仍由写回缓冲批量落库
+        if created:
+            counter_buffer.incr('like_count', resource.id)
         
         return jsonify({
             'success': True,
-            'message': '点赞成功',
-            'like_count': resource.like_count
+            'message': '点赞成功' if created else '已经点过赞了',
+            'liked': True,
+            'like_count': counter_buffer.merge('like_count', resource.id, resource.like_count)
         })
     except Exception as e:
+        current_app.db.session.rollback()
         return jsonify({'message': '点赞失败: ' + str(e)}), 500
 
 
+@cultural_resources_bp.route('/liked', methods=['GET'])
+@read_only
+@jwt_required()
+def get_liked_status():
+    """批量查询当前用户点赞过哪些资源：?ids=1,2,3，返回其中已点赞的 id"""
+    try:
+        ids = _parse_ids(request.args.get('ids', ''))
+    except (TypeError, ValueError):
+        return jsonify({'message': 'ids 必须是逗号分隔的整数'}), 400
+    if len(ids) > LIKED_STATUS_MAX_IDS:
+        return jsonify({'message': f'ids 最多 {LIKED_STATUS_MAX_IDS} 个'}), 400
+    
+    try:
+        liked = liked_resource_ids(current_app.db.session, current_user.id, ids)
+        return jsonify({
+            'success': True,
+            'data': [id for id in ids if id in liked]
+        })
+    except Exception as e:
+        return jsonify({'message': '获取点赞状态失败: ' + str(e)}), 500
+
+
+def _parse_ids(values):
+    """解析 id 列表（逗号分隔的字符串或 JSON 数组），去重并保持顺序；含非整数时抛出 ValueError"""
+    if isinstance(values, str):
+        values = values.split(',')
+    elif not isinstance(values, list):
+        raise ValueError('ids must be a list')
+    ids = []
+    seen = set()
+    for value in values:
+        if isinstance(value, (bool, float)):
+            raise ValueError('ids must be integers')
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        id = int(value)
+        if id not in seen:
+            seen.add(id)
+            ids.append(id)
+    return ids
+
+
+@cultural_resources_bp.route('/batch', methods=['GET', 'POST'])
+@read_only
+def get_resources_batch():
+    """批量获取文化资源：一次 IN 查询代替逐个请求详情接口
+
+    GET ?ids=3,1,2&fields=summary|full&count_views=true，或 POST 同名字段的 JSON。
+    结果按请求的 id 顺序返回，不存在的 id 列在 missing 中；
+    只有显式传入 count_views 时才为返回的资源增加浏览量。
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'message': '请求数据格式不正确'}), 400
+        raw_ids = data.get('ids', [])
+        fields = data.get('fields', 'summary')
+        count_views = data.get('count_views') is True
+    else:
+        raw_ids = request.args.get('ids', '')
+        fields = request.args.get('fields', 'summary')
+        count_views = request.args.get('count_views', 'false').lower() in ('1', 'true', 'yes')
+    
+    try:
+        ids = _parse_ids(raw_ids)
+    except (TypeError, ValueError):
+        return jsonify({'message': 'ids 必须是整数列表'}), 400
+    if not ids:
+        return jsonify({'message': 'ids 是必需的'}), 400
+    max_ids = current_app.config['RESOURCE_BATCH_MAX_IDS']
+    if len(ids) > max_ids:
+        return jsonify({'message': f'ids 最多 {max_ids} 个'}), 400
+    if fields not in BATCH_FIELDS:
+        return jsonify({'message': 'fields 只能是 summary 或 full'}), 400
+    
+    try:
+        columns, serialize = BATCH_FIELDS[fields]
+        rows = {r.id: r for r in current_app.db.session.query(*columns).filter(CulturalResource.id.in_(ids))}
+        if count_views:
+            for id in rows:
+                counter_buffer.incr('view_count', id)
+        return jsonify({
+            'success': True,
+            'data': [serialize(rows[id]) for id in ids if id in rows],
+            'missing': [id for id in ids if id not in rows]
+        })
+    except Exception as e:
+        return jsonify({'message': '批量获取文化资源失败: ' + str(e)}), 500
+
+
 @cultural_resources_bp.route('/', methods=['POST'])
 @jwt_required()
 def create_resource():
@@ -129,27 +403,20 @@ def create_resource():
     try:
         data = request.get_json()
         
-        # 验证必需字段
-        required_fields = ['title', 'content', 'type', 'category']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'message': f'{field} 是必需的'}), 400
-        
-        resource = CulturalResource(
-            title=data['title'],
-            description=data.get('description'),
-            content=data['content'],
-            type=data['type'],
-            category=data['category'],
-            tags=','.join(data.get('tags', [])),
-            author=data.get('author'),
-            source=data.get('source'),
-            cover_image=data.get('cover_image'),
-            media_url=data.get('media_url')
-        )
+        # 验证必需字段（与批量导入共用同一套规则）
+        error = validate_resource_payload(data)
+        if error:
+            return jsonify({'message': error}), 400
+        
+        values, tags = resource_values(data)
+        resource = CulturalResource(**values)
         
         current_app.db.session.add(resource)
+        current_app.db.session.flush()
+        sync_resource_tags(current_app.db.session, resource.id, tags)
         current_app.db.session.commit()
+        search_index.index_resource(resource)
+        notify_catalog_changed()
         
         return jsonify({
             'success': True,
@@ -161,4 +428,47 @@ def create_resource():
         }), 201
     except Exception as e:
         current_app.db.session.rollback()
-        return jsonify({'message': '创建文化资源失败: ' + str(e)}), 500
\ No newline at end of file
+        return jsonify({'message': '创建文化资源失败: ' + str(e)}), 500
+
+
+@cultural_resources_bp.route('/import', methods=['POST'])
+@role_required('admin', message='没有权限执行批量导入')
+def import_resources_endpoint():
+    """批量导入文化资源（JSONL/CSV，流式读取），仅管理员可用"""
+    try:
+        upload = request.files.get('file')
+        fmt = detect_format(upload.filename if upload else None, request.args.get('format'))
+        if fmt not in FORMATS:
+            return jsonify({'message': 'format 只能是 jsonl 或 csv'}), 400
+        
+        # 上传文件或原始请求体都按文本流逐行读取
+        raw = upload.stream if upload else request.stream
+        stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        chunk_size = min(request.args.get('chunk_size', 500, type=int), 5000)
+        result = import_resources(current_app.db.session, iter_records(stream, fmt), chunk_size=chunk_size)
+        
+        return jsonify({
+            'success': result['failed'] == 0,
+            'message': f"导入完成：成功 {result['imported']} 条，失败 {result['failed']} 条",
+            'data': result
+        })
+    except Exception as e:
+        current_app.db.session.rollback()
+        return jsonify({'message': '批量导入失败: ' + str(e)}), 500
+
+
+@cultural_resources_bp.route('/export', methods=['GET'])
+@role_required('admin', message='没有权限执行批量导出')
+def export_resources_endpoint():
+    """流式导出全部文化资源（JSONL/CSV），包含未发布的资源，仅管理员可用"""
+    fmt = request.args.get('format', 'jsonl').lower()
+    if fmt not in FORMATS:
+        return jsonify({'message': 'format 只能是 jsonl 或 csv'}), 400
+    
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(
+        stream_with_context(iter_export(current_app.db.session, fmt)),
+        mimetype=mimetype
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=cultural_resources.{fmt}'
+    return response
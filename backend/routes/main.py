@@ -1,5 +1,9 @@
 from flask import Blueprint, jsonify, current_app
 from sqlalchemy import text
+from services.catalog_snapshot import catalog_snapshot
+from services.db_routing import read_only, replica_router
+from services.metrics import metrics
+from services.warmup import warmup
 
 
 main_bp = Blueprint('main', __name__)
@@ -18,11 +22,31 @@ def index():
 
 
 @main_bp.route('/health')
+@read_only
 def health_check():
     """健康检查接口"""
     try:
         # 尝试连接数据库
         current_app.db.session.execute(text('SELECT 1'))
-        return jsonify({'status': 'healthy', 'database': 'connected'}), 200
+        status = {'status': 'healthy', 'database': 'connected', 'replicas': replica_router.status()}
+        if catalog_snapshot.enabled:
+            status['catalog_snapshot'] = catalog_snapshot.status()
+        return jsonify(status), 200
     except Exception as e:
         return jsonify({'status': 'unhealthy', 'database': 'error', 'error': str(e)}), 500
+
+
+@main_bp.route('/ready')
+def readiness_check():
+    """就绪检查接口：本进程完成启动预热后才返回 200，供负载均衡/滚动发布判断是否导入流量"""
+    if warmup.ready:
+        return jsonify({'status': 'ready', 'warmup': warmup.status()}), 200
+    response = jsonify({'status': 'warming_up', 'warmup': warmup.status()})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+@main_bp.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 指标接口"""
+    return current_app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,18 @@
+from flask import Blueprint
+
+from services.media import media_server
+
+
+media_bp = Blueprint('media', __name__)
+
+
+@media_bp.route('/media/<path:filename>')
+def media_file(filename):
+    """资源媒体文件（视频、音频、3D 模型等），支持 Range 请求"""
+    return media_server.send('media', filename)
+
+
+@media_bp.route('/static/avatars/<path:filename>')
+def avatar_file(filename):
+    """头像原图与缩略图，与 avatar_pipeline.url_for 生成的地址一致"""
+    return media_server.send('avatars', filename)
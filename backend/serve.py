@@ -0,0 +1,63 @@
+"""生产环境启动器
+
+Linux/macOS 上以 gunicorn.conf.py 启动 gunicorn（多进程 + 多线程，preload）；
+Windows 不支持 fork，改用 waitress 单进程多线程运行 wsgi.app。
+
+    python serve.py                  # 监听 0.0.0.0:5000
+    python serve.py --bind 127.0.0.1:8000 --workers 4 --threads 8
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def serve_gunicorn(args):
+    env = os.environ.copy()
+    if args.bind:
+        env['GUNICORN_BIND'] = args.bind
+    if args.workers:
+        env['GUNICORN_WORKERS'] = str(args.workers)
+    if args.threads:
+        env['GUNICORN_THREADS'] = str(args.threads)
+    os.chdir(BACKEND_DIR)
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    # 用 gunicorn 替换当前进程，信号（TERM 平滑退出、HUP 重载）直接送达 gunicorn 主进程
+    os.execve(sys.executable, command, env)
+
+
+def serve_waitress(args):
+    from waitress import serve
+
+    sys.path.insert(0, BACKEND_DIR)
+    from services.lifecycle import shutdown
+    from wsgi import app
+
+    host, _, port = (args.bind or '0.0.0.0:5000').rpartition(':')
+    threads = args.threads or max(4, (os.cpu_count() or 1) * 4)
+    try:
+        serve(app, host=host, port=int(port), threads=threads)
+    finally:
+        shutdown(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bind', default=None, help='host:port，默认 0.0.0.0:5000（gunicorn 还可用 GUNICORN_BIND）')
+    parser.add_argument('--workers', type=int, default=None, help='gunicorn 进程数，默认 CPU 核数 + 1')
+    parser.add_argument('--threads', type=int, default=None, help='每个进程的线程数')
+    parser.add_argument('--server', choices=('auto', 'gunicorn', 'waitress'), default='auto')
+    args = parser.parse_args()
+
+    server = args.server
+    if server == 'auto':
+        server = 'waitress' if os.name == 'nt' else 'gunicorn'
+    if server == 'gunicorn':
+        serve_gunicorn(args)
+    else:
+        serve_waitress(args)
+
+
+if __name__ == '__main__':
+    main()
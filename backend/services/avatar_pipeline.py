@@ -0,0 +1,200 @@
+import atexit
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select, update
+
+
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+CHUNK_SIZE = 64 * 1024
+
+
+def _imaging():
+    """按需导入 Pillow：导入耗时较长，不放在应用启动路径上"""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:  # 未安装 Pillow 时只保存原图，不生成缩略图
+        return None
+    return Image, ImageOps
+
+
+class AvatarPipeline:
+    """头像上传处理
+
+    请求线程只负责把上传内容分块写入磁盘并计算 SHA-256，缩放/压缩交给后台线程池，
+    按内容哈希命名，同一张图片重复上传时直接复用已有的衍生图。
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._executor = None
+        self._pid = None
+        self._jobs = {}  # digest -> Future
+        self._failed = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AVATAR_UPLOAD_PATH', None)
+        app.config.setdefault('AVATAR_SIZES', (64, 128, 256))
+        app.config.setdefault('AVATAR_DEFAULT_SIZE', 128)
+        app.config.setdefault('AVATAR_WEBP_QUALITY', 80)
+        app.config.setdefault('AVATAR_WORKERS', 2)
+        self._app = app
+        app.extensions['avatar_pipeline'] = self
+        atexit.register(self.shutdown)
+
+    @property
+    def folder(self):
+        upload_base = self._app.config['AVATAR_UPLOAD_PATH']
+        if upload_base:
+            # 如果设置了环境变量，则使用环境变量指定的路径
+            folder = os.path.join(upload_base, 'avatars')
+        else:
+            # 否则使用相对于项目根目录的路径
+            folder = os.path.join(self._app.root_path, '..', 'public', 'static', 'avatars')
+        return os.path.abspath(folder)
+
+    def _executor_for_process(self):
+        # 线程池在 fork 之后的子进程里重新创建
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._app.config['AVATAR_WORKERS'],
+                    thread_name_prefix='avatar-worker',
+                )
+                self._pid = os.getpid()
+                self._jobs = {}
+            return self._executor
+
+    def derivative_name(self, digest, size):
+        return f'{digest}_{size}.webp'
+
+    def url_for(self, digest, size=None, extension=None):
+        if extension is not None:
+            return f'/static/avatars/originals/{digest}.{extension}'
+        size = size or self._app.config['AVATAR_DEFAULT_SIZE']
+        return f'/static/avatars/{self.derivative_name(digest, size)}'
+
+    def _derivatives_exist(self, digest):
+        return all(
+            os.path.exists(os.path.join(self.folder, self.derivative_name(digest, size)))
+            for size in self._app.config['AVATAR_SIZES']
+        )
+
+    def save_upload(self, file):
+        """保存上传文件，返回 (digest, status, avatar_url)
+
+        status 为 ready 时 avatar_url 已可访问；pending 时衍生图会在后台生成完成后出现在该地址。
+        """
+        extension = file.filename.rsplit('.', 1)[1].lower()
+        originals = os.path.join(self.folder, 'originals')
+        os.makedirs(originals, exist_ok=True)
+
+        # 分块写入临时文件并同时计算内容哈希，避免整体读入内存
+        sha256 = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=originals, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = file.stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    out.write(chunk)
+            digest = sha256.hexdigest()
+            original_path = os.path.join(originals, f'{digest}.{extension}')
+            if os.path.exists(original_path):
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, original_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if _imaging() is None:
+            return digest, 'ready', self.url_for(digest, extension=extension)
+        if self._derivatives_exist(digest):
+            return digest, 'ready', self.url_for(digest)
+
+        executor = self._executor_for_process()
+        with self._lock:
+            self._failed.discard(digest)
+            job = self._jobs.get(digest)
+            if job is None or job.done():
+                self._jobs[digest] = executor.submit(self._process, digest, original_path, extension)
+        return digest, 'pending', self.url_for(digest)
+
+    def status(self, digest):
+        with self._lock:
+            job = self._jobs.get(digest)
+            failed = digest in self._failed
+        if failed:
+            return 'failed'
+        if job is not None and not job.done():
+            return 'pending'
+        if self._derivatives_exist(digest):
+            return 'ready'
+        return 'missing'
+
+    def _process(self, digest, original_path, extension):
+        Image, ImageOps = _imaging()
+        try:
+            with Image.open(original_path) as image:
+                image = ImageOps.exif_transpose(image)
+                image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+                for size in sorted(self._app.config['AVATAR_SIZES'], reverse=True):
+                    target = os.path.join(self.folder, self.derivative_name(digest, size))
+                    resized = ImageOps.fit(image, (size, size), Image.LANCZOS)
+                    # 先写临时文件再原子替换，避免前端读到写了一半的图片
+                    temp_path = f'{target}.part'
+                    resized.save(temp_path, 'WEBP', quality=self._app.config['AVATAR_WEBP_QUALITY'], method=4)
+                    os.replace(temp_path, target)
+        except Exception:
+            with self._lock:
+                self._failed.add(digest)
+            self._app.logger.error('Failed to process avatar %s', digest, exc_info=True)
+            self._fallback_to_original(digest, extension)
+
+    def _fallback_to_original(self, digest, extension):
+        """衍生图生成失败时，把仍指向待生成地址的用户头像改回原图"""
+        from models.user import User
+        from services.identity import user_cache
+
+        pending_url = self.url_for(digest)
+        original_url = self.url_for(digest, extension=extension)
+        with self._app.app_context():
+            session = self._app.db.session
+            try:
+                user_ids = session.execute(
+                    select(User.id).where(User.avatar == pending_url)
+                ).scalars().all()
+                if user_ids:
+                    session.execute(
+                        update(User).where(User.id.in_(user_ids)).values(avatar=original_url)
+                    )
+                    session.commit()
+                for user_id in user_ids:
+                    user_cache.invalidate(user_id)
+            except Exception:
+                session.rollback()
+                self._app.logger.error('Failed to restore avatar %s', digest, exc_info=True)
+
+    def shutdown(self, wait=True):
+        """等待已提交的处理任务完成，用于进程正常退出"""
+        executor = self._executor
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=wait)
+            self._executor = None
+
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+avatar_pipeline = AvatarPipeline()
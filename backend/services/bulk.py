@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import insert, select
+
+from models.cultural_resource import CulturalResource
+from services.catalog import notify_catalog_changed, resource_values, validate_resource_payload
+from services.search import search_index
+from services.serializers import isoformat, split_tags
+from services.tags import attach_tags_bulk
+
+
+FORMATS = ('jsonl', 'csv')
+EXPORT_COLUMNS = (
+    'id', 'title', 'description', 'content', 'type', 'category', 'tags', 'author', 'source',
+    'cover_image', 'media_url', 'status', 'priority', 'view_count', 'like_count', 'created_at', 'updated_at',
+)
+
+
+def detect_format(filename=None, fmt=None):
+    if fmt:
+        return fmt.lower()
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return 'jsonl'
+
+
+def iter_records(stream, fmt='jsonl'):
+    """逐行读取文本流，产出 (行号, 记录, 错误)，不会把整个文件读入内存"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            # 空单元格视为未提供该字段
+            record = {key: value for key, value in record.items() if key and value not in ('', None)}
+            yield reader.line_num, record, None
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError as e:
+            yield line_no, None, f'JSON 解析失败: {e}'
+
+
+def import_resources(session, records, chunk_size=500, max_errors=1000):
+    """批量导入资源
+
+    每 chunk_size 条有效记录在一个事务内批量插入并提交，某一批失败只回滚该批，
+    逐行错误（校验失败或所在批次写入失败）记录在返回结果中。
+    """
+    result = {'imported': 0, 'failed': 0, 'errors': []}
+
+    def record_error(line_no, message):
+        result['failed'] += 1
+        if len(result['errors']) < max_errors:
+            result['errors'].append({'line': line_no, 'error': message})
+
+    chunk = []
+    for line_no, record, error in records:
+        if error is None:
+            error = validate_resource_payload(record)
+        if error is not None:
+            record_error(line_no, error)
+            continue
+        chunk.append((line_no, record))
+        if len(chunk) >= chunk_size:
+            _import_chunk(session, chunk, result, record_error)
+            chunk = []
+    if chunk:
+        _import_chunk(session, chunk, result, record_error)
+
+    if result['imported']:
+        notify_catalog_changed()
+    return result
+
+
+def _import_chunk(session, chunk, result, record_error):
+    rows = []
+    tags = []
+    for _, record in chunk:
+        values, names = resource_values(record, extended=True)
+        now = datetime.utcnow()
+        values.setdefault('status', 'published')
+        values.setdefault('priority', 0)
+        values.update({'view_count': 0, 'like_count': 0, 'created_at': now, 'updated_at': now})
+        rows.append(values)
+        tags.append(names)
+
+    table = CulturalResource.__table__
+    try:
+        if session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+            # 一条多行 INSERT ... RETURNING，同时拿到按参数顺序排列的新 id
+            ids = session.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+        else:
+            # MySQL 不支持 RETURNING，退回到 ORM 批量 flush 以获得自增 id
+            resources = [CulturalResource(**values) for values in rows]
+            session.add_all(resources)
+            session.flush()
+            ids = [resource.id for resource in resources]
+        attach_tags_bulk(session, {id: names for id, names in zip(ids, tags) if names})
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        for line_no, _ in chunk:
+            record_error(line_no, f'写入失败: {e}')
+        return
+
+    search_index.index_resources([SimpleNamespace(id=id, **values) for id, values in zip(ids, rows)])
+    result['imported'] += len(ids)
+
+
+def _export_row(row):
+    data = dict(row._mapping)
+    data['tags'] = split_tags(data['tags'])
+    data['created_at'] = isoformat(data['created_at'])
+    data['updated_at'] = isoformat(data['updated_at'])
+    return data
+
+
+def iter_export(session, fmt='jsonl', batch_size=500):
+    """按 id 分批读取并逐行产出导出内容，内存占用与目录大小无关"""
+    table = CulturalResource.__table__
+    columns = [table.c[name] for name in EXPORT_COLUMNS]
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        yield buffer.getvalue()
+
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(*columns).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        if fmt == 'csv':
+            buffer.seek(0)
+            buffer.truncate()
+            for row in rows:
+                data = _export_row(row)
+                data['tags'] = ','.join(data['tags'])
+                writer.writerow(data)
+            yield buffer.getvalue()
+        else:
+            yield ''.join(json.dumps(_export_row(row), ensure_ascii=False) + '\n' for row in rows)
@@ -0,0 +1,59 @@
+from services.catalog_snapshot import catalog_snapshot
+from services.count_cache import count_cache
+from services.rankings import rankings
+from services.response_cache import response_cache
+from services.tags import normalize_tags
+
+
+REQUIRED_FIELDS = ('title', 'content', 'type', 'category')
+RESOURCE_STATUSES = ('draft', 'published', 'archived')
+
+
+def validate_resource_payload(data):
+    """校验创建资源的请求数据，返回错误信息，合法时返回 None"""
+    if not isinstance(data, dict):
+        return '请求数据格式不正确'
+    for field in REQUIRED_FIELDS:
+        if not data.get(field):
+            return f'{field} 是必需的'
+    if data.get('status') is not None and data['status'] not in RESOURCE_STATUSES:
+        return 'status 只能是 draft、published 或 archived'
+    if data.get('priority') is not None:
+        try:
+            int(data['priority'])
+        except (TypeError, ValueError):
+            return 'priority 必须是整数'
+    return None
+
+
+def resource_values(data, extended=False):
+    """把已校验的请求数据转换为 CulturalResource 的列值，同时返回规范化后的标签
+
+    extended=True 时额外接受 status/priority，仅供管理员批量导入使用。
+    """
+    tags = normalize_tags(data.get('tags'))
+    values = {
+        'title': data['title'],
+        'description': data.get('description'),
+        'content': data['content'],
+        'type': data['type'],
+        'category': data['category'],
+        'tags': ','.join(tags),
+        'author': data.get('author'),
+        'source': data.get('source'),
+        'cover_image': data.get('cover_image'),
+        'media_url': data.get('media_url'),
+    }
+    if extended and data.get('status') is not None:
+        values['status'] = data['status']
+    if extended and data.get('priority') is not None:
+        values['priority'] = int(data['priority'])
+    return values, tags
+
+
+def notify_catalog_changed():
+    """资源目录写入后调用，使依赖目录内容的各级缓存失效"""
+    count_cache.invalidate()
+    response_cache.bump_version()
+    rankings.invalidate()
+    catalog_snapshot.invalidate()
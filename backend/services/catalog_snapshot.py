@@ -0,0 +1,370 @@
+import bisect
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import g
+
+from services.metrics import metrics
+
+
+snapshot_rebuilds = metrics.counter(
+    'catalog_snapshot_rebuilds_total',
+    'Catalog snapshot rebuilds by kind (full, incremental) and result (ok, error).',
+    ('kind', 'result'),
+)
+snapshot_rebuild_duration = metrics.histogram(
+    'catalog_snapshot_rebuild_seconds',
+    'Time spent rebuilding the in-memory catalog snapshot, by kind.',
+    ('kind',),
+)
+snapshot_resources = metrics.gauge(
+    'catalog_snapshot_resources',
+    'Resources held in the in-memory catalog snapshot.',
+)
+snapshot_bytes = metrics.gauge(
+    'catalog_snapshot_bytes',
+    'Approximate memory used by the in-memory catalog snapshot.',
+)
+
+# 增量重建时向前多查一段时间，覆盖各进程时钟偏差和提交晚于 updated_at 的事务
+INCREMENTAL_LOOKBACK = timedelta(seconds=5)
+# 列表只展示已发布的资源，快照同样只保存这一状态
+PUBLISHED = 'published'
+_LOWEST = float('-inf')
+
+
+class CatalogRecord:
+    """列表页需要的资源字段，属性名与 LIST_COLUMNS 一致，可直接交给 resource_summary"""
+
+    __slots__ = (
+        'id', 'title', 'description', 'type', 'category', 'tags', 'tag_set', 'author',
+        'cover_image', 'view_count', 'like_count', 'priority', 'created_at', 'updated_at', 'key',
+    )
+
+    def __init__(self, row):
+        intern = sys.intern
+        self.id = row.id
+        self.title = row.title
+        self.description = row.description
+        # 分类、类型、作者、标签取值很少，驻留后所有记录共用同一个字符串对象
+        self.type = intern(row.type) if row.type else row.type
+        self.category = intern(row.category) if row.category else row.category
+        self.tags = intern(row.tags) if row.tags else row.tags
+        self.tag_set = frozenset(intern(tag) for tag in row.tags.split(',')) if row.tags else frozenset()
+        self.author = intern(row.author) if row.author else row.author
+        self.cover_image = row.cover_image
+        self.view_count = row.view_count
+        self.like_count = row.like_count
+        self.priority = row.priority
+        self.created_at = row.created_at
+        self.updated_at = row.updated_at
+        # 与 apply_sort_order 的 priority, created_at, id 一致；NULL 排在最后
+        self.key = (
+            row.priority if row.priority is not None else _LOWEST,
+            row.created_at or datetime.min,
+            row.id,
+        )
+
+    def memory_size(self):
+        """记录自身及其独有字段的大小；驻留字符串由所有记录共享，不计入"""
+        getsizeof = sys.getsizeof
+        return (
+            getsizeof(self) + getsizeof(self.title) + getsizeof(self.description) + getsizeof(self.cover_image)
+            + getsizeof(self.created_at) + getsizeof(self.updated_at) + getsizeof(self.tag_set)
+            + getsizeof(self.key) + getsizeof(self.view_count) + getsizeof(self.like_count)
+            # 记录同时出现在全部资源和所属分类两个视图里，各占一个列表槽位和一个 keys 槽位
+            + 4 * 8
+        )
+
+
+class SnapshotView:
+    """按默认排序预先排好的一组记录
+
+    内部按升序保存，便于用 bisect 定位游标；对外按 priority DESC, created_at DESC, id DESC 返回。
+    """
+
+    __slots__ = ('records', 'keys')
+
+    def __init__(self, records, keys=None):
+        self.records = records
+        self.keys = keys if keys is not None else [record.key for record in records]
+
+    def __len__(self):
+        return len(self.records)
+
+    def slice(self, offset, count):
+        """降序下第 offset 条起的 count 条"""
+        stop = len(self.records) - offset
+        if stop <= 0 or count <= 0:
+            return []
+        return self.records[max(stop - count, 0):stop][::-1]
+
+    def after(self, key, count):
+        """降序下排在游标 key 之后的 count 条；key 为 None 时从第一条开始"""
+        stop = len(self.records) if key is None else bisect.bisect_left(self.keys, key)
+        if count <= 0:
+            return []
+        return self.records[max(stop - count, 0):stop][::-1]
+
+    def filter(self, ids):
+        return SnapshotView([record for record in self.records if record.id in ids])
+
+    def copy(self):
+        return SnapshotView(list(self.records), list(self.keys))
+
+    def remove(self, record):
+        index = bisect.bisect_left(self.keys, record.key)
+        if index < len(self.keys) and self.keys[index] == record.key:
+            del self.records[index]
+            del self.keys[index]
+
+    def insert(self, record):
+        index = bisect.bisect_left(self.keys, record.key)
+        self.records.insert(index, record)
+        self.keys.insert(index, record.key)
+
+
+class SnapshotData:
+    """一次构建的结果，构建完成后不再修改，读取无需加锁
+
+    增量重建通过 apply 生成新的 SnapshotData：只复制受影响的视图，
+    用二分查找删除旧记录、插入新记录，不重新排序全部资源。
+    """
+
+    __slots__ = ('records', 'views', 'tag_index', 'high_water', 'generated_at', 'built', 'full_built', 'bytes')
+
+    def __init__(self, records, views, tag_index, high_water, full_built, bytes):
+        self.records = records  # id -> CatalogRecord
+        self.views = views  # category -> SnapshotView，None 为全部资源
+        self.tag_index = tag_index  # tag -> frozenset(id)
+        self.high_water = high_water
+        self.generated_at = datetime.utcnow()
+        self.built = time.monotonic()
+        self.full_built = full_built
+        self.bytes = bytes
+
+    @classmethod
+    def build(cls, records, high_water):
+        ordered = sorted(records.values(), key=lambda record: record.key)
+        views = {None: SnapshotView(ordered)}
+        by_category = defaultdict(list)
+        tag_index = defaultdict(set)
+        size = 0
+        for record in ordered:
+            by_category[record.category].append(record)
+            for tag in record.tag_set:
+                tag_index[tag].add(record.id)
+            size += record.memory_size()
+        for category, items in by_category.items():
+            views[category] = SnapshotView(items)
+        tag_index = {tag: frozenset(ids) for tag, ids in tag_index.items()}
+        size += sys.getsizeof(records) + sum(sys.getsizeof(ids) for ids in tag_index.values())
+        return cls(records, views, tag_index, high_water, time.monotonic(), size)
+
+    def apply(self, changed, high_water, removed=()):
+        """返回合并了 changed（新增或修改过的记录）并去掉 removed（不再发布的 id）的新快照，自身保持不变"""
+        removed = [id for id in removed if id in self.records]
+        if not changed and not removed:
+            return SnapshotData(self.records, self.views, self.tag_index, high_water, self.full_built, self.bytes)
+
+        records = dict(self.records)
+        views = dict(self.views)
+        tag_index = dict(self.tag_index)
+        copied = set()
+        touched_tags = defaultdict(lambda: ([], []))  # tag -> (移除的 id, 加入的 id)
+        size = self.bytes
+
+        def view_for(category):
+            if category not in copied:
+                views[category] = views[category].copy() if category in views else SnapshotView([], [])
+                copied.add(category)
+            return views[category]
+
+        def drop(old):
+            view_for(None).remove(old)
+            view_for(old.category).remove(old)
+            for tag in old.tag_set:
+                touched_tags[tag][0].append(old.id)
+            return old.memory_size()
+
+        for id in removed:
+            size -= drop(records.pop(id))
+
+        for record in changed:
+            old = records.get(record.id)
+            if old is not None:
+                size -= drop(old)
+            records[record.id] = record
+            view_for(None).insert(record)
+            view_for(record.category).insert(record)
+            for tag in record.tag_set:
+                touched_tags[tag][1].append(record.id)
+            size += record.memory_size()
+
+        for category in copied:
+            if category is not None and not views[category].records:
+                del views[category]
+        for tag, (removed, added) in touched_tags.items():
+            ids = (tag_index.get(tag, frozenset()) - frozenset(removed)) | frozenset(added)
+            if ids:
+                tag_index[tag] = ids
+            else:
+                tag_index.pop(tag, None)
+        return SnapshotData(records, views, tag_index, high_water, self.full_built, size)
+
+
+class CatalogSnapshot:
+    """只读目录快照（可选）
+
+    开启 CATALOG_SNAPSHOT_ENABLED 后，每个进程在内存中保存全部已发布资源的列表字段，
+    资源列表的分类/标签过滤和分页（含游标）直接在快照上完成，不访问数据库；搜索仍走搜索后端。
+
+    快照超过 CATALOG_SNAPSHOT_REFRESH_INTERVAL 秒或目录变更后，下一次读取在后台按 updated_at
+    高水位增量重建，只查询新增和修改过的行，状态改为草稿或归档的资源随之移出快照；删除只能由全量重建发现，
+    每 CATALOG_SNAPSHOT_FULL_REBUILD_INTERVAL 秒做一次。重建期间继续使用旧快照。
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._data = None
+        self._stale = True
+        self._refreshing = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.enabled = False
+        self.interval = 5
+        self.full_interval = 600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CATALOG_SNAPSHOT_ENABLED', False)
+        app.config.setdefault('CATALOG_SNAPSHOT_REFRESH_INTERVAL', 5)
+        app.config.setdefault('CATALOG_SNAPSHOT_FULL_REBUILD_INTERVAL', 600)
+        self._app = app
+        self.enabled = app.config['CATALOG_SNAPSHOT_ENABLED']
+        self.interval = app.config['CATALOG_SNAPSHOT_REFRESH_INTERVAL']
+        self.full_interval = app.config['CATALOG_SNAPSHOT_FULL_REBUILD_INTERVAL']
+        app.extensions['catalog_snapshot'] = self
+
+    def view(self, category=None, tags=None, tag_mode='all'):
+        """返回满足分类/标签条件的 SnapshotView"""
+        data = self._current()
+        view = data.views.get(category or None)
+        if view is None:
+            return SnapshotView([], [])
+        if tags:
+            sets = [data.tag_index.get(tag, frozenset()) for tag in tags]
+            ids = frozenset.intersection(*sets) if tag_mode == 'all' else frozenset().union(*sets)
+            view = view.filter(ids)
+        return view
+
+    def status(self):
+        data = self._data
+        if data is None:
+            return {'resources': 0}
+        return {
+            'resources': len(data.records),
+            'bytes': data.bytes,
+            'generated_at': data.generated_at.isoformat(),
+            'high_water': data.high_water.isoformat() if data.high_water else None,
+        }
+
+    def invalidate(self):
+        """目录变更后调用，下一次读取时增量重建"""
+        with self._lock:
+            self._generation += 1
+            self._stale = True
+
+    def _current(self):
+        data = self._data
+        if data is None:
+            with self._build_lock:
+                if self._data is None:
+                    self.refresh(full=True)
+            return self._data
+        if self._stale or time.monotonic() - data.built > self.interval:
+            self._refresh_in_background()
+        return data
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name='catalog-snapshot', daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            with self._build_lock:
+                data = self._data
+                self.refresh(full=data is None or time.monotonic() - data.full_built > self.full_interval)
+        except Exception:
+            self._app.logger.error('Failed to refresh catalog snapshot', exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def refresh(self, full=False):
+        """重建快照：full=True 全量读取，否则只读取 updated_at 不早于高水位的行"""
+        kind = 'full' if full or self._data is None else 'incremental'
+        with self._lock:
+            generation = self._generation
+        started = time.perf_counter()
+        try:
+            with self._app.app_context():
+                g.db_read_only = True
+                data = self._build(self._app.db.session, None if kind == 'full' else self._data)
+        except Exception:
+            snapshot_rebuilds.inc(kind=kind, result='error')
+            raise
+        elapsed = time.perf_counter() - started
+        snapshot_rebuilds.inc(kind=kind, result='ok')
+        snapshot_rebuild_duration.observe(elapsed, kind=kind)
+        snapshot_resources.set(len(data.records))
+        snapshot_bytes.set(data.bytes)
+
+        with self._lock:
+            self._data = data
+            # 构建期间又有写入时保持过期标记，下一次读取再重建
+            if generation == self._generation:
+                self._stale = False
+        return elapsed
+
+    def _build(self, session, previous):
+        from models.cultural_resource import CulturalResource
+        from services.serializers import LIST_COLUMNS
+
+        # 增量重建也要读取非发布状态的行，才能把刚被撤下的资源移出快照
+        query = session.query(*LIST_COLUMNS, CulturalResource.updated_at, CulturalResource.status)
+        high_water = previous.high_water if previous is not None else None
+        if previous is None:
+            query = query.filter(CulturalResource.status == PUBLISHED)
+        elif high_water is not None:
+            query = query.filter(CulturalResource.updated_at >= high_water - INCREMENTAL_LOOKBACK)
+
+        changed = []
+        removed = []
+        for row in query.yield_per(5000):
+            if row.updated_at is not None and (high_water is None or row.updated_at > high_water):
+                high_water = row.updated_at
+            if previous is not None:
+                if row.status != PUBLISHED:
+                    removed.append(row.id)
+                    continue
+                # 回看窗口内未变化的行直接跳过
+                current = previous.records.get(row.id)
+                if current is not None and current.updated_at == row.updated_at and row.updated_at is not None:
+                    continue
+            changed.append(CatalogRecord(row))
+
+        if previous is None:
+            return SnapshotData.build({record.id: record for record in changed}, high_water)
+        return previous.apply(changed, high_water, removed)
+
+
+catalog_snapshot = CatalogSnapshot()
@@ -0,0 +1,119 @@
+import gzip
+
+from flask import request
+
+from services.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只提供 gzip
+    brotli = None
+
+
+compressed_responses = metrics.counter(
+    'response_compression_total',
+    'Responses compressed by encoding and source (fresh, cached).',
+    ('encoding', 'source'),
+)
+
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'application/javascript',
+)
+
+
+class Compressor:
+    """按 Accept-Encoding 协商 br/gzip 压缩超过阈值的响应
+
+    普通响应在 after_request 中压缩；响应缓存命中时通过 apply_cached 复用
+    CachedResponse 上保存的压缩结果，不再重复压缩。流式响应与文件响应保持原样。
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.min_size = 1024
+        self.gzip_level = 6
+        self.brotli_quality = 4
+        self.mimetypes = COMPRESSIBLE_MIMETYPES
+        self.encodings = ('gzip',)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESSION_ENABLED', True)
+        app.config.setdefault('COMPRESSION_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESSION_GZIP_LEVEL', 6)
+        app.config.setdefault('COMPRESSION_BROTLI_QUALITY', 4)
+        app.config.setdefault('COMPRESSION_MIMETYPES', COMPRESSIBLE_MIMETYPES)
+        self.enabled = app.config['COMPRESSION_ENABLED']
+        self.min_size = app.config['COMPRESSION_MIN_SIZE']
+        self.gzip_level = app.config['COMPRESSION_GZIP_LEVEL']
+        self.brotli_quality = app.config['COMPRESSION_BROTLI_QUALITY']
+        self.mimetypes = tuple(app.config['COMPRESSION_MIMETYPES'])
+        # 客户端对两者的权重相同时优先 br
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        app.after_request(self.after_request)
+        app.extensions['compressor'] = self
+
+    def _eligible(self, response):
+        return (
+            self.enabled
+            and response.status_code == 200
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and 'Content-Encoding' not in response.headers
+            and not response.cache_control.no_transform
+            and response.mimetype in self.mimetypes
+        )
+
+    def negotiate(self, size):
+        if size < self.min_size:
+            return None
+        return request.accept_encodings.best_match(self.encodings)
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        # mtime=0 使相同内容的压缩结果完全一致
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def _apply(self, response, body, encoding):
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        # 压缩后的字节与原始表示不同，强 ETag 降为弱 ETag
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+    def after_request(self, response):
+        if not self._eligible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        encoding = self.negotiate(len(data))
+        if encoding is not None:
+            self._apply(response, self.compress(data, encoding), encoding)
+            compressed_responses.inc(encoding=encoding, source='fresh')
+        return response
+
+    def apply_cached(self, response, entry):
+        """用缓存条目中的压缩结果填充响应，返回 True 表示本次为条目新增了压缩版本"""
+        if not self._eligible(response):
+            return False
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(len(entry.body))
+        if encoding is None:
+            return False
+        body = entry.encoded.get(encoding)
+        added = body is None
+        if added:
+            body = entry.encoded[encoding] = self.compress(entry.body, encoding)
+        self._apply(response, body, encoding)
+        compressed_responses.inc(encoding=encoding, source='fresh' if added else 'cached')
+        return added
+
+
+compressor = Compressor()
@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+
+from services.metrics import metrics
+
+
+count_cache_requests = metrics.counter(
+    'resource_count_cache_requests_total',
+    'Resource list total-count lookups by result (hit, miss, skipped).',
+    ('result',),
+)
+
+
+class CountCache:
+    """资源列表总数缓存，按 (category, search) 记忆精确 COUNT(*) 结果
+
+    写入 create_resource 等接口时调用 invalidate 整体失效；TTL 兜底其他进程的写入。
+    """
+
+    def __init__(self, app=None):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.ttl = 60
+        self.max_entries = 1024
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COUNT_CACHE_TTL', 60)
+        app.config.setdefault('COUNT_CACHE_MAX_ENTRIES', 1024)
+        self.ttl = app.config['COUNT_CACHE_TTL']
+        self.max_entries = app.config['COUNT_CACHE_MAX_ENTRIES']
+        app.extensions['count_cache'] = self
+
+    def get_or_count(self, key, count):
+        """命中则直接返回缓存值，否则调用 count() 并记录"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                count_cache_requests.inc(result='hit')
+                return entry[0]
+            generation = self._generation
+
+        value = count()
+        count_cache_requests.inc(result='miss')
+        with self._lock:
+            # 计数期间发生了写入失效，结果可能已过时，不再缓存
+            if generation != self._generation:
+                return value
+            self._entries[key] = (value, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def record_skipped(self):
+        count_cache_requests.inc(result='skipped')
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+count_cache = CountCache()
@@ -0,0 +1,174 @@
+import atexit
+import os
+import threading
+from collections import defaultdict
+
+from sqlalchemy import bindparam, update
+
+from services.metrics import metrics
+
+
+counter_flushes = metrics.counter(
+    'resource_counter_flushes_total',
+    'Write-behind counter flushes by result.',
+    ('result',),
+)
+counter_flushed_rows = metrics.counter(
+    'resource_counter_flushed_rows_total',
+    'Rows updated by write-behind counter flushes.',
+)
+
+
+class CounterBuffer:
+    """浏览量/点赞数的写回缓冲
+
+    增量先在内存中聚合，由后台线程按时间间隔或累计阈值批量执行
+    UPDATE ... SET view_count = view_count + n，读取时合并尚未落库的增量。
+    每个进程各自缓冲，落库使用原子自增，多进程同时写入不会互相覆盖。
+    """
+
+    FIELDS = ('view_count', 'like_count')
+
+    def __init__(self, app=None):
+        self._app = None
+        self._pending = defaultdict(int)  # (field, id) -> delta
+        self._pending_total = 0
+        self._totals = defaultdict(int)  # (field, id) -> 本进程累计增量，落库后不清零
+        self._inflight = {}  # 正在落库、尚未提交的批次
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.enabled = True
+        self.interval = 5
+        self.threshold = 500
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COUNTER_BUFFER_ENABLED', True)
+        app.config.setdefault('COUNTER_FLUSH_INTERVAL', 5)
+        app.config.setdefault('COUNTER_FLUSH_THRESHOLD', 500)
+        self._app = app
+        self.enabled = app.config['COUNTER_BUFFER_ENABLED']
+        self.interval = app.config['COUNTER_FLUSH_INTERVAL']
+        self.threshold = app.config['COUNTER_FLUSH_THRESHOLD']
+        app.extensions['counter_buffer'] = self
+        atexit.register(self.shutdown)
+
+    def _ensure_worker(self):
+        # 延迟到第一次写入时启动，且 fork 之后在子进程里重新启动
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='counter-buffer-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def incr(self, field, id, amount=1):
+        """记录一次增量；未启用缓冲时直接执行原子自增"""
+        if field not in self.FIELDS:
+            raise ValueError(f'unsupported counter field: {field}')
+        if not self.enabled:
+            self._apply({(field, id): amount})
+            with self._lock:
+                self._totals[(field, id)] += amount
+            return
+
+        self._ensure_worker()
+        with self._lock:
+            self._totals[(field, id)] += amount
+            self._pending[(field, id)] += amount
+            self._pending_total += amount
+            reached = self._pending_total >= self.threshold
+        if reached:
+            self._wakeup.set()
+
+    def pending(self, field, id):
+        key = (field, id)
+        return self._pending.get(key, 0) + self._inflight.get(key, 0)
+
+    def total(self, field, id):
+        """本进程记录过的全部增量（含已落库的），响应缓存据此判断缓存中的计数是否过期"""
+        return self._totals.get((field, id), 0)
+
+    def merge(self, field, id, value):
+        """数据库中的值加上本进程尚未落库的增量"""
+        return (value or 0) + self.pending(field, id)
+
+    def flush(self):
+        """把当前缓冲的增量全部落库，失败时放回缓冲等待下次重试"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._inflight = dict(self._pending)
+                self._pending.clear()
+                self._pending_total = 0
+
+            try:
+                with self._app.app_context():
+                    rows = self._apply(batch)
+            except Exception:
+                with self._lock:
+                    for key, delta in batch.items():
+                        self._pending[key] += delta
+                        self._pending_total += delta
+                    self._inflight = {}
+                counter_flushes.inc(result='error')
+                self._app.logger.error('Failed to flush resource counters', exc_info=True)
+                return 0
+
+            self._inflight = {}
+            counter_flushes.inc(result='ok')
+            counter_flushed_rows.inc(rows)
+            return rows
+
+    def _apply(self, batch):
+        from flask import current_app
+        from models.cultural_resource import CulturalResource
+
+        session = current_app.db.session
+        by_field = defaultdict(list)
+        for (field, id), delta in batch.items():
+            if delta:
+                by_field[field].append({'resource_id': id, 'delta': delta})
+
+        table = CulturalResource.__table__
+        try:
+            for field, params in by_field.items():
+                stmt = (
+                    update(table)
+                    .where(table.c.id == bindparam('resource_id'))
+                    .values({field: table.c[field] + bindparam('delta')})
+                )
+                # executemany：同一字段的所有增量一次往返
+                session.execute(stmt, params)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return sum(len(params) for params in by_field.values())
+
+    def shutdown(self):
+        """停止后台线程并落库剩余增量，用于进程正常退出"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.interval + 5)
+        if self._app is not None:
+            self.flush()
+
+
+counter_buffer = CounterBuffer()
@@ -0,0 +1,149 @@
+import functools
+import itertools
+import threading
+import time
+
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+from services.metrics import metrics
+
+
+db_route_total = metrics.counter(
+    'db_route_total',
+    'Statements routed to the primary or a read replica.',
+    ('target',),
+)
+
+_READ_ONLY_PREFIXES = ('SELECT', 'WITH', 'SHOW', 'EXPLAIN')
+
+
+def read_only(view):
+    """标记只读接口，其查询优先发往只读副本
+
+    需要放在 jwt_required 外层，用户加载器查库时才已经处于只读模式。
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def _is_write(clause):
+    if isinstance(clause, UpdateBase):
+        return True
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().upper().startswith(_READ_ONLY_PREFIXES)
+    return False
+
+
+class RoutingSession(Session):
+    """读写分离会话：只读接口的查询走副本，flush/DML 以及写过之后的查询走主库"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('db_read_only'):
+            if self._flushing or _is_write(clause):
+                # 本次请求写过主库后，后续读取也留在主库，保证读到自己的写入
+                g.db_read_only = False
+            else:
+                engine = replica_router.choose()
+                if engine is not None:
+                    db_route_total.inc(target='replica')
+                    return engine
+        db_route_total.inc(target='primary')
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaState:
+    __slots__ = ('name', 'healthy', 'lag', 'checked_at')
+
+    def __init__(self, name):
+        self.name = name
+        self.healthy = True
+        self.lag = None
+        self.checked_at = 0.0
+
+
+class ReplicaRouter:
+    """在健康的只读副本间轮询，复制延迟超过阈值或连接失败时回退主库"""
+
+    def __init__(self, app=None):
+        self._replicas = []
+        self._cycle = None
+        self._lock = threading.Lock()
+        self.max_lag = 5
+        self.check_interval = 5
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('DB_REPLICA_BINDS', [])
+        app.config.setdefault('DB_REPLICA_MAX_LAG', 5)
+        app.config.setdefault('DB_REPLICA_CHECK_INTERVAL', 5)
+        self._replicas = [ReplicaState(name) for name in app.config['DB_REPLICA_BINDS']]
+        self._cycle = itertools.cycle(self._replicas) if self._replicas else None
+        self.max_lag = app.config['DB_REPLICA_MAX_LAG']
+        self.check_interval = app.config['DB_REPLICA_CHECK_INTERVAL']
+        app.extensions['replica_router'] = self
+
+    def _measure_lag(self, engine):
+        with engine.connect() as conn:
+            if engine.dialect.name != 'mysql':
+                conn.execute(text('SELECT 1'))
+                return 0
+            try:
+                row = conn.execute(text('SHOW REPLICA STATUS')).mappings().first()
+                key = 'Seconds_Behind_Source'
+            except Exception:
+                row = conn.execute(text('SHOW SLAVE STATUS')).mappings().first()
+                key = 'Seconds_Behind_Master'
+            if row is None:
+                # 不是副本（例如直接指向主库的只读账号），视为无延迟
+                return 0
+            return row[key]
+
+    def _check(self, state, engine):
+        try:
+            lag = self._measure_lag(engine)
+        except Exception:
+            current_app.logger.warning('Read replica %s health check failed', state.name, exc_info=True)
+            lag = None
+            state.healthy = False
+        else:
+            # 复制线程停止时 Seconds_Behind_Source 为 NULL
+            state.healthy = lag is not None and lag <= self.max_lag
+        state.lag = lag
+        state.checked_at = time.monotonic()
+
+    def choose(self):
+        if self._cycle is None:
+            return None
+        engines = current_app.extensions['sqlalchemy'].engines
+        now = time.monotonic()
+        for _ in range(len(self._replicas)):
+            with self._lock:
+                state = next(self._cycle)
+                stale = now - state.checked_at >= self.check_interval
+                if stale:
+                    # 先占住检查时间，其他线程在检查期间沿用上一次的健康状态
+                    state.checked_at = now
+            if stale:
+                self._check(state, engines[state.name])
+            if state.healthy:
+                return engines[state.name]
+        return None
+
+    def status(self):
+        return [
+            {'name': state.name, 'healthy': state.healthy, 'lag': state.lag}
+            for state in self._replicas
+        ]
+
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify
+from flask_jwt_extended import get_current_user, get_jwt, verify_jwt_in_request
+
+from services.metrics import metrics
+
+
+user_cache_requests = metrics.counter(
+    'user_cache_requests_total',
+    'JWT user lookups by result (hit, miss, missing).',
+    ('result',),
+)
+
+
+class UserSnapshot:
+    """用户的只读快照，字段与 User 同名，可直接交给 user_summary/user_profile 序列化"""
+
+    __slots__ = ('id', 'username', 'email', 'role', 'is_active', 'avatar', 'bio', 'created_at')
+
+    def __init__(self, user):
+        for name in self.__slots__:
+            setattr(self, name, getattr(user, name))
+
+
+def identity_claims(user):
+    """写入 access token 的附加声明，路由据此鉴权而无需查库"""
+    return {'role': user.role or 'user', 'is_active': bool(user.is_active)}
+
+
+class UserCache:
+    """JWT 用户加载器，带容量上限的 TTL 快照缓存
+
+    jwt_required 校验通过后由 flask_jwt_extended 调用 user_lookup_loader，
+    路由通过 current_user 拿到快照；资料修改提交后调用 invalidate，TTL 兜底其他进程的写入。
+    """
+
+    def __init__(self, app=None, jwt=None):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.ttl = 60
+        self.max_entries = 10000
+        if app is not None:
+            self.init_app(app, jwt)
+
+    def init_app(self, app, jwt):
+        app.config.setdefault('USER_CACHE_TTL', 60)
+        app.config.setdefault('USER_CACHE_MAX_ENTRIES', 10000)
+        self.ttl = app.config['USER_CACHE_TTL']
+        self.max_entries = app.config['USER_CACHE_MAX_ENTRIES']
+        app.extensions['user_cache'] = self
+
+        @jwt.user_lookup_loader
+        def load_user(_jwt_header, jwt_data):
+            return self.get(jwt_data[current_app.config['JWT_IDENTITY_CLAIM']])
+
+        @jwt.user_lookup_error_loader
+        def user_not_found(_jwt_header, _jwt_data):
+            return jsonify({'message': '用户不存在'}), 404
+
+    def get(self, user_id):
+        """返回用户快照，用户不存在或已停用时返回 None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                user_cache_requests.inc(result='hit')
+                return entry[0]
+            generation = self._generation
+
+        from models.user import User
+
+        user = current_app.db.session.get(User, user_id)
+        if user is None or not user.is_active:
+            user_cache_requests.inc(result='missing')
+            return None
+        snapshot = UserSnapshot(user)
+        user_cache_requests.inc(result='miss')
+        with self._lock:
+            # 加载期间发生了失效，快照可能已过时，不再缓存
+            if generation == self._generation:
+                self._entries[user_id] = (snapshot, now + self.ttl)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+
+
+def role_required(*roles, message='没有权限执行该操作'):
+    """校验 JWT 并根据 token 中的 role/is_active 声明鉴权，不查询数据库
+
+    引入这些声明之前签发的 token 没有 role/is_active，此时退回按用户记录（user_cache 快照）鉴权。
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            claims = get_jwt()
+            if 'role' in claims and 'is_active' in claims:
+                role, is_active = claims['role'], claims['is_active']
+            else:
+                user = get_current_user()
+                role, is_active = user.role or 'user', user.is_active
+            if not is_active or role not in roles:
+                return jsonify({'message': message}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+user_cache = UserCache()
@@ -0,0 +1,194 @@
+import io
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.metrics import metrics
+
+
+request_duration = metrics.histogram(
+    'http_request_duration_seconds',
+    'Request latency by method, endpoint and status.',
+    ('method', 'endpoint', 'status'),
+)
+request_queries = metrics.histogram(
+    'http_request_db_queries',
+    'SQL statements executed per request, by endpoint.',
+    ('endpoint',),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+query_duration = metrics.histogram(
+    'db_query_duration_seconds',
+    'SQL statement latency by endpoint (background work is labelled "-").',
+    ('endpoint',),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+slow_events = metrics.counter(
+    'slow_events_total',
+    'Requests and SQL statements over the configured slow thresholds.',
+    ('kind', 'endpoint'),
+)
+
+
+def _endpoint():
+    return (request.endpoint or 'unmatched') if has_request_context() else '-'
+
+
+class Instrumentation:
+    """请求与 SQL 计时
+
+    before/after_request 记录每个端点的耗时与查询数，SQLAlchemy 游标事件统计每条语句的耗时，
+    超过阈值的请求/语句写入日志。设置 PROFILER_ENABLED 后，带 X-Profile 请求头的请求会被
+    cProfile（或已安装的 pyinstrument）剖析，响应体替换为剖析报告，仅供预发环境排查热点。
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self.slow_request = 0.5
+        self.slow_query = 0.1
+        self._profile_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SLOW_REQUEST_THRESHOLD_MS', 500)
+        app.config.setdefault('SLOW_QUERY_THRESHOLD_MS', 100)
+        app.config.setdefault('PROFILER_ENABLED', False)
+        app.config.setdefault('PROFILER_HEADER', 'X-Profile')
+        app.config.setdefault('PROFILER_TOKEN', None)
+        app.config.setdefault('PROFILER_BACKEND', 'auto')
+        self._app = app
+        self.slow_request = app.config['SLOW_REQUEST_THRESHOLD_MS'] / 1000
+        self.slow_query = app.config['SLOW_QUERY_THRESHOLD_MS'] / 1000
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        # 监听 Engine 类本身，主库与各只读副本的引擎都会被统计
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.extensions['instrumentation'] = self
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+        g.query_count = 0
+        g.query_time = 0.0
+        g.profiler = self._start_profiler()
+
+    def _after_request(self, response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = _endpoint()
+        query_count = g.get('query_count', 0)
+        query_time = g.get('query_time', 0.0)
+
+        request_duration.observe(elapsed, method=request.method, endpoint=endpoint, status=response.status_code)
+        request_queries.observe(query_count, endpoint=endpoint)
+        response.headers['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, db;dur={query_time * 1000:.1f};desc="{query_count} queries"'
+        )
+        if elapsed >= self.slow_request:
+            slow_events.inc(kind='request', endpoint=endpoint)
+            self._app.logger.warning(
+                'Slow request %s %s: %.0f ms, %d queries (%.0f ms in SQL)',
+                request.method, request.full_path.rstrip('?'), elapsed * 1000, query_count, query_time * 1000,
+            )
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            response = self._profile_response(profiler, response)
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request 未执行（如异常未被处理）时也要停止剖析器并释放锁
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            import cProfile
+
+            try:
+                if isinstance(profiler, cProfile.Profile):
+                    profiler.disable()
+                else:
+                    profiler.stop()
+            finally:
+                self._profile_lock.release()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get('query_started')
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+        endpoint = _endpoint()
+        query_duration.observe(elapsed, endpoint=endpoint)
+        if has_request_context() and 'query_count' in g:
+            g.query_count += 1
+            g.query_time += elapsed
+        if elapsed >= self.slow_query:
+            slow_events.inc(kind='query', endpoint=endpoint)
+            self._app.logger.warning('Slow query (%.0f ms, endpoint %s): %s', elapsed * 1000, endpoint,
+                                     ' '.join(statement.split())[:500])
+
+    def _start_profiler(self):
+        config = self._app.config
+        if not config['PROFILER_ENABLED']:
+            return None
+        value = request.headers.get(config['PROFILER_HEADER'])
+        if not value or (config['PROFILER_TOKEN'] and value != config['PROFILER_TOKEN']):
+            return None
+        # 同一时刻只剖析一个请求，避免多个剖析器互相干扰
+        if not self._profile_lock.acquire(blocking=False):
+            return None
+        # 剖析器只在预发排查时用到，按需导入
+        try:
+            pyinstrument = None
+            if config['PROFILER_BACKEND'] in ('auto', 'pyinstrument'):
+                try:
+                    import pyinstrument
+                except ImportError:  # pyinstrument 为可选依赖，未安装时使用 cProfile
+                    pass
+            if pyinstrument is not None:
+                profiler = pyinstrument.Profiler()
+                profiler.start()
+            else:
+                import cProfile
+
+                profiler = cProfile.Profile()
+                profiler.enable()
+        except Exception:
+            self._profile_lock.release()
+            raise
+        return profiler
+
+    def _profile_response(self, profiler, response):
+        import cProfile
+        import pstats
+
+        try:
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+                output = io.StringIO()
+                pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(60)
+                body, mimetype = output.getvalue(), 'text/plain'
+            else:
+                profiler.stop()
+                body, mimetype = profiler.output_html(), 'text/html'
+        finally:
+            self._profile_lock.release()
+
+        profiled = self._app.response_class(body, mimetype=mimetype)
+        profiled.headers['X-Profiled-Status'] = str(response.status_code)
+        profiled.headers['Server-Timing'] = response.headers.get('Server-Timing', '')
+        profiled.cache_control.no_store = True
+        return profiled
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,53 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时使用标准库 json
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """基于 orjson 的 JSON 序列化，输出与 DefaultJSONProvider 保持一致的键顺序
+
+    datetime 等类型仍交给 DefaultJSONProvider.default 处理；中文直接输出 UTF-8，
+    不再转义成 \\uXXXX，响应体更小。调用方传入 json.dumps 专有参数时退回标准库。
+    """
+
+    ensure_ascii = False
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        options = self._options()
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            options |= orjson.OPT_INDENT_2
+        body = orjson.dumps(obj, default=self.default, option=options) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """按 JSON_PROVIDER 配置（auto、orjson、stdlib）选择 JSON 序列化实现"""
+    app.config.setdefault('JSON_PROVIDER', 'auto')
+    choice = app.config['JSON_PROVIDER']
+    if choice == 'stdlib':
+        return
+    if orjson is None:
+        if choice == 'orjson':
+            app.logger.warning('JSON_PROVIDER is orjson but orjson is not installed; using stdlib json')
+        return
+    app.json = OrjsonProvider(app)
@@ -0,0 +1,32 @@
+"""进程生命周期钩子，供 gunicorn.conf.py、serve.py 等多进程/多线程启动方式调用"""
+
+
+def after_fork(app):
+    """worker fork 之后调用：丢弃从主进程继承的连接池，子进程按需重新建立连接
+
+    close=False 只丢弃引用而不关闭套接字，避免影响仍在使用这些连接的主进程。
+    计数缓冲的刷新线程、头像/密码哈希的执行池都会在子进程第一次使用时按 pid 重新创建。
+    最后在后台线程中启动本 worker 的预热。
+    """
+    with app.app_context():
+        for engine in app.extensions['sqlalchemy'].engines.values():
+            engine.dispose(close=False)
+    # 预热在本 worker 内重新建立连接、填充缓存，完成前 /ready 返回 503
+    warmup = app.extensions.get('warmup')
+    if warmup is not None:
+        warmup.start()
+
+
+def shutdown(app):
+    """worker 正常退出或重载前调用：落库未提交的计数并等待后台任务完成"""
+    extensions = app.extensions
+    counter_buffer = extensions.get('counter_buffer')
+    if counter_buffer is not None:
+        counter_buffer.shutdown()
+    for name in ('avatar_pipeline', 'password_hasher'):
+        service = extensions.get(name)
+        if service is not None:
+            service.shutdown(wait=True)
+    with app.app_context():
+        for engine in extensions['sqlalchemy'].engines.values():
+            engine.dispose()
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from models.resource_like import ResourceLike
+
+
+def _insert_ignore(dialect):
+    """返回遇到唯一键冲突时静默跳过的 INSERT；不支持的方言返回 None"""
+    table = ResourceLike.__table__
+    if dialect == 'mysql':
+        return insert(table).prefix_with('IGNORE')
+    if dialect == 'sqlite':
+        return insert(table).prefix_with('OR IGNORE')
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert(table).on_conflict_do_nothing(index_elements=['user_id', 'resource_id'])
+    return None
+
+
+def record_like(session, user_id, resource_id):
+    """写入一条点赞记录，返回是否为新点赞；重复点赞不报错也不写入，调用方负责提交事务
+
+    依赖 (user_id, resource_id) 唯一键做插入即忽略，不需要先查询再写入，
+    并发的重复请求也只有一条能插入成功。
+    """
+    values = {'user_id': user_id, 'resource_id': resource_id, 'created_at': datetime.utcnow()}
+    stmt = _insert_ignore(session.get_bind().dialect.name)
+    if stmt is not None:
+        return session.execute(stmt, values).rowcount == 1
+    try:
+        with session.begin_nested():
+            session.execute(insert(ResourceLike.__table__), values)
+    except IntegrityError:
+        return False
+    return True
+
+
+def liked_resource_ids(session, user_id, resource_ids):
+    """返回 resource_ids 中该用户点过赞的 id 集合，一次查询"""
+    if not resource_ids:
+        return set()
+    return set(session.execute(
+        select(ResourceLike.resource_id).where(
+            ResourceLike.user_id == user_id,
+            ResourceLike.resource_id.in_(resource_ids),
+        )
+    ).scalars())
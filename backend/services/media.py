@@ -0,0 +1,130 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from flask import abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+from services.metrics import metrics
+
+
+media_responses = metrics.counter(
+    'media_responses_total',
+    'Media responses by root and result (full, partial, not_modified, offloaded).',
+    ('root', 'result'),
+)
+
+# 文件名中带内容哈希（头像的 SHA-256、构建产物的 name.<hash>.ext）时内容永不变化
+HASHED_NAME = re.compile(r'(?:^|[._-])[0-9a-f]{16,}(?:[._-]|$)')
+ACCEL_MODES = ('none', 'sendfile', 'accel-redirect')
+
+
+class MediaServer:
+    """资源媒体文件（视频、音频、3D 模型）与头像的文件服务
+
+    - Range 请求返回 206，前端播放器和 Unity WebGL/3D 页面拖动时只下载需要的片段
+    - ETag 由 (inode, 大小, mtime) 组成，与 nginx/Apache 的做法一致；不在请求线程里读取文件内容计算哈希
+    - 文件名带内容哈希时返回一年有效的 immutable 缓存头，其余按 MEDIA_MAX_AGE 缓存并用 ETag 校验
+    - MEDIA_ACCEL 为 sendfile / accel-redirect 时只返回 X-Sendfile / X-Accel-Redirect 头，
+      由前端的 Apache/lighttpd/nginx 直接发送文件（含 Range 处理），不占用 worker；
+      为 none 时由 werkzeug 发送，gunicorn 对完整文件响应使用 sendfile()
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self.accel = 'none'
+        self.accel_prefix = '/protected-media'
+        self.max_age = 3600
+        self.immutable_max_age = 365 * 24 * 3600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MEDIA_ROOT', None)
+        app.config.setdefault('MEDIA_ACCEL', 'none')
+        app.config.setdefault('MEDIA_ACCEL_PREFIX', '/protected-media')
+        app.config.setdefault('MEDIA_MAX_AGE', 3600)
+        app.config.setdefault('MEDIA_IMMUTABLE_MAX_AGE', 365 * 24 * 3600)
+        if app.config['MEDIA_ACCEL'] not in ACCEL_MODES:
+            raise ValueError(f'unsupported MEDIA_ACCEL: {app.config["MEDIA_ACCEL"]}')
+        self._app = app
+        self.accel = app.config['MEDIA_ACCEL']
+        self.accel_prefix = app.config['MEDIA_ACCEL_PREFIX'].rstrip('/')
+        self.max_age = app.config['MEDIA_MAX_AGE']
+        self.immutable_max_age = app.config['MEDIA_IMMUTABLE_MAX_AGE']
+        app.extensions['media_server'] = self
+
+    def roots(self):
+        """可供访问的目录：{名称: 绝对路径}"""
+        from services.avatar_pipeline import avatar_pipeline
+
+        media_root = self._app.config['MEDIA_ROOT']
+        if not media_root:
+            media_root = os.path.join(self._app.root_path, '..', 'public', 'media')
+        return {'media': os.path.abspath(media_root), 'avatars': avatar_pipeline.folder}
+
+    def etag(self, st):
+        """文件被替换或改写后 inode、大小或纳秒级 mtime 必然变化，足以作为强校验值"""
+        return f'{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}'
+
+    def send(self, root, filename):
+        """按 root 名称发送文件，路径越界或不是普通文件时返回 404"""
+        folder = self.roots()[root]
+        path = safe_join(folder, filename)
+        if path is None:
+            abort(404)
+        try:
+            st = os.stat(path)
+        except OSError:
+            abort(404)
+        if not stat.S_ISREG(st.st_mode):
+            abort(404)
+
+        etag = self.etag(st)
+        if HASHED_NAME.search(os.path.basename(filename).lower()):
+            max_age, immutable = self.immutable_max_age, True
+        else:
+            max_age, immutable = self.max_age, False
+
+        if self.accel == 'none':
+            response = send_file(path, conditional=True, etag=etag, max_age=max_age, last_modified=st.st_mtime)
+            # 完整响应也声明支持 Range，浏览器据此决定能否直接跳转播放位置
+            response.accept_ranges = 'bytes'
+        else:
+            response = self._offload(root, filename, path, st, etag, max_age)
+        if immutable:
+            response.cache_control.immutable = True
+
+        if response.status_code == 304:
+            result = 'not_modified'
+        elif self.accel != 'none':
+            result = 'offloaded'
+        elif response.status_code == 206:
+            result = 'partial'
+        else:
+            result = 'full'
+        media_responses.inc(root=root, result=result)
+        return response
+
+    def _offload(self, root, filename, path, st, etag, max_age):
+        """交给前端服务器发送文件体，这里只负责校验和缓存头"""
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = current_app.response_class(mimetype=mimetype)
+        # 响应头只能是 latin-1，中文文件名必须百分号编码；? # % 不编码还会改变前端服务器解析出的路径
+        if self.accel == 'sendfile':
+            response.headers['X-Sendfile'] = quote(path)
+        else:
+            # nginx 中对应的 internal location 指向同一目录，例如
+            # location /protected-media/media/ { internal; alias /srv/huxiang/media/; }
+            response.headers['X-Accel-Redirect'] = quote(f'{self.accel_prefix}/{root}/{filename}')
+        response.set_etag(etag)
+        response.last_modified = st.st_mtime
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        # Range 由前端服务器处理，这里只回答 If-None-Match / If-Modified-Since
+        return response.make_conditional(request)
+
+
+media_server = MediaServer()
@@ -0,0 +1,99 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, func, inspect, or_, text, update
+
+from models.cultural_resource import CulturalResource
+
+
+# 为排序键加上 NOT NULL 约束的 DDL：{方言: {列名: [语句]}}
+_SORT_KEY_DDL = {
+    'mysql': {
+        'priority': ['ALTER TABLE cultural_resources MODIFY priority INTEGER NOT NULL DEFAULT 0'],
+        'created_at': ['ALTER TABLE cultural_resources MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP'],
+    },
+    'postgresql': {
+        'priority': [
+            'ALTER TABLE cultural_resources ALTER COLUMN priority SET DEFAULT 0',
+            'ALTER TABLE cultural_resources ALTER COLUMN priority SET NOT NULL',
+        ],
+        'created_at': [
+            'ALTER TABLE cultural_resources ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP',
+            'ALTER TABLE cultural_resources ALTER COLUMN created_at SET NOT NULL',
+        ],
+    },
+}
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析"""
+
+
+def encode_cursor(priority, created_at, id):
+    """将排序键 (priority, created_at, id) 编码为不透明游标"""
+    payload = json.dumps(
+        [priority, created_at.isoformat() if created_at else None, id],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """解析游标，返回 (priority, created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        priority, created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return int(priority), datetime.fromisoformat(created_at), int(id)
+    except Exception as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def sort_key_columns(model):
+    return model.priority, model.created_at, model.id
+
+
+def apply_sort_order(query, model):
+    """按 priority DESC, created_at DESC, id DESC 排序，与复合索引保持一致"""
+    priority, created_at, id = sort_key_columns(model)
+    return query.order_by(priority.desc(), created_at.desc(), id.desc())
+
+
+def apply_keyset(query, model, cursor):
+    """追加 "排在游标之后" 的条件，使用展开的 OR 形式以便走索引范围扫描"""
+    priority, created_at, id = sort_key_columns(model)
+    p, c, i = decode_cursor(cursor)
+    return query.filter(or_(
+        priority < p,
+        and_(priority == p, created_at < c),
+        and_(priority == p, created_at == c, id < i),
+    ))
+
+
+def backfill_sort_keys(session):
+    """回填排序键中为 NULL 的旧数据并为这些列加上 NOT NULL 约束，可重复执行
+
+    游标与 catalog_snapshot 都假定 priority、created_at 不为 NULL：NULL 行在 SQL 排序中排在最后，
+    但 `priority < p` 这样的游标条件永远不成立，游标分页会漏掉这些行，游标本身也无法表示 NULL。
+    priority 补 0；created_at 补 updated_at，两者都为空时补当前时间。
+    SQLite 不支持修改列约束，只补数据；新建的表由模型定义带上约束。
+    """
+    backfilled = session.execute(
+        update(CulturalResource).where(CulturalResource.priority.is_(None)).values(priority=0)
+    ).rowcount
+    backfilled += session.execute(
+        update(CulturalResource)
+        .where(CulturalResource.created_at.is_(None))
+        .values(created_at=func.coalesce(CulturalResource.updated_at, datetime.utcnow()))
+    ).rowcount
+    connection = session.connection()
+    # 只修改仍可为 NULL 的列（MySQL 上读取 information_schema.columns）：MODIFY 可能重建整张表，不能每次 init_db 都执行
+    columns = inspect(connection).get_columns('cultural_resources')
+    nullable = {column['name'] for column in columns if column['nullable']}
+    statements = _SORT_KEY_DDL.get(connection.dialect.name, {})
+    for column, ddl in statements.items():
+        if column in nullable:
+            for statement in ddl:
+                session.execute(text(statement))
+    session.commit()
+    return backfilled
@@ -0,0 +1,133 @@
+import atexit
+import os
+import threading
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from services.metrics import metrics
+
+
+password_hash_requests = metrics.counter(
+    'password_hash_requests_total',
+    'Password hash operations by kind (hash, verify) and result (inline, pool, rejected).',
+    ('kind', 'result'),
+)
+
+
+# werkzeug 省略参数时使用的默认值，用于判断已有哈希是否与当前配置一致
+_METHOD_DEFAULTS = {
+    'pbkdf2': ('pbkdf2', 'sha256', str(DEFAULT_PBKDF2_ITERATIONS)),
+    'scrypt': ('scrypt', str(2 ** 15), '8', '1'),
+}
+
+
+def canonical_method(method):
+    """把 'pbkdf2'、'scrypt:65536' 这类简写补全为哈希串中实际记录的形式"""
+    parts = method.split(':')
+    defaults = _METHOD_DEFAULTS.get(parts[0])
+    if defaults is None:
+        return method
+    return ':'.join(list(parts) + list(defaults[len(parts):]))
+
+
+class PasswordHashBusy(Exception):
+    """哈希进程池排队已满，调用方应返回 503 并提示稍后重试"""
+
+    def __init__(self, retry_after):
+        super().__init__('password hashing queue is full')
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """密码哈希
+
+    哈希算法与成本参数可配置；计算放在独立的进程池中执行，避免 CPU 密集的哈希
+    占住请求线程和 GIL。排队中的任务数有上限，超过时立即拒绝而不是无限堆积。
+    """
+
+    def __init__(self, app=None):
+        self._config = {}
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2')
+        app.config.setdefault('PASSWORD_HASH_SALT_LENGTH', 16)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', 0)
+        app.config.setdefault('PASSWORD_HASH_MAX_QUEUE', 32)
+        app.config.setdefault('PASSWORD_HASH_RETRY_AFTER', 1)
+        self._config = {
+            'method': app.config['PASSWORD_HASH_METHOD'],
+            'salt_length': app.config['PASSWORD_HASH_SALT_LENGTH'],
+            'workers': app.config['PASSWORD_HASH_WORKERS'],
+            'max_queue': app.config['PASSWORD_HASH_MAX_QUEUE'],
+            'retry_after': app.config['PASSWORD_HASH_RETRY_AFTER'],
+        }
+        app.extensions['password_hasher'] = self
+        atexit.register(self.shutdown)
+
+    @property
+    def method(self):
+        return self._config.get('method', 'pbkdf2')
+
+    def _executor_for_process(self):
+        # 进程池在 fork 之后的子进程里重新创建；使用 spawn，避免在多线程进程中 fork。
+        # multiprocessing 在第一次用到进程池时才导入，不拖慢应用启动
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                workers = self._config['workers']
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                self._slots = threading.BoundedSemaphore(workers + self._config['max_queue'])
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, kind, func, *args):
+        if not self._config.get('workers'):
+            # 未配置进程池时在当前线程计算，适合开发环境和单元操作
+            password_hash_requests.inc(kind=kind, result='inline')
+            return func(*args)
+
+        executor = self._executor_for_process()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            password_hash_requests.inc(kind=kind, result='rejected')
+            raise PasswordHashBusy(self._config['retry_after'])
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        password_hash_requests.inc(kind=kind, result='pool')
+        return future.result()
+
+    def hash(self, password):
+        return self._run(
+            'hash', generate_password_hash, password, self.method, self._config.get('salt_length', 16)
+        )
+
+    def verify(self, password_hash, password):
+        return self._run('verify', check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """已有哈希的算法或成本参数与当前配置不同时返回 True"""
+        return password_hash.split('$', 1)[0] != canonical_method(self.method)
+
+    def shutdown(self, wait=True):
+        executor = self._executor
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=wait)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
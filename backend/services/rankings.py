@@ -0,0 +1,190 @@
+import heapq
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from flask import g
+
+from services.counters import counter_buffer
+from services.metrics import metrics
+
+
+ranking_refreshes = metrics.counter(
+    'resource_ranking_refreshes_total',
+    'Popular/trending ranking rebuilds by result (ok, error).',
+    ('result',),
+)
+ranking_refresh_duration = metrics.histogram(
+    'resource_ranking_refresh_seconds',
+    'Time spent rebuilding the popular/trending rankings.',
+)
+ranking_resources = metrics.gauge(
+    'resource_ranking_scanned_resources',
+    'Resources scanned by the last ranking rebuild.',
+)
+
+# 排行种类及各自的排序键，条目为 (id, 浏览量, 点赞数, 热度分)
+RANKING_KEYS = {
+    'views': lambda entry: (entry[1], entry[2], entry[0]),
+    'likes': lambda entry: (entry[2], entry[1], entry[0]),
+    'trending': lambda entry: (entry[3], entry[0]),
+}
+RANKINGS = tuple(RANKING_KEYS)
+LOAD_CHUNK_SIZE = 500
+
+
+class RankingSnapshot:
+    __slots__ = ('lists', 'generated_at', 'built')
+
+    def __init__(self, lists, generated_at, built):
+        self.lists = lists  # (kind, category) -> [Row]，category 为 None 表示全部分类
+        self.generated_at = generated_at
+        self.built = built
+
+
+class Rankings:
+    """热门/趋势排行
+
+    按 RANKING_REFRESH_INTERVAL 定期全表扫描一次计数列，为全部资源和每个分类各保留
+    前 RANKING_TOP_N 条（浏览量、点赞数、按发布时间衰减的热度分），并预先加载这些资源的
+    列表列。请求直接读内存中的快照，不在 view_count/like_count 上排序。
+
+    快照过期或目录变更后，下一次读取在后台线程重建，重建期间继续返回旧快照；
+    进程内还没有快照时同步构建。
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._snapshot = None
+        self._stale = True
+        self._refreshing = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.interval = 60
+        self.top_n = 200
+        self.gravity = 1.5
+        self.like_weight = 5
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RANKING_REFRESH_INTERVAL', 60)
+        app.config.setdefault('RANKING_TOP_N', 200)
+        app.config.setdefault('RANKING_TRENDING_GRAVITY', 1.5)
+        app.config.setdefault('RANKING_LIKE_WEIGHT', 5)
+        self._app = app
+        self.interval = app.config['RANKING_REFRESH_INTERVAL']
+        self.top_n = app.config['RANKING_TOP_N']
+        self.gravity = app.config['RANKING_TRENDING_GRAVITY']
+        self.like_weight = app.config['RANKING_LIKE_WEIGHT']
+        app.extensions['rankings'] = self
+
+    def get(self, kind, category=None):
+        """返回 (按名次排列的 Row 列表, 快照生成时间)"""
+        if kind not in RANKING_KEYS:
+            raise ValueError(f'unsupported ranking: {kind}')
+        snapshot = self._current()
+        return snapshot.lists.get((kind, category), []), snapshot.generated_at
+
+    def invalidate(self):
+        """目录变更后调用，下一次读取时重建"""
+        with self._lock:
+            self._generation += 1
+            self._stale = True
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._build_lock:
+                if self._snapshot is None:
+                    self.refresh()
+            return self._snapshot
+        if self._stale or time.monotonic() - snapshot.built > self.interval:
+            self._refresh_in_background()
+        return snapshot
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name='ranking-refresh', daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            with self._build_lock:
+                self.refresh()
+        except Exception:
+            self._app.logger.error('Failed to refresh resource rankings', exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def refresh(self):
+        """重新计算全部排行并替换快照"""
+        with self._lock:
+            generation = self._generation
+        started = time.perf_counter()
+        try:
+            with self._app.app_context():
+                # 扫描只读，可以发往只读副本
+                g.db_read_only = True
+                lists = self._build(self._app.db.session)
+        except Exception:
+            ranking_refreshes.inc(result='error')
+            raise
+        ranking_refreshes.inc(result='ok')
+        ranking_refresh_duration.observe(time.perf_counter() - started)
+
+        with self._lock:
+            self._snapshot = RankingSnapshot(lists, datetime.utcnow(), time.monotonic())
+            # 构建期间又有写入时保持过期标记，下一次读取再重建
+            if generation == self._generation:
+                self._stale = False
+
+    def _score(self, views, likes, created_at, now):
+        # 热度随发布时间衰减：(浏览 + 点赞权重 * 点赞) / (小时数 + 2) ^ gravity
+        age_hours = max((now - created_at).total_seconds(), 0) / 3600 if created_at else 0
+        return (views + self.like_weight * likes) / (age_hours + 2) ** self.gravity
+
+    def _build(self, session):
+        from models.cultural_resource import CulturalResource
+        from services.serializers import LIST_COLUMNS
+
+        now = datetime.utcnow()
+        everything = []
+        by_category = defaultdict(list)
+        rows = session.query(
+            CulturalResource.id,
+            CulturalResource.category,
+            CulturalResource.view_count,
+            CulturalResource.like_count,
+            CulturalResource.created_at,
+        ).yield_per(5000)
+        for id, category, views, likes, created_at in rows:
+            # 计入本进程尚未落库的增量
+            views = counter_buffer.merge('view_count', id, views)
+            likes = counter_buffer.merge('like_count', id, likes)
+            entry = (id, views, likes, self._score(views, likes, created_at, now))
+            everything.append(entry)
+            by_category[category].append(entry)
+        ranking_resources.set(len(everything))
+
+        ranked = {}
+        for category, entries in [(None, everything), *by_category.items()]:
+            for kind, key in RANKING_KEYS.items():
+                ranked[(kind, category)] = [entry[0] for entry in heapq.nlargest(self.top_n, entries, key=key)]
+
+        # 只为进入排行的资源加载列表列，按主键分批读取
+        wanted = sorted({id for ids in ranked.values() for id in ids})
+        loaded = {}
+        for start in range(0, len(wanted), LOAD_CHUNK_SIZE):
+            chunk = wanted[start:start + LOAD_CHUNK_SIZE]
+            for row in session.query(*LIST_COLUMNS).filter(CulturalResource.id.in_(chunk)):
+                loaded[row.id] = row
+        return {key: [loaded[id] for id in ids if id in loaded] for key, ids in ranked.items()}
+
+
+rankings = Rankings()
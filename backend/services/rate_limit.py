@@ -0,0 +1,271 @@
+import functools
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from werkzeug.exceptions import ServiceUnavailable, TooManyRequests
+
+from services.metrics import metrics
+from services.warmup import WARMUP_ENVIRON_KEY
+
+
+rate_limit_rejections = metrics.counter(
+    'rate_limit_rejections_total',
+    'Requests rejected with 429 by rate limit name.',
+    ('limit',),
+)
+rate_limit_errors = metrics.counter(
+    'rate_limit_backend_errors_total',
+    'Rate limit checks that failed open because the shared backend was unavailable.',
+)
+db_admission_rejections = metrics.counter(
+    'db_admission_rejections_total',
+    'Requests to DB-heavy endpoints shed with 503 by endpoint.',
+    ('endpoint',),
+)
+db_admission_in_flight = metrics.gauge(
+    'db_admission_in_flight',
+    'Requests currently holding a DB-heavy admission slot in this process.',
+)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+RATE_PATTERN = re.compile(r'^\s*(\d+)\s*/\s*(second|minute|hour|day)(?:\s+burst\s+(\d+))?\s*$')
+
+
+class RateLimitExceeded(TooManyRequests):
+    def __init__(self, retry_after):
+        super().__init__()
+        self.retry_after = retry_after
+
+
+class ServerBusy(ServiceUnavailable):
+    def __init__(self, retry_after):
+        super().__init__()
+        self.retry_after = retry_after
+
+
+class Rate:
+    """令牌桶参数：容量 capacity，每秒补充 per_second 个令牌"""
+
+    __slots__ = ('capacity', 'per_second')
+
+    def __init__(self, capacity, per_second):
+        self.capacity = capacity
+        self.per_second = per_second
+
+
+def parse_rate(value):
+    """解析 '10/minute'、'5/second burst 20' 这样的速率，off/none/空值表示不限制"""
+    if value is None or str(value).strip().lower() in ('', 'off', 'none'):
+        return None
+    match = RATE_PATTERN.match(str(value).lower())
+    if match is None:
+        raise ValueError(f'invalid rate limit: {value!r}')
+    count, period, burst = match.groups()
+    return Rate(int(burst or count), int(count) / PERIODS[period])
+
+
+class MemoryBackend:
+    """进程内令牌桶，多个 worker 各自计数；超过 max_keys 时丢弃最久未访问的桶"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at]
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate):
+        """取一个令牌，返回 (是否允许, 需要等待的秒数)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [rate.capacity, now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(rate.capacity, bucket[0] + (now - bucket[1]) * rate.per_second)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True, 0
+            return False, (1 - bucket[0]) / rate.per_second
+
+
+class RedisBackend:
+    """多进程/多实例共享的令牌桶，读取、补充和扣减在一个 Lua 脚本里原子完成"""
+
+    script = '''
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * per_second)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / per_second
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / per_second) + 1)
+return {allowed, tostring(wait)}
+'''
+
+    def __init__(self, url, prefix='huxiang:rate:'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._consume = self.client.register_script(self.script)
+
+    def consume(self, key, rate):
+        allowed, wait = self._consume(keys=[self.prefix + key], args=[rate.capacity, rate.per_second, time.time()])
+        return bool(allowed), float(wait)
+
+
+class RateLimiter:
+    """限流与准入控制
+
+    - 令牌桶限流：RATE_LIMITS 以端点名（auth.login）、蓝图名（auth）或自定义名称（search）为键，
+      按身份（带有效 JWT 时为用户 id，否则为客户端 IP）分别计数，超出后返回 429 和 Retry-After。
+      端点和蓝图的限额在 before_request 中检查，自定义名称通过 limit 装饰器挂到视图上。
+    - 准入控制：DB_CONCURRENCY_ENDPOINTS 中的接口在本进程内最多同时处理 DB_CONCURRENCY_LIMIT 个请求，
+      没有空位时等待 DB_CONCURRENCY_TIMEOUT 秒后直接返回 503，而不是在连接池上排队直到超时。
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self.enabled = True
+        self.rates = {}
+        self.backend = MemoryBackend()
+        self.db_endpoints = frozenset()
+        self.db_timeout = 0
+        self.db_retry_after = 1
+        self._slots = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RATE_LIMIT_ENABLED', True)
+        app.config.setdefault('RATE_LIMITS', {})
+        app.config.setdefault('RATE_LIMIT_STORAGE_URL', None)
+        app.config.setdefault('RATE_LIMIT_MAX_KEYS', 100000)
+        app.config.setdefault('DB_CONCURRENCY_LIMIT', 0)
+        app.config.setdefault('DB_CONCURRENCY_TIMEOUT', 0)
+        app.config.setdefault('DB_CONCURRENCY_RETRY_AFTER', 1)
+        app.config.setdefault('DB_CONCURRENCY_ENDPOINTS', ())
+        self._app = app
+        self.enabled = app.config['RATE_LIMIT_ENABLED']
+        self.rates = {name: parse_rate(value) for name, value in app.config['RATE_LIMITS'].items()}
+        self.rates = {name: rate for name, rate in self.rates.items() if rate is not None}
+        self.backend = MemoryBackend(app.config['RATE_LIMIT_MAX_KEYS'])
+
+        storage_url = app.config['RATE_LIMIT_STORAGE_URL']
+        if storage_url:
+            # redis 为可选依赖，只在配置了共享计数时才导入
+            try:
+                self.backend = RedisBackend(storage_url)
+            except ImportError:
+                app.logger.warning('RATE_LIMIT_STORAGE_URL is set but redis is not installed; using per-process limits')
+
+        limit = app.config['DB_CONCURRENCY_LIMIT']
+        self._slots = threading.BoundedSemaphore(limit) if limit > 0 else None
+        self.db_endpoints = frozenset(app.config['DB_CONCURRENCY_ENDPOINTS'])
+        self.db_timeout = app.config['DB_CONCURRENCY_TIMEOUT']
+        self.db_retry_after = app.config['DB_CONCURRENCY_RETRY_AFTER']
+
+        app.before_request(self.before_request)
+        app.teardown_request(self.teardown_request)
+        app.register_error_handler(RateLimitExceeded, self._rejected)
+        app.register_error_handler(ServerBusy, self._rejected)
+        app.extensions['rate_limiter'] = self
+
+    def identity(self):
+        """限流计数的主体：带有效 JWT 时为用户 id，否则为客户端 IP；同一请求内只解析一次"""
+        if 'rate_limit_identity' in g:
+            return g.rate_limit_identity
+        try:
+            verify_jwt_in_request(optional=True)
+            subject = get_jwt_identity()
+        except Exception:  # 过期或无效的 token 按匿名请求计数，由视图自己返回 401
+            subject = None
+        g.rate_limit_identity = f'user:{subject}' if subject is not None else f'ip:{request.remote_addr}'
+        return g.rate_limit_identity
+
+    def hit(self, name):
+        """按名称扣减当前身份的一个令牌，超出限额时抛出 RateLimitExceeded"""
+        rate = self.rates.get(name)
+        # 启动预热的内部请求都来自 127.0.0.1，不能占用本机客户端的限额
+        if not self.enabled or rate is None or request.environ.get(WARMUP_ENVIRON_KEY):
+            return
+        try:
+            allowed, wait = self.backend.consume(f'{name}:{self.identity()}', rate)
+        except Exception:
+            # 共享后端不可用时放行，限流不应成为新的故障点
+            rate_limit_errors.inc()
+            self._app.logger.warning('Rate limit backend unavailable', exc_info=True)
+            return
+        if not allowed:
+            rate_limit_rejections.inc(limit=name)
+            raise RateLimitExceeded(max(1, math.ceil(wait)))
+
+    def limit(self, name, when=None):
+        """视图装饰器：when 返回真时按 RATE_LIMITS[name] 限流，例如只限制带 search 参数的列表请求"""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if when is None or when():
+                    self.hit(name)
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def before_request(self):
+        endpoint = request.endpoint
+        if endpoint is None or request.method == 'OPTIONS':
+            return None
+        if request.blueprint:
+            self.hit(request.blueprint)
+        self.hit(endpoint)
+        if self._slots is not None and endpoint in self.db_endpoints:
+            self._admit(endpoint)
+        return None
+
+    def _admit(self, endpoint):
+        acquired = self._slots.acquire(timeout=self.db_timeout) if self.db_timeout > 0 else self._slots.acquire(False)
+        if not acquired:
+            db_admission_rejections.inc(endpoint=endpoint)
+            raise ServerBusy(self.db_retry_after)
+        g.db_admission = True
+        with self._lock:
+            self._in_flight += 1
+            db_admission_in_flight.set(self._in_flight)
+
+    def teardown_request(self, exc=None):
+        if g.pop('db_admission', False):
+            with self._lock:
+                self._in_flight -= 1
+                db_admission_in_flight.set(self._in_flight)
+            self._slots.release()
+
+    def _rejected(self, e):
+        if isinstance(e, RateLimitExceeded):
+            response = jsonify({'message': '请求过于频繁，请稍后重试'})
+        else:
+            response = jsonify({'message': '服务器繁忙，请稍后重试'})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, e.code
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,326 @@
+import functools
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import current_app, request
+
+from services.compression import compressor
+from services.counters import counter_buffer
+from services.metrics import metrics
+
+
+response_cache_requests = metrics.counter(
+    'response_cache_requests_total',
+    'Cached endpoint lookups by endpoint and result (hit, miss, not_modified).',
+    ('endpoint', 'result'),
+)
+
+
+class CachedResponse:
+    """缓存的响应体及其校验信息，encoded 保存按编码（br/gzip）压缩后的响应体
+
+    counters 记录响应体中资源的浏览量/点赞数：(field, id) -> (缓存时的值, 缓存时本进程的累计增量)，
+    pid 为写入缓存的进程，rendered_at 为计数最近一次写入响应体的时间；命中时据此补上之后新增的计数。
+    """
+
+    __slots__ = ('body', 'mimetype', 'etag', 'last_modified', 'encoded', 'counters', 'pid', 'rendered_at')
+
+    def __init__(self, body, mimetype, etag, last_modified, encoded=None, counters=None, pid=None,
+                 rendered_at=None):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.last_modified = last_modified
+        self.encoded = encoded if encoded is not None else {}
+        self.counters = counters if counters is not None else {}
+        self.pid = pid
+        self.rendered_at = rendered_at if rendered_at is not None else time.time()
+
+
+def _counted_items(payload):
+    """响应体中带计数字段的资源：data 为单个资源或资源列表"""
+    data = payload.get('data') if isinstance(payload, dict) else None
+    items = data if isinstance(data, list) else [data]
+    return [
+        item for item in items
+        if isinstance(item, dict) and 'id' in item and any(field in item for field in counter_buffer.FIELDS)
+    ]
+
+
+def counter_snapshot(payload):
+    """记录响应体中的计数及其对应的本进程累计增量"""
+    counters = {}
+    for item in _counted_items(payload):
+        for field in counter_buffer.FIELDS:
+            if field in item:
+                counters[(field, item['id'])] = (item[field], counter_buffer.total(field, item['id']))
+    return counters
+
+
+def fresh_counts(entry):
+    """条目缓存之后计数有变化的资源：(field, id) -> 当前值
+
+    同一进程写入的条目按累计增量的差值补齐；共享层中其他进程写入的条目只能补上本进程尚未落库的增量，
+    其他进程已落库的增量在条目过期后体现。
+    """
+    same_process = entry.pid == os.getpid()
+    current = {}
+    for key, (value, total) in entry.counters.items():
+        delta = counter_buffer.total(*key) - total if same_process else counter_buffer.pending(*key)
+        if delta:
+            current[key] = (value or 0) + delta
+    return current
+
+
+class MemoryTier:
+    """进程内 LRU + TTL 缓存"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def replace(self, key, value):
+        """替换仍在缓存中的条目，保留原有的过期时间"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                self._entries[key] = (value, item[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisTier:
+    """多进程/多实例共享的 Redis 缓存层，同时保存目录版本号"""
+
+    version_key = 'huxiang:catalog_version'
+
+    def __init__(self, url, prefix='huxiang:response:'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=max(int(ttl), 1))
+
+    def get_version(self):
+        raw = self.client.hmget(self.version_key, 'version', 'modified')
+        if raw[0] is None:
+            return None
+        return int(raw[0]), float(raw[1])
+
+    def bump_version(self, modified):
+        pipe = self.client.pipeline()
+        pipe.hincrby(self.version_key, 'version', 1)
+        pipe.hset(self.version_key, 'modified', modified)
+        version, _ = pipe.execute()
+        return version
+
+
+class ResponseCache:
+    """GET 接口的响应缓存
+
+    缓存键由端点、路径参数、规范化后的查询参数以及目录版本号组成；
+    create_resource 等写接口调用 bump_version 后旧键自然失效。
+    响应附带 ETag / Last-Modified，命中条件请求时返回 304。
+    """
+
+    def __init__(self, app=None):
+        self.memory = MemoryTier()
+        self.shared = None
+        self.enabled = True
+        self.ttl = 30
+        self.max_age = 0
+        self.counter_refresh = 5
+        self._version = 0
+        self._modified = time.time()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('RESPONSE_CACHE_ENABLED', True)
+        app.config.setdefault('RESPONSE_CACHE_TTL', 30)
+        app.config.setdefault('RESPONSE_CACHE_MAX_ENTRIES', 512)
+        app.config.setdefault('RESPONSE_CACHE_MAX_AGE', 0)
+        app.config.setdefault('RESPONSE_CACHE_REDIS_URL', None)
+        app.config.setdefault('RESPONSE_CACHE_COUNTER_REFRESH', 5)
+        self.enabled = app.config['RESPONSE_CACHE_ENABLED']
+        self.ttl = app.config['RESPONSE_CACHE_TTL']
+        self.max_age = app.config['RESPONSE_CACHE_MAX_AGE']
+        self.counter_refresh = app.config['RESPONSE_CACHE_COUNTER_REFRESH']
+        self.memory.max_entries = app.config['RESPONSE_CACHE_MAX_ENTRIES']
+
+        redis_url = app.config['RESPONSE_CACHE_REDIS_URL']
+        if redis_url:
+            # redis 为可选依赖，只在配置了共享缓存时才导入
+            try:
+                self.shared = RedisTier(redis_url)
+            except ImportError:
+                app.logger.warning('RESPONSE_CACHE_REDIS_URL is set but redis is not installed; using memory cache only')
+        app.extensions['response_cache'] = self
+
+    def catalog_version(self):
+        """返回 (版本号, 最后修改时间戳)，配置了共享层时以共享层为准"""
+        if self.shared is not None:
+            try:
+                shared = self.shared.get_version()
+                if shared is not None:
+                    return shared
+            except Exception:
+                current_app.logger.warning('Failed to read shared catalog version', exc_info=True)
+        return self._version, self._modified
+
+    def bump_version(self):
+        """目录发生写入后调用，使所有已缓存的响应失效"""
+        self._modified = time.time()
+        self._version += 1
+        self.memory.clear()
+        if self.shared is not None:
+            try:
+                self.shared.bump_version(self._modified)
+            except Exception:
+                current_app.logger.warning('Failed to bump shared catalog version', exc_info=True)
+
+    def make_key(self, version):
+        # 空值同样是有意义的参数，例如 cursor= 表示游标分页的第一页，不能与不带该参数的请求共用缓存
+        args = sorted(request.args.items(multi=True))
+        view_args = sorted((request.view_args or {}).items())
+        raw = repr((request.endpoint, view_args, args, version))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _get(self, key):
+        entry = self.memory.get(key)
+        if entry is None and self.shared is not None:
+            try:
+                entry = self.shared.get(key)
+            except Exception:
+                current_app.logger.warning('Failed to read shared response cache', exc_info=True)
+            if entry is not None:
+                self.memory.set(key, entry, self.ttl)
+        return entry
+
+    def _set(self, key, entry):
+        self.memory.set(key, entry, self.ttl)
+        self._set_shared(key, entry)
+
+    def _set_shared(self, key, entry):
+        if self.shared is not None:
+            try:
+                self.shared.set(key, entry, self.ttl)
+            except Exception:
+                current_app.logger.warning('Failed to write shared response cache', exc_info=True)
+
+    def _build_response(self, entry):
+        response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+        # 同一资源在不同进程里计数可能略有差异，使用弱校验
+        response.set_etag(entry.etag, weak=True)
+        response.last_modified = entry.last_modified
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        response.cache_control.must_revalidate = True
+        return response
+
+    def _with_fresh_counters(self, key, entry):
+        """补齐缓存之后新增的计数
+
+        重新解析、序列化响应体与未缓存时的开销相当，因此每个条目最多每 counter_refresh 秒补一次，
+        补好的条目替换进程内缓存（保留原过期时间），在此期间的命中直接复用，计数最多滞后这么久。
+        新条目的 ETag 与 Last-Modified 随之变化，条件请求不会以 304 返回过期的计数。
+        """
+        now = time.time()
+        if self.counter_refresh < 0 or now - entry.rendered_at < self.counter_refresh:
+            return entry
+        current = fresh_counts(entry)
+        if not current:
+            return entry
+        payload = current_app.json.loads(entry.body)
+        for item in _counted_items(payload):
+            for field in counter_buffer.FIELDS:
+                if (field, item['id']) in current:
+                    item[field] = current[(field, item['id'])]
+        body = current_app.json.dumps(payload).encode('utf-8')
+        refreshed = CachedResponse(
+            body, entry.mimetype, hashlib.sha1(body).hexdigest(),
+            max(entry.last_modified, datetime.fromtimestamp(int(now), tz=timezone.utc)),
+            counters=counter_snapshot(payload), pid=os.getpid(), rendered_at=now,
+        )
+        # 只替换进程内缓存：计数快照按本进程的累计增量记录，不写回共享层
+        self.memory.replace(key, refreshed)
+        return refreshed
+
+    def cached(self, view):
+        """缓存 200 响应的装饰器，仅作用于 GET 请求"""
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or request.method != 'GET':
+                return view(*args, **kwargs)
+
+            version, modified = self.catalog_version()
+            key = self.make_key(version)
+            entry = self._get(key)
+            result = 'hit'
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                entry = CachedResponse(
+                    body=body,
+                    mimetype=response.mimetype,
+                    etag=hashlib.sha1(body).hexdigest(),
+                    last_modified=datetime.fromtimestamp(int(modified), tz=timezone.utc),
+                    # 浏览量/点赞数变化不递增目录版本，记下缓存时的计数，命中时补上之后的增量
+                    counters=counter_snapshot(current_app.json.loads(body)) if response.is_json else None,
+                    pid=os.getpid(),
+                )
+                result = 'miss'
+
+            served = self._with_fresh_counters(key, entry)
+            response = self._build_response(served).make_conditional(request)
+            if response.status_code == 304:
+                result = 'not_modified'
+            elif compressor.apply_cached(response, served) and result == 'hit' and served is entry:
+                # 命中的条目新增了压缩版本，写回共享层供其他进程复用
+                self._set_shared(key, entry)
+            if result == 'miss':
+                self._set(key, entry)
+            response.headers['X-Cache'] = 'HIT' if result != 'miss' else 'MISS'
+            response_cache_requests.inc(endpoint=request.endpoint, result=result)
+            return response
+
+        return wrapper
+
+
+response_cache = ResponseCache()
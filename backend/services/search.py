@@ -0,0 +1,386 @@
+import functools
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import select, text
+
+
+# 标题、描述、正文的相关度权重
+FIELD_WEIGHTS = (('title', 3.0), ('description', 2.0), ('content', 1.0))
+
+_CJK_RANGES = '㐀-䶿一-鿿豈-﫿'
+# 内存索引按 updated_at 增量刷新时向前多查的时间，覆盖各进程时钟偏差和提交晚于 updated_at 的事务
+INCREMENTAL_LOOKBACK = timedelta(seconds=5)
+
+
+@functools.lru_cache(maxsize=None)
+def _patterns():
+    # 含大段 CJK 区间的正则编译约 10ms，推迟到第一次分词时进行，不计入应用启动时间
+    return re.compile(f'[{_CJK_RANGES}]+|[a-z0-9]+'), re.compile(f'[{_CJK_RANGES}]')
+
+
+def tokenize(value, unigrams=False):
+    """分词：中文按二元组（bigram）切分，字母数字按单词切分并转小写
+
+    建索引时传 unigrams=True 额外写入单字，使单字查询也能命中。
+    """
+    if not value:
+        return []
+    token_re, cjk_re = _patterns()
+    tokens = []
+    for match in token_re.finditer(value.lower()):
+        word = match.group()
+        if len(word) > 1 and cjk_re.match(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            if unigrams:
+                tokens.extend(word)
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class SearchBackend:
+    """搜索后端基类，search 返回按相关度降序排列的 (id, score) 列表"""
+
+    name = 'base'
+
+    def ensure_schema(self, session):
+        pass
+
+    def index_resource(self, session, resource):
+        pass
+
+    def index_resources(self, session, resources):
+        for resource in resources:
+            self.index_resource(session, resource)
+
+    def search(self, session, query, limit):
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """兼容旧行为的 LIKE '%…%' 回退实现，不做相关度排序"""
+
+    name = 'like'
+
+    def search(self, session, query, limit):
+        from models.cultural_resource import CulturalResource
+
+        rows = session.query(CulturalResource.id).filter(
+            CulturalResource.title.contains(query) |
+            CulturalResource.description.contains(query)
+        ).order_by(CulturalResource.id.desc()).limit(limit).all()
+        return [(row.id, 0.0) for row in rows]
+
+
+class MemorySearchBackend(SearchBackend):
+    """进程内倒排索引，BM25 排序，适合本地开发与测试
+
+    首次查询时从数据库全量构建，之后每 refresh_interval 秒按 updated_at 高水位（以及比已知最大 id
+    更新、没有 updated_at 的行）补齐其他进程新增或修改的资源，并比对 id 集合移除已删除的资源。
+    """
+
+    name = 'memory'
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)  # token -> {id: 加权词频}
+        self._doc_lengths = {}
+        self._doc_tokens = {}  # id -> 该文档出现过的词元，更新时只清理这些倒排项
+        self._total_length = 0.0
+        self._max_id = 0
+        self._high_water = None  # 已索引行的最大 updated_at
+        self._refreshed_at = None
+
+    def _add(self, id, fields):
+        weights = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(fields.get(field), unigrams=True):
+                weights[token] += weight
+        with self._lock:
+            if id in self._doc_lengths:
+                self._remove(id)
+            for token, tf in weights.items():
+                self._postings[token][id] = tf
+            length = sum(weights.values())
+            self._doc_lengths[id] = length
+            self._doc_tokens[id] = tuple(weights)
+            self._total_length += length
+            self._max_id = max(self._max_id, id)
+
+    def _remove(self, id):
+        for token in self._doc_tokens.pop(id, ()):
+            postings = self._postings[token]
+            postings.pop(id, None)
+            if not postings:
+                del self._postings[token]
+        self._total_length -= self._doc_lengths.pop(id, 0.0)
+
+    def _refresh(self, session):
+        from models.cultural_resource import CulturalResource
+
+        now = time.monotonic()
+        if self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._lock:
+            query = session.query(
+                CulturalResource.id,
+                CulturalResource.title,
+                CulturalResource.description,
+                CulturalResource.content,
+                CulturalResource.updated_at,
+            )
+            if self._refreshed_at is not None:
+                changed = CulturalResource.id > self._max_id
+                if self._high_water is not None:
+                    changed |= CulturalResource.updated_at >= self._high_water - INCREMENTAL_LOOKBACK
+                query = query.filter(changed)
+            for row in query.order_by(CulturalResource.id).all():
+                self._add(row.id, row._mapping)
+                if row.updated_at is not None and (self._high_water is None or row.updated_at > self._high_water):
+                    self._high_water = row.updated_at
+            if self._refreshed_at is not None:
+                # 删除不会留下 updated_at，只能比对 id 集合
+                existing = set(session.scalars(select(CulturalResource.id)))
+                for id in self._doc_lengths.keys() - existing:
+                    self._remove(id)
+            self._refreshed_at = now
+
+    def index_resource(self, session, resource):
+        # 索引尚未构建时交给首次查询全量加载，避免 _max_id 跳过旧数据
+        if self._refreshed_at is None:
+            return
+        self._add(resource.id, {
+            'title': resource.title,
+            'description': resource.description,
+            'content': resource.content,
+        })
+
+    def search(self, session, query, limit):
+        self._refresh(session)
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+
+        with self._lock:
+            postings = [self._postings.get(token, {}) for token in tokens]
+            if not all(postings):
+                return []
+            # 所有词元都命中才算匹配，与原先的子串匹配语义一致
+            postings.sort(key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+            doc_count = len(self._doc_lengths)
+            avg_length = self._total_length / doc_count if doc_count else 1.0
+
+            scores = []
+            for id in candidates:
+                length = self._doc_lengths[id]
+                score = 0.0
+                for token_postings in postings:
+                    tf = token_postings[id]
+                    idf = math.log(1 + (doc_count - len(token_postings) + 0.5) / (len(token_postings) + 0.5))
+                    score += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+                scores.append((id, score))
+
+        scores.sort(key=lambda item: (-item[1], -item[0]))
+        return scores[:limit]
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """SQLite FTS5 虚拟表，写入预先切分好的词元，使用 bm25() 排序"""
+
+    name = 'sqlite'
+    table = 'cultural_resources_fts'
+
+    def __init__(self):
+        self._ready = False
+
+    @staticmethod
+    def _segment(value):
+        return ' '.join(tokenize(value, unigrams=True))
+
+    def ensure_schema(self, session):
+        session.execute(text(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+            f"USING fts5(title, description, content, tokenize='unicode61')"
+        ))
+        indexed = session.execute(text(f'SELECT COUNT(*) FROM {self.table}')).scalar()
+        if not indexed:
+            from models.cultural_resource import CulturalResource
+
+            rows = session.query(
+                CulturalResource.id,
+                CulturalResource.title,
+                CulturalResource.description,
+                CulturalResource.content,
+            ).all()
+            for row in rows:
+                self._upsert(session, row.id, row.title, row.description, row.content)
+        session.commit()
+        self._ready = True
+
+    def _upsert(self, session, id, title, description, content):
+        session.execute(text(f'DELETE FROM {self.table} WHERE rowid = :id'), {'id': id})
+        session.execute(
+            text(f'INSERT INTO {self.table} (rowid, title, description, content) '
+                 'VALUES (:id, :title, :description, :content)'),
+            {
+                'id': id,
+                'title': self._segment(title),
+                'description': self._segment(description),
+                'content': self._segment(content),
+            }
+        )
+
+    def index_resource(self, session, resource):
+        self.index_resources(session, [resource])
+
+    def index_resources(self, session, resources):
+        if not self._ready:
+            self.ensure_schema(session)
+        for resource in resources:
+            self._upsert(session, resource.id, resource.title, resource.description, resource.content)
+        session.commit()
+
+    def search(self, session, query, limit):
+        tokens = dict.fromkeys(tokenize(query))
+        if not tokens:
+            return []
+        if not self._ready:
+            self.ensure_schema(session)
+        match = ' AND '.join(f'"{token}"' for token in tokens)
+        weights = ', '.join(str(weight) for _, weight in FIELD_WEIGHTS)
+        rows = session.execute(
+            text(f'SELECT rowid, bm25({self.table}, {weights}) AS rank FROM {self.table} '
+                 f'WHERE {self.table} MATCH :match ORDER BY rank, rowid DESC LIMIT :limit'),
+            {'match': match, 'limit': limit}
+        ).all()
+        # bm25() 越小越相关，取反后与其他后端保持 "分数越大越相关"
+        return [(row[0], -row[1]) for row in rows]
+
+
+class MySQLFulltextBackend(SearchBackend):
+    """MySQL InnoDB FULLTEXT 索引 + ngram 分词器，索引由 InnoDB 随写入自动维护"""
+
+    name = 'mysql'
+    index_name = 'ft_cultural_resources_text'
+    match_expr = 'MATCH(title, description, content)'
+
+    def __init__(self):
+        self._has_index = None
+        self._fallback = LikeSearchBackend()
+
+    def _index_exists(self, session):
+        return bool(session.execute(text(
+            'SELECT COUNT(*) FROM information_schema.statistics '
+            'WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index'
+        ), {'table': 'cultural_resources', 'index': self.index_name}).scalar())
+
+    def ensure_schema(self, session):
+        if not self._index_exists(session):
+            session.execute(text(
+                f'ALTER TABLE cultural_resources ADD FULLTEXT INDEX {self.index_name} '
+                '(title, description, content) WITH PARSER ngram'
+            ))
+        session.commit()
+        self._has_index = True
+
+    def search(self, session, query, limit):
+        if self._has_index is None:
+            self._has_index = self._index_exists(session)
+            if not self._has_index:
+                current_app.logger.warning(
+                    'FULLTEXT index %s is missing, falling back to LIKE search; run init_db.py to create it',
+                    self.index_name
+                )
+        if not self._has_index:
+            return self._fallback.search(session, query, limit)
+
+        terms = [term for term in re.split(r'\s+', re.sub(r'[+\-<>()~*"@]', ' ', query)) if term]
+        if not terms:
+            return []
+        boolean_query = ' '.join(f'+"{term}"' for term in terms)
+        rows = session.execute(
+            text(f'SELECT id, {self.match_expr} AGAINST (:query) AS score FROM cultural_resources '
+                 f'WHERE {self.match_expr} AGAINST (:boolean_query IN BOOLEAN MODE) '
+                 'ORDER BY score DESC, id DESC LIMIT :limit'),
+            {'query': ' '.join(terms), 'boolean_query': boolean_query, 'limit': limit}
+        ).all()
+        return [(row[0], float(row[1])) for row in rows]
+
+
+class SearchIndex:
+    """按配置选择搜索后端：SEARCH_BACKEND = auto | mysql | sqlite | memory | like"""
+
+    def __init__(self, app=None):
+        self._backends = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SEARCH_BACKEND', 'auto')
+        app.config.setdefault('SEARCH_MAX_RESULTS', 1000)
+        app.config.setdefault('SEARCH_MEMORY_REFRESH_INTERVAL', 30)
+        # 后端按 id(app) 缓存，新应用可能复用已回收应用的 id
+        self._backends.pop(id(app), None)
+        app.extensions['search_index'] = self
+
+    def _create_backend(self, app, session):
+        name = app.config['SEARCH_BACKEND']
+        if name == 'auto':
+            dialect = session.get_bind().dialect.name
+            if dialect == 'mysql':
+                name = 'mysql'
+            elif dialect == 'sqlite' and self._sqlite_has_fts5(session):
+                name = 'sqlite'
+            else:
+                name = 'memory'
+
+        if name == 'mysql':
+            return MySQLFulltextBackend()
+        if name == 'sqlite':
+            return SQLiteFTS5Backend()
+        if name == 'like':
+            return LikeSearchBackend()
+        return MemorySearchBackend(app.config['SEARCH_MEMORY_REFRESH_INTERVAL'])
+
+    @staticmethod
+    def _sqlite_has_fts5(session):
+        options = session.execute(text('PRAGMA compile_options')).scalars().all()
+        return 'ENABLE_FTS5' in options
+
+    def backend(self, session=None):
+        app = current_app._get_current_object()
+        session = session or app.db.session
+        key = id(app)
+        if key not in self._backends:
+            self._backends[key] = self._create_backend(app, session)
+        return self._backends[key]
+
+    def ensure_schema(self):
+        session = current_app.db.session
+        self.backend(session).ensure_schema(session)
+
+    def index_resource(self, resource):
+        session = current_app.db.session
+        self.backend(session).index_resource(session, resource)
+
+    def index_resources(self, resources):
+        session = current_app.db.session
+        self.backend(session).index_resources(session, resources)
+
+    def search(self, query, limit=None):
+        session = current_app.db.session
+        limit = limit or current_app.config['SEARCH_MAX_RESULTS']
+        return self.backend(session).search(session, query.strip(), limit)
+
+
+search_index = SearchIndex()
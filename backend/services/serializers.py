@@ -0,0 +1,87 @@
+from models.cultural_resource import CulturalResource
+from services.counters import counter_buffer
+
+
+# 列表页只查询需要返回的列（priority 用于游标），不加载 content/source/media_url 等大字段
+LIST_COLUMNS = (
+    CulturalResource.id,
+    CulturalResource.title,
+    CulturalResource.description,
+    CulturalResource.type,
+    CulturalResource.category,
+    CulturalResource.tags,
+    CulturalResource.author,
+    CulturalResource.cover_image,
+    CulturalResource.view_count,
+    CulturalResource.like_count,
+    CulturalResource.priority,
+    CulturalResource.created_at,
+)
+# 详情所需的列，用于按 id 批量读取完整资源
+DETAIL_COLUMNS = LIST_COLUMNS + (
+    CulturalResource.content,
+    CulturalResource.source,
+    CulturalResource.media_url,
+    CulturalResource.updated_at,
+)
+
+
+# 这里的函数只做属性读取，既可接收 ORM 实体，也可接收 query(*columns) 返回的轻量 Row
+
+
+def split_tags(tags):
+    return tags.split(',') if tags else []
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def resource_summary(r):
+    """列表页使用的资源摘要，计数合并尚未落库的增量"""
+    return {
+        'id': r.id,
+        'title': r.title,
+        'description': r.description,
+        'type': r.type,
+        'category': r.category,
+        'tags': split_tags(r.tags),
+        'author': r.author,
+        'cover_image': r.cover_image,
+        'view_count': counter_buffer.merge('view_count', r.id, r.view_count),
+        'like_count': counter_buffer.merge('like_count', r.id, r.like_count),
+        'created_at': isoformat(r.created_at),
+    }
+
+
+def resource_detail(r):
+    """详情页使用的完整资源"""
+    data = resource_summary(r)
+    data.update({
+        'content': r.content,
+        'source': r.source,
+        'media_url': r.media_url,
+        'updated_at': isoformat(r.updated_at),
+    })
+    return data
+
+
+def user_summary(user):
+    """注册、登录响应中的用户信息"""
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'role': user.role,
+        'avatar': user.avatar,
+    }
+
+
+def user_profile(user):
+    """个人资料页的用户信息"""
+    data = user_summary(user)
+    data.update({
+        'bio': user.bio,
+        'created_at': isoformat(user.created_at),
+    })
+    return data
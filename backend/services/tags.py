@@ -0,0 +1,150 @@
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models.cultural_resource import CulturalResource
+from models.tag import Tag, resource_tags
+
+
+TAG_MODES = ('all', 'any')
+
+
+def normalize_tags(values):
+    """接收列表或逗号分隔字符串，去除空白与重复，保持原有顺序"""
+    if not values:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    names = []
+    for value in values:
+        for name in str(value).split(','):
+            name = name.strip()[:50]
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def _get_or_create_tag_ids(session, names):
+    existing = dict(session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+    for name in names:
+        if name in existing:
+            continue
+        try:
+            # 并发创建同名标签时依赖唯一约束，只回滚这一条
+            with session.begin_nested():
+                session.execute(insert(Tag).values(name=name, resource_count=0))
+        except IntegrityError:
+            pass
+        existing[name] = session.execute(select(Tag.id).where(Tag.name == name)).scalar_one()
+    return [existing[name] for name in names]
+
+
+def sync_resource_tags(session, resource_id, names):
+    """把资源的标签写入关联表并更新标签计数，调用方负责提交事务"""
+    current = set(session.execute(
+        select(resource_tags.c.tag_id).where(resource_tags.c.resource_id == resource_id)
+    ).scalars())
+    wanted = set(_get_or_create_tag_ids(session, names)) if names else set()
+
+    added = wanted - current
+    removed = current - wanted
+    if added:
+        session.execute(insert(resource_tags), [
+            {'resource_id': resource_id, 'tag_id': tag_id} for tag_id in added
+        ])
+        session.execute(
+            update(Tag).where(Tag.id.in_(added)).values(resource_count=Tag.resource_count + 1)
+        )
+    if removed:
+        session.execute(resource_tags.delete().where(
+            resource_tags.c.resource_id == resource_id,
+            resource_tags.c.tag_id.in_(removed),
+        ))
+        session.execute(
+            update(Tag).where(Tag.id.in_(removed)).values(resource_count=Tag.resource_count - 1)
+        )
+
+
+def attach_tags_bulk(session, tags_by_resource):
+    """为一批新建资源写入标签关联，所有标签一次查询/创建，关联行一次批量插入"""
+    names = []
+    for resource_names in tags_by_resource.values():
+        names.extend(name for name in resource_names if name not in names)
+    if not names:
+        return
+
+    tag_ids = dict(zip(names, _get_or_create_tag_ids(session, names)))
+    links = [
+        {'resource_id': resource_id, 'tag_id': tag_ids[name]}
+        for resource_id, resource_names in tags_by_resource.items()
+        for name in resource_names
+    ]
+    session.execute(insert(resource_tags), links)
+
+    deltas = {}
+    for link in links:
+        deltas[link['tag_id']] = deltas.get(link['tag_id'], 0) + 1
+    table = Tag.__table__
+    session.execute(
+        update(table).where(table.c.id == bindparam('tag_id')).values(
+            resource_count=table.c.resource_count + bindparam('delta')
+        ),
+        [{'tag_id': tag_id, 'delta': delta} for tag_id, delta in deltas.items()]
+    )
+
+
+def filter_by_tags(query, names, mode='all'):
+    """按标签过滤：all 要求包含全部标签（AND），any 包含任一标签即可（OR）"""
+    matching = (
+        select(resource_tags.c.resource_id)
+        .join(Tag, Tag.id == resource_tags.c.tag_id)
+        .where(Tag.name.in_(names))
+    )
+    if mode == 'all' and len(names) > 1:
+        matching = matching.group_by(resource_tags.c.resource_id).having(
+            func.count(resource_tags.c.tag_id) == len(names)
+        )
+    return query.filter(CulturalResource.id.in_(matching))
+
+
+def tag_cloud(session, limit=50):
+    """按资源数降序返回标签，直接读取预先计算的 resource_count"""
+    rows = session.execute(
+        select(Tag.name, Tag.resource_count)
+        .where(Tag.resource_count > 0)
+        .order_by(Tag.resource_count.desc(), Tag.name)
+        .limit(limit)
+    ).all()
+    return [{'name': name, 'count': count} for name, count in rows]
+
+
+def backfill_tags(session, batch_size=500):
+    """把旧数据中逗号拼接的 tags 字段迁移到关联表，可重复执行
+
+    按 id 分批处理并逐批提交，最后根据关联表重新计算所有标签的资源数。
+    """
+    last_id = 0
+    migrated = 0
+    while True:
+        rows = session.execute(
+            select(CulturalResource.id, CulturalResource.tags)
+            .where(CulturalResource.id > last_id)
+            .order_by(CulturalResource.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        for resource_id, tags in rows:
+            sync_resource_tags(session, resource_id, normalize_tags(tags))
+        session.commit()
+        migrated += len(rows)
+        last_id = rows[-1][0]
+
+    counts = (
+        select(func.count())
+        .select_from(resource_tags)
+        .where(resource_tags.c.tag_id == Tag.id)
+        .scalar_subquery()
+    )
+    session.execute(update(Tag).values(resource_count=counts))
+    session.commit()
+    return migrated
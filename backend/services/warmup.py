@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
+from sqlalchemy import func, text
+
+from services.metrics import metrics
+
+
+warmup_duration = metrics.histogram(
+    'warmup_seconds',
+    'Time from the start of the warmup stage until the process reported ready.',
+)
+warmup_requests = metrics.counter(
+    'warmup_requests_total',
+    'Internal requests issued by the warmup stage by result (ok, error).',
+    ('result',),
+)
+
+# 预热请求在 WSGI environ 中带上该标记，资源详情不计入浏览量；客户端无法通过请求头伪造
+WARMUP_ENVIRON_KEY = 'huxiang.warmup'
+
+
+class Warmup:
+    """启动预热与就绪状态
+
+    create_app 结束时（gunicorn preload 部署则在每个 worker fork 之后）在后台线程中：
+
+    1. 为每个数据库引擎同时借出 WARMUP_POOL_CONNECTIONS 个连接再归还，连接池里留下已建立的连接；
+       数据库不可用时每 WARMUP_RETRY_INTERVAL 秒重试，期间 /ready 一直返回 503
+    2. 以内部请求访问资源列表前 WARMUP_PAGES 页（全部资源以及资源最多的 WARMUP_CATEGORIES 个分类）、
+       标签云和排行，填充响应缓存、总数缓存、排行与目录快照；再渲染这些首页资源的详情
+    3. 标记就绪，/ready 返回 200
+
+    缓存预热失败只记录日志，不影响就绪：冷缓存只是慢，仍然能正确响应。
+    """
+
+    def __init__(self, app=None):
+        self._app = None
+        self._lock = threading.Lock()
+        self._pid = None
+        self._state = 'pending'
+        self._started = None
+        self._duration = None
+        self._warmed = 0
+        self.enabled = True
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('WARMUP_ENABLED', True)
+        app.config.setdefault('WARMUP_AFTER_FORK', False)
+        app.config.setdefault('WARMUP_POOL_CONNECTIONS', 4)
+        app.config.setdefault('WARMUP_CATEGORIES', 3)
+        app.config.setdefault('WARMUP_PAGES', 2)
+        app.config.setdefault('WARMUP_RETRY_INTERVAL', 2)
+        self._app = app
+        self.enabled = app.config['WARMUP_ENABLED']
+        # 新配置的应用需要重新预热
+        with self._lock:
+            self._pid = None
+            self._state = 'pending'
+        app.extensions['warmup'] = self
+
+    @property
+    def ready(self):
+        # fork 出的子进程继承了主进程的状态，必须在本进程内完成预热才算就绪
+        return not self.enabled or (self._state == 'ready' and self._pid == os.getpid())
+
+    def status(self):
+        if not self.enabled:
+            return {'state': 'disabled'}
+        if not self.ready:
+            return {'state': self._state if self._pid == os.getpid() else 'pending'}
+        return {'state': 'ready', 'duration_ms': round(self._duration * 1000, 1), 'warmed_requests': self._warmed}
+
+    def start(self, wait=False):
+        """在后台线程中预热本进程；wait=True 时在当前线程完成"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._state in ('running', 'ready'):
+                return
+            self._pid = os.getpid()
+            self._state = 'running'
+            self._started = time.perf_counter()
+        if wait:
+            self._run()
+        else:
+            threading.Thread(target=self._run, name='warmup', daemon=True).start()
+
+    def _run(self):
+        app = self._app
+        while not self._open_pools():
+            time.sleep(app.config['WARMUP_RETRY_INTERVAL'])
+        try:
+            self._warmed = self._prime_caches()
+        except Exception:
+            app.logger.warning('Cache warmup failed; serving with cold caches', exc_info=True)
+        self._duration = time.perf_counter() - self._started
+        warmup_duration.observe(self._duration)
+        self._state = 'ready'
+        app.logger.info('Warmup finished in %.0f ms (%d requests)', self._duration * 1000, self._warmed)
+
+    def _open_pools(self):
+        app = self._app
+        wanted = app.config['WARMUP_POOL_CONNECTIONS']
+        try:
+            with app.app_context():
+                for engine in app.extensions['sqlalchemy'].engines.values():
+                    # 同时持有多个连接才能让连接池真正建立多条连接，逐个借还只会复用同一条
+                    size = getattr(engine.pool, 'size', lambda: wanted)()
+                    connections = []
+                    try:
+                        for _ in range(max(1, min(wanted, size))):
+                            connection = engine.connect()
+                            connections.append(connection)
+                            connection.execute(text('SELECT 1'))
+                    finally:
+                        for connection in connections:
+                            connection.close()
+            return True
+        except Exception:
+            app.logger.warning('Warmup could not open database connections; retrying', exc_info=True)
+            return False
+
+    def _list_paths(self):
+        """返回 [(列表地址, 是否第一页)]：全部资源与资源最多的几个分类，各取前 WARMUP_PAGES 页"""
+        from models.cultural_resource import CulturalResource
+
+        app = self._app
+        with app.app_context():
+            categories = [category for (category,) in app.db.session.query(CulturalResource.category)
+                          .filter(CulturalResource.category.isnot(None))
+                          .group_by(CulturalResource.category)
+                          .order_by(func.count(CulturalResource.id).desc())
+                          .limit(app.config['WARMUP_CATEGORIES'])]
+
+        paths = []
+        for category in [None, *categories]:
+            for page in range(1, app.config['WARMUP_PAGES'] + 1):
+                # 与前端的请求保持一致：第一页不带 page 参数，响应缓存按完整查询串区分
+                params = {'category': category} if category is not None else {}
+                if page > 1:
+                    params['page'] = page
+                paths.append(('/api/resources/' + (f'?{urlencode(params)}' if params else ''), page == 1))
+        return paths
+
+    def _prime_caches(self):
+        client = self._app.test_client()
+        warmed = 0
+        detail_ids = []
+
+        def get(path):
+            nonlocal warmed
+            response = client.get(path, environ_base={WARMUP_ENVIRON_KEY: True})
+            warmup_requests.inc(result='ok' if response.status_code == 200 else 'error')
+            warmed += 1
+            return response
+
+        for path in ('/api/resources/tags', '/api/resources/popular', '/api/resources/trending'):
+            get(path)
+        for path, first_page in self._list_paths():
+            response = get(path)
+            # 列表第一页上的资源最可能被点开，预先渲染它们的详情
+            if first_page and response.status_code == 200:
+                detail_ids.extend(item['id'] for item in response.get_json()['data'])
+        for id in dict.fromkeys(detail_ids):
+            get(f'/api/resources/{id}')
+        return warmed
+
+
+warmup = Warmup()
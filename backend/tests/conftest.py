@@ -0,0 +1,39 @@
+import pytest
+
+from app import create_app, db
+from config import Config
+
+
+@pytest.fixture
+def config(tmp_path):
+    """使用临时 SQLite 文件的配置；不预热、不启动后台落库、不缓存响应，密码哈希在请求线程内以低成本计算"""
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "test.db"}'
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        SQLALCHEMY_BINDS = {}
+        DB_REPLICA_BINDS = []
+        JWT_SECRET_KEY = 'test-secret-key-with-enough-length'
+        PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+        PASSWORD_HASH_WORKERS = 0
+        WARMUP_ENABLED = False
+        COUNTER_FLUSH_INTERVAL = 3600
+        COUNTER_FLUSH_THRESHOLD = 10 ** 9
+        RATE_LIMITS = {}
+        # 响应缓存是进程级单例，开启时前一个测试缓存的响应会被后面的测试读到
+        RESPONSE_CACHE_ENABLED = False
+        AVATAR_UPLOAD_PATH = str(tmp_path / 'uploads')
+        MEDIA_ROOT = str(tmp_path / 'media')
+
+    return TestConfig
+
+
+@pytest.fixture
+def app(config):
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
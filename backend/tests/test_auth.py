@@ -0,0 +1,120 @@
+import os
+import threading
+
+import pytest
+from sqlalchemy import event
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+from app import db
+from models.user import User
+from services.passwords import PasswordHashBusy, PasswordHasher, canonical_method, password_hasher
+
+
+def add_user(username, email, password='secret123', password_hash=None):
+    user = User(username=username, email=email)
+    if password_hash is None:
+        user.set_password(password)
+    else:
+        user.password_hash = password_hash
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def login(app, identifier, password='secret123'):
+    return app.test_client().post('/api/auth/login', json={'username': identifier, 'password': password})
+
+
+@pytest.mark.parametrize('method, expected', [
+    ('pbkdf2', f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'),
+    ('pbkdf2:sha512', f'pbkdf2:sha512:{DEFAULT_PBKDF2_ITERATIONS}'),
+    ('scrypt:65536', 'scrypt:65536:8:1'),
+    ('pbkdf2:sha256:1000', 'pbkdf2:sha256:1000'),
+])
+def test_canonical_method_fills_in_defaults(method, expected):
+    assert canonical_method(method) == expected
+    if method.startswith('pbkdf2'):
+        # 补全结果与 werkzeug 写进哈希串的前缀一致（scrypt 简写要 werkzeug 3 才支持）
+        assert generate_password_hash('secret123', method).startswith(expected + '$')
+
+
+def test_login_upgrades_outdated_hash(app):
+    with app.app_context():
+        add_user('reader', 'reader@example.com', password_hash=generate_password_hash('secret123', 'pbkdf2:sha256:500'))
+
+    assert login(app, 'reader').status_code == 200
+    with app.app_context():
+        user = db.session.query(User).filter_by(username='reader').one()
+        assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+        assert not user.password_needs_rehash()
+        assert user.check_password('secret123')
+
+
+def test_failed_login_keeps_outdated_hash(app):
+    old_hash = generate_password_hash('secret123', 'pbkdf2:sha256:500')
+    with app.app_context():
+        add_user('reader', 'reader@example.com', password_hash=old_hash)
+
+    assert login(app, 'reader', 'wrong').status_code == 401
+    with app.app_context():
+        assert db.session.query(User.password_hash).filter_by(username='reader').scalar() == old_hash
+
+
+def test_full_hash_queue_is_rejected():
+    hasher = PasswordHasher()
+    hasher._config = {'method': 'pbkdf2', 'salt_length': 16, 'workers': 1, 'max_queue': 0, 'retry_after': 3}
+    # 占满唯一的槽位，模拟进程池正忙
+    hasher._executor = object()
+    hasher._pid = os.getpid()
+    hasher._slots = threading.BoundedSemaphore(1)
+    hasher._slots.acquire()
+
+    with pytest.raises(PasswordHashBusy) as excinfo:
+        hasher.verify('hash', 'secret123')
+    assert excinfo.value.retry_after == 3
+
+
+@pytest.mark.parametrize('path, payload', [
+    ('/api/auth/login', {'username': 'reader', 'password': 'secret123'}),
+    ('/api/auth/register', {'username': 'writer', 'email': 'writer@example.com', 'password': 'secret123'}),
+])
+def test_busy_hash_pool_returns_503(app, monkeypatch, path, payload):
+    with app.app_context():
+        add_user('reader', 'reader@example.com')
+
+    def busy(*args):
+        raise PasswordHashBusy(2)
+
+    monkeypatch.setattr(password_hasher, '_run', busy)
+    response = app.test_client().post(path, json=payload)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '2'
+
+
+@pytest.mark.parametrize('identifier', ['reader', 'reader@example.com', 'a@b'])
+def test_login_by_username_or_email(app, identifier):
+    with app.app_context():
+        add_user('reader', 'reader@example.com')
+        # 用户名里带 @ 的旧账号：邮箱查不到时回退按用户名查找
+        add_user('a@b', 'other@example.com')
+
+    response = login(app, identifier)
+    assert response.status_code == 200
+    expected = 'a@b' if identifier == 'a@b' else 'reader'
+    assert response.get_json()['user']['username'] == expected
+
+
+def test_find_for_login_uses_one_lookup_per_column(app):
+    with app.app_context():
+        add_user('reader', 'reader@example.com')
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+
+        assert User.find_for_login(db.session, 'reader@example.com').username == 'reader'
+        assert User.find_for_login(db.session, 'reader').username == 'reader'
+        assert User.find_for_login(db.session, 'nobody@example.com') is None
+
+    lookups = [s for s in statements if 'FROM users' in s]
+    assert len(lookups) == 4
+    assert all(' OR ' not in s for s in lookups)
+    assert ['users.email = ?' in s for s in lookups] == [True, False, True, False]
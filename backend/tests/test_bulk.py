@@ -0,0 +1,98 @@
+import io
+import json
+
+from flask_jwt_extended import create_access_token
+
+from app import db
+from models.cultural_resource import CulturalResource
+from models.user import User
+from services import bulk
+from services.bulk import import_resources, iter_records
+from services.identity import identity_claims
+
+
+def resource(title, **fields):
+    return dict({'title': title, 'content': '正文', 'type': '非遗', 'category': '湖湘'}, **fields)
+
+
+def jsonl(*lines):
+    return io.StringIO(''.join(
+        (line if isinstance(line, str) else json.dumps(line, ensure_ascii=False)) + '\n' for line in lines
+    ))
+
+
+def titles():
+    return sorted(title for (title,) in db.session.query(CulturalResource.title))
+
+
+def test_import_reports_invalid_rows_by_line(app):
+    stream = jsonl(
+        resource('湘绣', tags='非遗,刺绣'),
+        '{not json',
+        resource('缺正文', content=''),
+        '',
+        resource('状态错误', status='deleted'),
+        resource('优先级错误', priority='high'),
+        resource('花鼓戏', status='draft', priority='3'),
+    )
+    with app.app_context():
+        result = import_resources(db.session, iter_records(stream), chunk_size=2)
+
+        assert result['imported'] == 2
+        assert result['failed'] == 4
+        assert [error['line'] for error in result['errors']] == [2, 3, 5, 6]
+        assert result['errors'][1]['error'] == 'content 是必需的'
+        assert titles() == ['湘绣', '花鼓戏']
+        draft = db.session.query(CulturalResource).filter_by(title='花鼓戏').one()
+        assert (draft.status, draft.priority) == ('draft', 3)
+
+
+def test_import_csv_reports_file_line_numbers(app):
+    stream = io.StringIO('title,content,type,category\n湘绣,正文,非遗,湖湘\n缺分类,正文,非遗,\n')
+    with app.app_context():
+        result = import_resources(db.session, iter_records(stream, 'csv'))
+    assert result['imported'] == 1
+    assert result['errors'] == [{'line': 3, 'error': 'category 是必需的'}]
+
+
+def test_failed_chunk_is_rolled_back_alone(app, monkeypatch):
+    attach = bulk.attach_tags_bulk
+    calls = []
+
+    def attach_failing_second_chunk(session, tags_by_resource):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError('disk full')
+        attach(session, tags_by_resource)
+
+    monkeypatch.setattr(bulk, 'attach_tags_bulk', attach_failing_second_chunk)
+    stream = jsonl(*(resource(f'资源{index}') for index in range(5)))
+    with app.app_context():
+        result = import_resources(db.session, iter_records(stream), chunk_size=2)
+
+        assert result['imported'] == 3
+        assert [error['line'] for error in result['errors']] == [3, 4]
+        assert result['errors'][0]['error'] == '写入失败: disk full'
+        assert titles() == ['资源0', '资源1', '资源4']
+
+
+def test_import_endpoint_requires_admin(app):
+    with app.app_context():
+        tokens = {}
+        for role in ('admin', 'user'):
+            user = User(username=role, email=f'{role}@example.com', role=role)
+            user.set_password('secret123')
+            db.session.add(user)
+            db.session.commit()
+            tokens[role] = create_access_token(identity=user.id, additional_claims=identity_claims(user))
+
+    client = app.test_client()
+    body = jsonl(resource('湘绣'), resource('缺类型', type='')).getvalue().encode('utf-8')
+    denied = client.post('/api/resources/import', data=body, headers={'Authorization': f"Bearer {tokens['user']}"})
+    assert denied.status_code == 403
+
+    response = client.post('/api/resources/import', data=body, headers={'Authorization': f"Bearer {tokens['admin']}"})
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload['success'] is False
+    assert payload['data'] == {'imported': 1, 'failed': 1, 'errors': [{'line': 2, 'error': 'type 是必需的'}]}
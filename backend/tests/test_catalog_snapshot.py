@@ -0,0 +1,43 @@
+from app import db
+from models.cultural_resource import CulturalResource
+from services.catalog_snapshot import catalog_snapshot
+
+
+def add_resource(title, status='published', category='历史遗迹', tags='古建'):
+    resource = CulturalResource(title=title, type='建筑', category=category, tags=tags, status=status)
+    db.session.add(resource)
+    db.session.commit()
+    return resource.id
+
+
+def snapshot_titles(**filters):
+    return [record.title for record in catalog_snapshot.view(**filters).records]
+
+
+def test_full_build_only_keeps_published(app):
+    with app.app_context():
+        add_resource('岳麓书院')
+        add_resource('草稿', status='draft')
+        add_resource('归档', status='archived')
+        catalog_snapshot.refresh(full=True)
+
+        assert snapshot_titles() == ['岳麓书院']
+        assert snapshot_titles(category='历史遗迹') == ['岳麓书院']
+        assert snapshot_titles(tags=['古建']) == ['岳麓书院']
+
+
+def test_incremental_rebuild_tracks_status_changes(app):
+    with app.app_context():
+        published = add_resource('岳麓书院')
+        draft = add_resource('天心阁', status='draft')
+        catalog_snapshot.refresh(full=True)
+        assert snapshot_titles() == ['岳麓书院']
+
+        db.session.get(CulturalResource, published).status = 'archived'
+        db.session.get(CulturalResource, draft).status = 'published'
+        db.session.commit()
+        catalog_snapshot.refresh()
+
+        assert snapshot_titles() == ['天心阁']
+        assert snapshot_titles(tags=['古建']) == ['天心阁']
+        assert catalog_snapshot.status()['resources'] == 1
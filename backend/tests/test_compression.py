@@ -0,0 +1,103 @@
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from services import compression
+from services.compression import Compressor
+
+BODY = {'data': ['湖湘文化'] * 200}
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    compressor = Compressor(app)
+
+    @app.route('/big')
+    def big():
+        response = jsonify(BODY)
+        response.set_etag('v1')
+        return response
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/stream')
+    def stream():
+        return Response((chunk for chunk in ('a' * 2048,)), mimetype='text/plain')
+
+    app.compressor = compressor
+    return app
+
+
+@pytest.fixture
+def fake_brotli(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', SimpleNamespace(compress=lambda data, quality: b'br:' + data))
+
+
+def get(app, path, accept_encoding=None):
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding is not None else {}
+    return app.test_client().get(path, headers=headers)
+
+
+def test_gzip_response(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    app = make_app()
+    response = get(app, '/big', 'gzip, deflate')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    # 压缩后强 ETag 降为弱 ETag
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert gzip.decompress(response.data) == get(app, '/big').data
+
+
+@pytest.mark.parametrize('accept_encoding', [None, 'identity', 'gzip;q=0', 'deflate'])
+def test_uncompressed_when_not_accepted(accept_encoding):
+    response = get(make_app(), '/big', accept_encoding)
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == '"v1"'
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+@pytest.mark.parametrize('path', ['/small', '/stream'])
+def test_small_and_streamed_responses_are_left_alone(path):
+    response = get(make_app(), path, 'gzip')
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.mark.parametrize('accept_encoding, encoding', [
+    ('gzip, br', 'br'),
+    ('br;q=0.5, gzip', 'gzip'),
+    ('br', 'br'),
+    ('gzip', 'gzip'),
+])
+def test_brotli_negotiation(fake_brotli, accept_encoding, encoding):
+    response = get(make_app(), '/big', accept_encoding)
+    assert response.headers['Content-Encoding'] == encoding
+    if encoding == 'br':
+        assert response.data.startswith(b'br:')
+
+
+def test_without_brotli_br_only_clients_get_identity(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    response = get(make_app(), '/big', 'br')
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_cached_entries_keep_their_compressed_bodies(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    app = make_app()
+    entry = SimpleNamespace(body=b'x' * 4096, encoded={})
+    compress = app.compressor.compress
+    calls = []
+    monkeypatch.setattr(app.compressor, 'compress', lambda data, encoding: calls.append(encoding) or compress(data, encoding))
+
+    for added in (True, False):
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+            response = app.response_class(entry.body, mimetype='application/json')
+            assert app.compressor.apply_cached(response, entry) is added
+            assert gzip.decompress(response.get_data()) == entry.body
+    assert calls == ['gzip']
@@ -0,0 +1,42 @@
+from services.count_cache import CountCache
+
+
+def test_cached_count_is_reused():
+    cache = CountCache()
+    calls = []
+
+    def count():
+        calls.append(1)
+        return 7
+
+    assert cache.get_or_count(('湘绣',), count) == 7
+    assert cache.get_or_count(('湘绣',), count) == 7
+    assert len(calls) == 1
+
+
+def test_invalidate_forces_a_recount():
+    cache = CountCache()
+    assert cache.get_or_count('all', lambda: 1) == 1
+    cache.invalidate()
+    assert cache.get_or_count('all', lambda: 2) == 2
+
+
+def test_count_racing_an_invalidation_is_not_cached():
+    cache = CountCache()
+
+    def count_during_write():
+        # 计数进行时另一个请求写入并失效了缓存
+        cache.invalidate()
+        return 1
+
+    assert cache.get_or_count('all', count_during_write) == 1
+    assert cache.get_or_count('all', lambda: 2) == 2
+    assert cache.get_or_count('all', lambda: 3) == 2
+
+
+def test_oldest_entries_are_evicted():
+    cache = CountCache()
+    cache.max_entries = 2
+    for key in ('a', 'b', 'c'):
+        cache.get_or_count(key, lambda: 1)
+    assert list(cache._entries) == ['b', 'c']
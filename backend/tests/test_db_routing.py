@@ -0,0 +1,90 @@
+import pytest
+from flask import g
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app, db
+from models.cultural_resource import CulturalResource
+from models.user import User
+from services.identity import identity_claims, user_cache
+
+
+@pytest.fixture
+def app(config, tmp_path):
+    """主库与“副本”指向同一个 SQLite 文件，按引擎记录执行过的语句"""
+    config.SQLALCHEMY_BINDS = {'replica': f'sqlite:///{tmp_path / "test.db"}'}
+    config.DB_REPLICA_BINDS = ['replica']
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        app.statements = {'primary': [], 'replica': []}
+        for name, engine in (('primary', db.engine), ('replica', db.engines['replica'])):
+            event.listen(
+                engine, 'before_cursor_execute',
+                lambda conn, cursor, statement, *args, name=name: app.statements[name].append(statement),
+            )
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # init_app 为每个 bind 在全局 db 上登记了 metadata，不清掉的话后续测试的 create_all 会找不到引擎
+    db.metadatas.pop('replica', None)
+
+
+@pytest.fixture
+def token(app):
+    with app.app_context():
+        user = User(username='reader', email='reader@example.com')
+        user.set_password('secret123')
+        db.session.add(user)
+        db.session.commit()
+        user_cache.invalidate(user.id)
+        return create_access_token(identity=user.id, additional_claims=identity_claims(user))
+
+
+def statements_on(app, target, table):
+    return [s for s in app.statements[target] if table in s]
+
+
+def test_read_only_queries_use_replica(app):
+    with app.test_request_context():
+        g.db_read_only = True
+        db.session.query(CulturalResource).all()
+    assert statements_on(app, 'replica', 'cultural_resources')
+    assert not statements_on(app, 'primary', 'cultural_resources')
+
+
+def test_reads_stay_on_primary_after_a_write(app):
+    with app.test_request_context():
+        g.db_read_only = True
+        db.session.add(CulturalResource(title='岳麓书院', type='建筑', category='历史遗迹'))
+        db.session.flush()
+        db.session.query(CulturalResource).all()
+        db.session.rollback()
+    assert not statements_on(app, 'replica', 'cultural_resources')
+    assert any(s.startswith('SELECT') for s in statements_on(app, 'primary', 'cultural_resources'))
+
+
+def test_unmarked_requests_use_primary(app):
+    with app.test_request_context():
+        db.session.query(CulturalResource).all()
+    assert not statements_on(app, 'replica', 'cultural_resources')
+
+
+def test_profile_user_lookup_uses_replica(app, token):
+    app.statements['primary'].clear()
+    response = app.test_client().get('/api/auth/profile', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert response.get_json()['data']['username'] == 'reader'
+    assert statements_on(app, 'replica', 'users')
+    assert not statements_on(app, 'primary', 'users')
+
+
+def test_profile_update_writes_to_primary(app, token):
+    response = app.test_client().put(
+        '/api/auth/profile', json={'bio': '湖湘'}, headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.status_code == 200
+    assert any(s.startswith('UPDATE users') for s in statements_on(app, 'primary', 'users'))
+    assert not statements_on(app, 'replica', 'users')
@@ -0,0 +1,70 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import db
+from models.user import User
+from services.identity import UserCache, identity_claims, user_cache
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(username='reader', email='reader@example.com', bio='旧简介')
+        user.set_password('secret123')
+        db.session.add(user)
+        db.session.commit()
+        user_cache.invalidate(user.id)
+        return user.id
+
+
+def auth_headers(app, user_id):
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        return {'Authorization': f'Bearer {create_access_token(identity=user.id, additional_claims=identity_claims(user))}'}
+
+
+def test_snapshot_is_cached_until_invalidated(app, user_id):
+    cache = UserCache()
+    with app.app_context():
+        first = cache.get(user_id)
+        db.session.get(User, user_id).bio = '新简介'
+        db.session.commit()
+        assert cache.get(user_id) is first
+
+        cache.invalidate(user_id)
+        assert cache.get(user_id).bio == '新简介'
+
+
+def test_load_racing_an_invalidation_is_not_cached(app, user_id, monkeypatch):
+    cache = UserCache()
+    with app.app_context():
+        load = db.session.get
+
+        def load_during_update(*args):
+            # 读取快照期间另一个请求修改了资料
+            cache.invalidate(user_id)
+            return load(*args)
+
+        monkeypatch.setattr(db.session, 'get', load_during_update)
+        cache.get(user_id)
+        assert user_id not in cache._entries
+
+
+def test_inactive_user_is_not_loaded(app, user_id):
+    headers = auth_headers(app, user_id)
+    with app.app_context():
+        db.session.get(User, user_id).is_active = False
+        db.session.commit()
+        user_cache.invalidate(user_id)
+
+    assert app.test_client().get('/api/auth/profile', headers=headers).status_code == 404
+
+
+def test_profile_update_is_visible_immediately(app, user_id):
+    client = app.test_client()
+    headers = auth_headers(app, user_id)
+    assert client.get('/api/auth/profile', headers=headers).get_json()['data']['bio'] == '旧简介'
+
+    response = client.put('/api/auth/profile', json={'bio': '新简介'}, headers=headers)
+    assert response.status_code == 200
+    assert client.get('/api/auth/profile', headers=headers).get_json()['data']['bio'] == '新简介'
@@ -0,0 +1,114 @@
+import os
+from urllib.parse import unquote
+
+import pytest
+from flask import Flask
+
+from services.avatar_pipeline import avatar_pipeline
+from services.media import MediaServer
+
+
+CONTENT = bytes(range(256)) * 8
+
+
+@pytest.fixture
+def media_root(tmp_path):
+    root = tmp_path / 'media'
+    root.mkdir()
+    (root / 'clip.mp4').write_bytes(CONTENT)
+    (root / '湘绣 第1集?.mp4').write_bytes(CONTENT)
+    return root
+
+
+def make_app(tmp_path, media_root, **config):
+    app = Flask(__name__)
+    app.config.update(MEDIA_ROOT=str(media_root), AVATAR_UPLOAD_PATH=str(tmp_path / 'uploads'), **config)
+    avatar_pipeline.init_app(app)
+    server = MediaServer(app)
+
+    @app.route('/media/<path:filename>')
+    def media_file(filename):
+        return server.send('media', filename)
+
+    return app
+
+
+@pytest.mark.parametrize('accel, header', [('accel-redirect', 'X-Accel-Redirect'), ('sendfile', 'X-Sendfile')])
+def test_offload_header_is_percent_encoded(tmp_path, media_root, accel, header):
+    app = make_app(tmp_path, media_root, MEDIA_ACCEL=accel)
+    response = app.test_client().get('/media/湘绣 第1集%3F.mp4')
+
+    assert response.status_code == 200
+    value = response.headers[header]
+    value.encode('latin-1')
+    assert '?' not in value and ' ' not in value
+    if accel == 'accel-redirect':
+        assert unquote(value) == '/protected-media/media/湘绣 第1集?.mp4'
+    else:
+        assert unquote(value) == os.path.join(str(media_root), '湘绣 第1集?.mp4')
+    assert response.data == b''
+
+
+def test_range_request_returns_partial_content(tmp_path, media_root):
+    client = make_app(tmp_path, media_root).test_client()
+    response = client.get('/media/clip.mp4', headers={'Range': 'bytes=100-199'})
+
+    assert response.status_code == 206
+    assert response.data == CONTENT[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+
+
+def test_full_response_advertises_ranges_and_etag(tmp_path, media_root):
+    client = make_app(tmp_path, media_root).test_client()
+    response = client.get('/media/clip.mp4')
+
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    etag, weak = response.get_etag()
+    assert etag and not weak
+
+
+def test_matching_etag_returns_not_modified(tmp_path, media_root):
+    client = make_app(tmp_path, media_root).test_client()
+    etag = client.get('/media/clip.mp4').headers['ETag']
+    response = client.get('/media/clip.mp4', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_etag_changes_when_file_is_rewritten(tmp_path, media_root):
+    client = make_app(tmp_path, media_root).test_client()
+    etag = client.get('/media/clip.mp4').headers['ETag']
+    path = media_root / 'clip.mp4'
+    path.write_bytes(CONTENT[::-1])
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1))
+
+    assert client.get('/media/clip.mp4', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_stale_if_range_returns_full_file(tmp_path, media_root):
+    client = make_app(tmp_path, media_root).test_client()
+    response = client.get('/media/clip.mp4', headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+
+    assert response.status_code == 200
+    assert response.data == CONTENT
+
+
+def test_etag_does_not_read_the_file(tmp_path, media_root, monkeypatch):
+    client = make_app(tmp_path, media_root, MEDIA_ACCEL='accel-redirect').test_client()
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError('file opened on the serving path')
+
+    monkeypatch.setattr('builtins.open', forbidden)
+    assert client.get('/media/clip.mp4').status_code == 200
+
+
+def test_path_outside_root_is_not_found(tmp_path, media_root):
+    (tmp_path / 'secret.txt').write_text('secret')
+    client = make_app(tmp_path, media_root).test_client()
+
+    assert client.get('/media/..%2Fsecret.txt').status_code == 404
+    assert client.get('/media/missing.mp4').status_code == 404
@@ -0,0 +1,111 @@
+from datetime import datetime
+
+import pytest
+
+from services.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 3, 9, 14, 30, 5, 123456)
+    assert decode_cursor(encode_cursor(7, created_at, 42)) == (7, created_at, 42)
+
+
+def test_cursor_round_trip_negative_priority():
+    created_at = datetime(2020, 1, 1)
+    assert decode_cursor(encode_cursor(-3, created_at, 1)) == (-3, created_at, 1)
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(1, datetime(2024, 1, 1), 10 ** 12)
+    assert '=' not in cursor
+    assert set(cursor) <= set('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')
+
+
+@pytest.mark.parametrize('cursor', [
+    '',
+    'not-a-cursor',
+    encode_cursor(1, None, 1),
+    # priority 为 NULL 的游标不能被悄悄当成 0
+    encode_cursor(None, datetime(2024, 1, 1), 1),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+LEGACY_TABLE = '''
+CREATE TABLE cultural_resources (
+    id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, description TEXT, content TEXT,
+    type VARCHAR(50) NOT NULL, category VARCHAR(50) NOT NULL, tags VARCHAR(200), author VARCHAR(100),
+    source VARCHAR(200), cover_image VARCHAR(255), media_url VARCHAR(255), status VARCHAR(20),
+    priority INTEGER, view_count INTEGER, like_count INTEGER, created_at DATETIME, updated_at DATETIME
+)
+'''
+
+
+def test_backfilled_legacy_rows_are_reachable_by_cursor(config):
+    from sqlalchemy import DateTime, bindparam, text
+
+    from app import create_app, db
+    from models.cultural_resource import CulturalResource
+    from services.pagination import backfill_sort_keys
+    from services.pagination import apply_keyset, apply_sort_order
+
+    app = create_app(config, minimal=True)
+    with app.app_context():
+        db.session.execute(text(LEGACY_TABLE))
+        for id in range(1, 10):
+            db.session.execute(text(
+                "INSERT INTO cultural_resources (id, title, type, category, priority, created_at, updated_at) "
+                "VALUES (:id, 't', 'history', 'intro', :priority, :created_at, :updated_at)"
+            ).bindparams(bindparam('created_at', type_=DateTime), bindparam('updated_at', type_=DateTime)), {
+                'id': id,
+                'updated_at': datetime(2024, 1, 1),
+                'priority': None if id % 3 == 0 else 1,
+                'created_at': None if id % 4 == 0 else datetime(2024, 1, id),
+            })
+        db.session.commit()
+
+        assert backfill_sort_keys(db.session) == 5
+        assert backfill_sort_keys(db.session) == 0
+
+        seen, cursor = [], None
+        for _ in range(10):
+            query = apply_sort_order(db.session.query(CulturalResource), CulturalResource)
+            if cursor is not None:
+                query = apply_keyset(query, CulturalResource, cursor)
+            page = query.limit(2).all()
+            if not page:
+                break
+            seen.extend(row.id for row in page)
+            last = page[-1]
+            cursor = encode_cursor(last.priority, last.created_at, last.id)
+        db.session.remove()
+
+    assert sorted(seen) == list(range(1, 10))
+
+
+@pytest.mark.parametrize('legacy, altered', [(True, ['priority', 'created_at']), (False, [])])
+def test_backfill_alters_only_nullable_columns(config, monkeypatch, legacy, altered):
+    from sqlalchemy import text
+
+    from app import create_app, db
+    from services import pagination
+
+    # SQLite 不能修改列约束，用记录语句代替 DDL，检查哪些列会被修改
+    log = "INSERT INTO ddl_log VALUES ('{}')"
+    monkeypatch.setattr(pagination, '_SORT_KEY_DDL', {
+        'sqlite': {column: [log.format(column)] for column in ('priority', 'created_at')},
+    })
+    app = create_app(config, minimal=True)
+    with app.app_context():
+        db.session.execute(text('CREATE TABLE ddl_log (name TEXT)'))
+        if legacy:
+            db.session.execute(text(LEGACY_TABLE))
+        else:
+            db.create_all()
+        db.session.commit()
+
+        pagination.backfill_sort_keys(db.session)
+        assert [name for (name,) in db.session.execute(text('SELECT name FROM ddl_log'))] == altered
+        db.session.remove()
@@ -0,0 +1,141 @@
+import pytest
+from flask import Flask
+
+from services import rate_limit
+from services.rate_limit import MemoryBackend, Rate, RateLimiter, parse_rate
+from services.warmup import WARMUP_ENVIRON_KEY
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.mark.parametrize('value, capacity, per_second', [
+    ('10/minute', 10, 10 / 60),
+    ('5/second burst 20', 20, 5),
+    (' 100 / Hour ', 100, 100 / 3600),
+    ('2/day burst 1', 1, 2 / 86400),
+])
+def test_parse_rate(value, capacity, per_second):
+    rate = parse_rate(value)
+    assert rate.capacity == capacity
+    assert rate.per_second == pytest.approx(per_second)
+
+
+@pytest.mark.parametrize('value', [None, '', 'off', 'None'])
+def test_parse_rate_disabled(value):
+    assert parse_rate(value) is None
+
+
+@pytest.mark.parametrize('value', ['10', '10/week', 'ten/minute', '10/minute burst'])
+def test_parse_rate_invalid(value):
+    with pytest.raises(ValueError):
+        parse_rate(value)
+
+
+def test_bucket_allows_burst_then_rejects(clock):
+    backend = MemoryBackend()
+    rate = Rate(3, 1)
+    assert [backend.consume('k', rate)[0] for _ in range(3)] == [True, True, True]
+    allowed, wait = backend.consume('k', rate)
+    assert not allowed
+    assert wait == pytest.approx(1)
+
+
+def test_bucket_refills_over_time(clock):
+    backend = MemoryBackend()
+    rate = Rate(2, 0.5)  # 每 2 秒补充一个令牌
+    backend.consume('k', rate)
+    backend.consume('k', rate)
+
+    clock.now += 1
+    allowed, wait = backend.consume('k', rate)
+    assert not allowed
+    assert wait == pytest.approx(1)
+
+    clock.now += 1
+    assert backend.consume('k', rate) == (True, 0)
+
+
+def test_bucket_refill_is_capped_at_capacity(clock):
+    backend = MemoryBackend()
+    rate = Rate(2, 10)
+    backend.consume('k', rate)
+    clock.now += 3600
+    assert [backend.consume('k', rate)[0] for _ in range(3)] == [True, True, False]
+
+
+def test_buckets_are_per_key(clock):
+    backend = MemoryBackend()
+    rate = Rate(1, 1)
+    assert backend.consume('a', rate)[0]
+    assert backend.consume('b', rate)[0]
+    assert not backend.consume('a', rate)[0]
+
+
+def test_least_recently_used_bucket_is_evicted(clock):
+    backend = MemoryBackend(max_keys=2)
+    rate = Rate(1, 0.001)
+    backend.consume('a', rate)
+    backend.consume('b', rate)
+    backend.consume('a', rate)
+    backend.consume('c', rate)
+
+    # 最近访问过的 a 仍然受限，被淘汰的 b 重新开始计数
+    assert not backend.consume('a', rate)[0]
+    assert backend.consume('b', rate)[0]
+
+
+@pytest.fixture
+def app(clock):
+    app = Flask(__name__)
+    app.config['RATE_LIMITS'] = {'ping': '2/minute'}
+
+    @app.route('/ping')
+    def ping():
+        return 'pong'
+
+    RateLimiter(app)
+    return app
+
+
+def test_rejected_request_gets_retry_after(app):
+    client = app.test_client()
+    assert [client.get('/ping').status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get('/ping')
+    assert response.headers['Retry-After'] == '30'
+    assert response.get_json() == {'message': '请求过于频繁，请稍后重试'}
+
+
+def test_warmup_requests_are_not_limited(app):
+    client = app.test_client()
+    for _ in range(5):
+        assert client.get('/ping', environ_base={WARMUP_ENVIRON_KEY: True}).status_code == 200
+    assert [client.get('/ping').status_code for _ in range(3)] == [200, 200, 429]
+
+
+@pytest.mark.parametrize('proxies, expected', [(1, [400, 400, 429]), (0, [400, 429, 429])])
+def test_anonymous_clients_are_keyed_by_forwarded_ip(config, proxies, expected):
+    from app import create_app
+
+    config.PROXY_FIX_X_FOR = proxies
+    config.RATE_LIMITS = {'auth.login': '1/minute'}
+    client = create_app(config).test_client()
+
+    def login(client_ip):
+        # 代理把客户端地址追加在 X-Forwarded-For 末尾，请求本身都来自代理 10.0.0.1
+        return client.post('/api/auth/login', json={}, headers={'X-Forwarded-For': client_ip},
+                           environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code
+
+    assert [login('203.0.113.7'), login('198.51.100.2'), login('203.0.113.7')] == expected
@@ -0,0 +1,170 @@
+import os
+from collections import defaultdict
+
+import pytest
+from flask import Flask
+
+from services.counters import counter_buffer
+from services.response_cache import CachedResponse, ResponseCache, counter_snapshot, fresh_counts
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+
+    @app.route('/api/resources/')
+    def get_resources():
+        return ''
+
+    @app.route('/api/resources/<int:id>')
+    def get_resource(id):
+        return ''
+
+    return app
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache()
+
+
+@pytest.fixture
+def counters(monkeypatch):
+    # 使用独立的计数，不启动全局缓冲的落库线程
+    monkeypatch.setattr(counter_buffer, '_totals', defaultdict(int))
+    monkeypatch.setattr(counter_buffer, '_pending', defaultdict(int))
+    monkeypatch.setattr(counter_buffer, '_inflight', {})
+    return counter_buffer
+
+
+def key_for(app, cache, path, version=0):
+    with app.test_request_context(path):
+        return cache.make_key(version)
+
+
+def test_key_ignores_query_arg_order(app, cache):
+    assert key_for(app, cache, '/api/resources/?category=湘绣&page=2') == \
+        key_for(app, cache, '/api/resources/?page=2&category=湘绣')
+
+
+def test_key_ignores_repeated_arg_order(app, cache):
+    assert key_for(app, cache, '/api/resources/?tag=a&tag=b') == key_for(app, cache, '/api/resources/?tag=b&tag=a')
+
+
+def test_key_ignores_percent_encoding(app, cache):
+    assert key_for(app, cache, '/api/resources/?category=%E6%B9%98%E7%BB%A3') == \
+        key_for(app, cache, '/api/resources/?category=湘绣')
+
+
+def test_key_keeps_empty_args(app, cache):
+    # cursor= 表示游标分页的第一页，与页码分页的响应不同
+    assert key_for(app, cache, '/api/resources/?cursor=') != key_for(app, cache, '/api/resources/')
+
+
+@pytest.mark.parametrize('other', [
+    '/api/resources/?page=3',
+    '/api/resources/?page=2&limit=20',
+    '/api/resources/1',
+])
+def test_key_distinguishes_requests(app, cache, other):
+    assert key_for(app, cache, '/api/resources/?page=2') != key_for(app, cache, other)
+
+
+def test_key_distinguishes_view_args(app, cache):
+    assert key_for(app, cache, '/api/resources/1') != key_for(app, cache, '/api/resources/2')
+
+
+def test_key_changes_with_catalog_version(app, cache):
+    assert key_for(app, cache, '/api/resources/', version=1) != key_for(app, cache, '/api/resources/', version=2)
+
+
+def test_fresh_counts_adds_increments_since_caching(counters):
+    payload = {'data': [{'id': 1, 'view_count': 10, 'like_count': 2}, {'id': 2, 'view_count': 5}]}
+    counters._totals[('view_count', 1)] = 4
+    entry = CachedResponse(b'', 'application/json', 'etag', None,
+                           counters=counter_snapshot(payload), pid=os.getpid())
+    assert fresh_counts(entry) == {}
+
+    counters._totals[('view_count', 1)] += 3
+    counters._totals[('like_count', 1)] += 1
+    assert fresh_counts(entry) == {('view_count', 1): 13, ('like_count', 1): 3}
+
+
+def test_fresh_counts_from_other_process_uses_pending(counters):
+    entry = CachedResponse(b'', 'application/json', 'etag', None,
+                           counters=counter_snapshot({'data': {'id': 7, 'view_count': 1}}), pid=-1)
+    counters._totals[('view_count', 7)] = 9
+    counters._pending[('view_count', 7)] = 2
+    assert fresh_counts(entry) == {('view_count', 7): 3}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cached_detail(monkeypatch, counters):
+    from services import response_cache as module
+
+    clock = Clock()
+    monkeypatch.setattr(module.time, 'time', clock)
+    app = Flask(__name__)
+    app.config['RESPONSE_CACHE_COUNTER_REFRESH'] = 5
+    cache = ResponseCache(app)
+    renders = []
+
+    @app.route('/api/resources/<int:id>')
+    @cache.cached
+    def get_resource(id):
+        renders.append(id)
+        return {'data': {'id': id, 'title': '湘绣', 'view_count': 10}}
+
+    return app.test_client(), clock, renders
+
+
+def test_cached_counts_refresh_at_most_once_per_interval(cached_detail, counters):
+    client, clock, renders = cached_detail
+    assert client.get('/api/resources/1').get_json()['data']['view_count'] == 10
+
+    counters._totals[('view_count', 1)] += 2
+    clock.now += 1
+    response = client.get('/api/resources/1')
+    assert response.headers['X-Cache'] == 'HIT'
+    assert response.get_json()['data']['view_count'] == 10
+
+    clock.now += 5
+    refreshed = client.get('/api/resources/1')
+    assert refreshed.get_json()['data']['view_count'] == 12
+
+    # 间隔内再次命中直接复用补好的条目，不再重新序列化
+    counters._totals[('view_count', 1)] += 1
+    clock.now += 1
+    response = client.get('/api/resources/1')
+    assert response.get_json()['data']['view_count'] == 12
+    assert response.headers['ETag'] == refreshed.headers['ETag']
+
+    clock.now += 5
+    assert client.get('/api/resources/1').get_json()['data']['view_count'] == 13
+    assert renders == [1]
+
+
+def test_refreshed_counts_change_validators(cached_detail, counters):
+    client, clock, _ = cached_detail
+    first = client.get('/api/resources/1')
+
+    counters._totals[('view_count', 1)] += 1
+    clock.now += 10
+    response = client.get('/api/resources/1', headers={
+        'If-None-Match': first.headers['ETag'],
+        'If-Modified-Since': first.headers['Last-Modified'],
+    })
+    assert response.status_code == 200
+    assert response.get_json()['data']['view_count'] == 11
+    assert response.headers['ETag'] != first.headers['ETag']
+
+    again = client.get('/api/resources/1', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
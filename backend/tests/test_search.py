@@ -0,0 +1,91 @@
+import pytest
+
+from app import create_app, db
+from models.cultural_resource import CulturalResource
+from services.search import MemorySearchBackend, tokenize
+
+
+def test_tokenize_empty():
+    assert tokenize(None) == []
+    assert tokenize('') == []
+
+
+def test_tokenize_cjk_bigrams():
+    assert tokenize('湖湘文化') == ['湖湘', '湘文', '文化']
+
+
+def test_tokenize_cjk_unigrams_for_index():
+    assert tokenize('湘绣', unigrams=True) == ['湘绣', '湘', '绣']
+
+
+def test_tokenize_single_cjk_char():
+    assert tokenize('湘') == ['湘']
+    assert tokenize('湘', unigrams=True) == ['湘']
+
+
+def test_tokenize_latin_words_lowercased():
+    assert tokenize('Yuelu Academy 976') == ['yuelu', 'academy', '976']
+
+
+def test_tokenize_mixed_text_splits_on_script_and_punctuation():
+    assert tokenize('岳麓书院（Yuelu）始建于976年') == ['岳麓', '麓书', '书院', 'yuelu', '始建', '建于', '976', '年']
+
+
+def test_memory_backend_reindex_replaces_postings():
+    backend = MemorySearchBackend()
+    backend._add(1, {'title': '湘绣', 'description': None, 'content': '长沙刺绣'})
+    backend._add(2, {'title': '湘绣', 'description': None, 'content': None})
+    backend._add(1, {'title': '花鼓戏', 'description': None, 'content': None})
+
+    assert backend._postings['湘绣'] == {2: 3.0}
+    assert '刺绣' not in backend._postings
+    assert backend._postings['花鼓'] == {1: 3.0}
+    assert backend._total_length == sum(backend._doc_lengths.values())
+
+
+def add_resource(title, content=None):
+    resource = CulturalResource(title=title, content=content, type='建筑', category='历史遗迹')
+    db.session.add(resource)
+    db.session.commit()
+    return resource
+
+
+def test_memory_backend_refresh_picks_up_updates_and_deletions(app):
+    backend = MemorySearchBackend(refresh_interval=0)
+    with app.app_context():
+        academy = add_resource('岳麓书院')
+        pavilion = add_resource('天心阁')
+        assert [id for id, _ in backend.search(db.session, '书院', 10)] == [academy.id]
+
+        academy.title = '岳麓山'
+        db.session.delete(pavilion)
+        db.session.commit()
+        added = add_resource('湘江书院')
+
+        assert [id for id, _ in backend.search(db.session, '书院', 10)] == [added.id]
+        assert [id for id, _ in backend.search(db.session, '岳麓', 10)] == [academy.id]
+        assert backend.search(db.session, '天心', 10) == []
+        assert set(backend._doc_lengths) == {academy.id, added.id}
+
+
+def test_latin_fragments_do_not_match_inside_words(app):
+    backend = MemorySearchBackend(refresh_interval=0)
+    with app.app_context():
+        academy = add_resource('Yuelu Academy')
+        assert [id for id, _ in backend.search(db.session, 'yuelu', 10)] == [academy.id]
+        assert backend.search(db.session, 'yue', 10) == []
+
+
+@pytest.mark.parametrize('max_results, capped', [(2, True), (10, False)])
+def test_search_total_reports_cap(config, max_results, capped):
+    config.SEARCH_BACKEND = 'memory'
+    config.SEARCH_MAX_RESULTS = max_results
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        for index in range(3):
+            add_resource(f'湘绣{index}')
+
+    pagination = app.test_client().get('/api/resources/?search=湘绣').get_json()['pagination']
+    assert pagination['total'] == min(3, max_results)
+    assert pagination['total_capped'] is capped
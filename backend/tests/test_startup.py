@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json
+import sys
+
+{imports}
+print(json.dumps(sorted(sys.modules)))
+'''
+
+# 精简模式和 init_db.py 只需要数据库、搜索索引和密码哈希
+HEAVY_MODULES = (
+    'PIL', 'routes', 'services.catalog', 'services.catalog_snapshot', 'services.rankings',
+    'services.response_cache', 'services.avatar_pipeline',
+)
+
+
+def loaded_modules(tmp_path, imports, **env):
+    """在全新的解释器里执行 imports，返回执行后已导入的模块"""
+    env = dict(
+        os.environ, DATABASE_URL=f'sqlite:///{tmp_path / "startup.db"}',
+        PASSWORD_HASH_WORKERS='0', WARMUP_ENABLED='false', **env,
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD.format(imports=imports)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60, check=True,
+    )
+    return set(json.loads(result.stdout))
+
+
+def heavy(modules):
+    return sorted(m for m in modules if any(m == name or m.startswith(name + '.') for name in HEAVY_MODULES))
+
+
+@pytest.mark.parametrize('imports', [
+    'from app import create_app\ncreate_app(minimal=True)',
+    'import init_db\ninit_db.create_app(minimal=True)',
+])
+def test_minimal_app_skips_heavy_modules(tmp_path, imports):
+    assert heavy(loaded_modules(tmp_path, imports)) == []
+
+
+def test_lazy_blueprints_defer_route_imports(tmp_path):
+    modules = loaded_modules(tmp_path, 'from app import create_app\ncreate_app()', LAZY_BLUEPRINTS='true')
+    assert not any(m.startswith('routes') for m in modules)
+    assert 'PIL' not in modules
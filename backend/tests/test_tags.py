@@ -0,0 +1,75 @@
+import pytest
+
+from app import create_app, db
+from models.cultural_resource import CulturalResource
+from services.catalog_snapshot import catalog_snapshot
+from services.tags import normalize_tags, sync_resource_tags, tag_cloud
+
+RESOURCES = {
+    '湘绣': ['非遗', '刺绣'],
+    '花鼓戏': ['非遗', '戏曲'],
+    '岳麓书院': ['古建'],
+}
+
+
+@pytest.fixture(params=[False, True], ids=['database', 'snapshot'])
+def catalog(request, config):
+    config.CATALOG_SNAPSHOT_ENABLED = request.param
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        for title, tags in RESOURCES.items():
+            resource = CulturalResource(title=title, type='非遗', category='湖湘', tags=','.join(tags))
+            db.session.add(resource)
+            db.session.flush()
+            sync_resource_tags(db.session, resource.id, tags)
+        db.session.commit()
+    if request.param:
+        catalog_snapshot.refresh(full=True)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def list_titles(app, query):
+    response = app.test_client().get(f'/api/resources/?{query}')
+    assert response.status_code == 200
+    return sorted(item['title'] for item in response.get_json()['data'])
+
+
+def test_normalize_tags_splits_strips_and_dedupes():
+    assert normalize_tags(['非遗, 刺绣', '非遗', ' ']) == ['非遗', '刺绣']
+    assert normalize_tags('戏曲') == ['戏曲']
+    assert normalize_tags(None) == []
+
+
+@pytest.mark.parametrize('query, titles', [
+    ('tag=非遗', ['湘绣', '花鼓戏']),
+    ('tag=非遗&tag=刺绣', ['湘绣']),
+    ('tag=非遗,刺绣&tag_mode=all', ['湘绣']),
+    ('tag=刺绣&tag=古建', []),
+    ('tag=刺绣&tag=古建&tag_mode=any', ['岳麓书院', '湘绣']),
+    ('tag=不存在&tag=戏曲&tag_mode=any', ['花鼓戏']),
+])
+def test_list_filters_by_tags(catalog, query, titles):
+    assert list_titles(catalog, query) == titles
+
+
+def test_unknown_tag_mode_is_rejected(catalog):
+    response = catalog.test_client().get('/api/resources/?tag=非遗&tag_mode=some')
+    assert response.status_code == 400
+
+
+def test_sync_updates_tag_counts(catalog):
+    with catalog.app_context():
+        resource = db.session.query(CulturalResource).filter_by(title='花鼓戏').one()
+        sync_resource_tags(db.session, resource.id, ['戏曲', '长沙'])
+        db.session.commit()
+        assert tag_cloud(db.session) == [
+            {'name': '刺绣', 'count': 1},
+            {'name': '古建', 'count': 1},
+            {'name': '戏曲', 'count': 1},
+            {'name': '长沙', 'count': 1},
+            {'name': '非遗', 'count': 1},
+        ]
@@ -0,0 +1,64 @@
+import pytest
+
+from app import create_app, db
+from models.cultural_resource import CulturalResource
+from services import warmup as warmup_module
+from services.warmup import warmup
+
+
+@pytest.fixture
+def app(config):
+    config.WARMUP_ENABLED = True
+    config.WARMUP_RETRY_INTERVAL = 0
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        for index, category in enumerate(('历史遗迹', '历史遗迹', '传统艺术')):
+            db.session.add(CulturalResource(title=f'资源{index}', type='非遗', category=category))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def ready(app):
+    response = app.test_client().get('/ready')
+    return response.status_code, response.get_json()['warmup']['state'], response
+
+
+def test_not_ready_until_warmed(app):
+    status, state, response = ready(app)
+    assert (status, state) == (503, 'pending')
+    assert response.headers['Retry-After'] == '1'
+
+    warmup.start(wait=True)
+    status, state, response = ready(app)
+    assert (status, state) == (200, 'ready')
+    # 标签云和两个排行、全部资源与两个分类各两页列表、第一页上三个资源的详情
+    assert response.get_json()['warmup']['warmed_requests'] == 3 + 3 * 2 + 3
+
+
+def test_forked_worker_must_warm_up_itself(app, monkeypatch):
+    warmup.start(wait=True)
+    monkeypatch.setattr(warmup_module.os, 'getpid', lambda: -1)
+    assert ready(app)[:2] == (503, 'pending')
+
+
+def test_unreachable_database_is_retried(app, monkeypatch):
+    attempts = []
+    open_pools = warmup._open_pools
+
+    def fail_first_attempt():
+        attempts.append(1)
+        return len(attempts) > 1 and open_pools()
+
+    monkeypatch.setattr(warmup, '_open_pools', fail_first_attempt)
+    warmup.start(wait=True)
+    assert len(attempts) == 2
+    assert ready(app)[:2] == (200, 'ready')
+
+
+def test_disabled_warmup_is_always_ready(config):
+    app = create_app(config)
+    assert ready(app)[:2] == (200, 'disabled')
@@ -0,0 +1,12 @@
+"""生产环境 WSGI 入口：gunicorn -c gunicorn.conf.py wsgi:app
+
+开发调试仍使用 python app.py；Windows 上使用 python serve.py（waitress）。
+"""
+from app import create_app
+
+app = create_app()
+
+# 预热只由服务入口启动，CLI 命令、脚本和测试创建应用时不发内部请求；
+# gunicorn preload 时本模块在主进程导入，预热推迟到每个 worker fork 之后（services/lifecycle.after_fork）
+if not app.config['WARMUP_AFTER_FORK']:
+    app.extensions['warmup'].start()
@@ -6,7 +6,9 @@ param(
   [string]$DatabaseUrl,
 
   [Parameter(Mandatory = $true)]
-  [string]$JwtSecret
+  [string]$JwtSecret,
+
+  [switch]$Production
 )
 
 $ErrorActionPreference = "Stop"
@@ -15,4 +17,8 @@ Set-Location (Join-Path $ProjectRoot "backend")
 $env:DATABASE_URL = $DatabaseUrl
 $env:JWT_SECRET_KEY = $JwtSecret
 
-python app.py
+if ($Production) {
+  python serve.py
+} else {
+  python app.py
+}